@@ -0,0 +1,131 @@
+"""Latency of analytics queries (POST /api/analytics/query) against portfolio size.
+
+Fills a throwaway SQLite database with N applications, scores most of them once or twice, then times a
+few representative specs through analytics_service.run_query with the result cache disabled (cold) and
+enabled (repeat at an unchanged data version). For reference the first spec is also computed the old
+way, by loading the ORM rows and aggregating in Python. Run from the backend folder:
+
+    python -m benchmarks.bench_analytics [sizes]      # e.g. 100000,1000000
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from src.db.base import Base
+from src.db import models
+from src.models.credit_risk_model import risk_score_from_pd, risk_tier
+from src.schemas.risk_schemas import AnalyticsQuery
+from src.services import analytics_service
+
+_STATUSES = ("pending", "approved", "declined", "review")
+_PURPOSES = ("car", "home", "education", "business", None)
+
+SPECS = {
+    "tier x purpose": {"group_by": [{"field": "tier"}, {"field": "purpose"}], "metrics": [{"op": "count"}, {"op": "avg", "field": "pd"}]},
+    "pd histogram": {"group_by": [{"field": "pd", "width": 0.05}], "metrics": [{"op": "count"}]},
+    "approval by band/month": {
+        "group_by": [{"field": "month"}, {"field": "credit_score", "width": 50}],
+        "metrics": [{"op": "count"}, {"op": "share", "field": "status", "value": "approved"}],
+    },
+    "filtered expected loss": {
+        "group_by": [{"field": "status"}],
+        "metrics": [{"op": "sum", "field": "expected_loss"}],
+        "filters": {"tier": ["HIGH", "CRITICAL"], "created_from": "2020-03-01T00:00:00"},
+    },
+}
+
+
+def _fill(engine, n: int) -> None:
+    rng = random.Random(0)
+    start = datetime(2020, 1, 1)
+    chunk = 50000
+    with engine.begin() as conn:
+        for lo in range(0, n, chunk):
+            ids = range(lo + 1, min(n, lo + chunk) + 1)
+            conn.execute(
+                insert(models.Application),
+                [
+                    {
+                        "id": i,
+                        "applicant_name": f"applicant {i}",
+                        "requested_amount": rng.randint(500, 50000),
+                        "purpose": rng.choice(_PURPOSES),
+                        "credit_score": rng.randint(300, 850),
+                        "created_at": start + timedelta(minutes=2 * i),
+                        "status": rng.choice(_STATUSES),
+                    }
+                    for i in ids
+                ],
+            )
+            # ~90% scored, a third of those twice (only the later assessment counts)
+            assessments = []
+            for i in ids:
+                if rng.random() < 0.9:
+                    for k in range(1 + (rng.random() < 0.33)):
+                        assessments.append(
+                            {"application_id": i, "evaluator": "bench", "score": round(rng.betavariate(2, 8), 2), "created_at": start + timedelta(minutes=2 * i + k)}
+                        )
+            conn.execute(insert(models.RiskAssessment), assessments)
+
+
+def _python_tier_by_purpose(db) -> dict:
+    """The pre-analytics approach: pull rows into Python and aggregate there."""
+    latest = {}
+    for ra in db.scalars(select(models.RiskAssessment).where(models.RiskAssessment.score.is_not(None))):
+        prev = latest.get(ra.application_id)
+        if prev is None or (ra.created_at, ra.id) > (prev.created_at, prev.id):
+            latest[ra.application_id] = ra
+    groups = defaultdict(lambda: [0, 0.0])
+    for app in db.scalars(select(models.Application)):
+        ra = latest.get(app.id)
+        if ra is None:
+            continue
+        pd = float(ra.score)
+        group = groups[(risk_tier(risk_score_from_pd(pd)), app.purpose)]
+        group[0] += 1
+        group[1] += pd
+    return groups
+
+
+def _time(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000.0
+
+
+def run(n: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        _fill(engine, n)
+        Session = sessionmaker(bind=engine)
+        # cache keys carry the data version, which the Core inserts above leave at 0 in every database
+        os.environ["ANALYTICS_CACHE_SIZE"] = "256"
+        analytics_service.get_cache().clear()
+        print(f"\n{n} applications")
+        with Session() as db:
+            for name, spec in SPECS.items():
+                query = AnalyticsQuery.model_validate(spec)
+                os.environ["ANALYTICS_CACHE_SIZE"] = "0"
+                cold = _time(lambda: analytics_service.run_query(db, query))
+                os.environ["ANALYTICS_CACHE_SIZE"] = "256"
+                analytics_service.run_query(db, query)
+                warm = _time(lambda: analytics_service.run_query(db, query))
+                groups = len(analytics_service.run_query(db, query)["rows"])
+                print(f"  {name:<24} {groups:>5} groups  SQL {cold:9.1f} ms   cached {warm:6.2f} ms")
+            python_ms = _time(lambda: _python_tier_by_purpose(db))
+            print(f"  {'tier x purpose (Python)':<24} {'':>5}         {python_ms:9.1f} ms")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    sizes = [int(s) for s in sys.argv[1].split(",")] if len(sys.argv) > 1 else [100000]
+    for size in sizes:
+        run(size)
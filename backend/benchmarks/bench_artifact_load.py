@@ -0,0 +1,61 @@
+"""Artifact load benchmark: legacy joblib pickles vs the native/.npy bundle (models/bundle).
+
+Each measurement runs in a fresh interpreter and includes the library imports the format needs.
+Run from the backend folder (build the bundle first with `python -m src.models.artifacts`):
+
+    python -m benchmarks.bench_artifact_load [runs]
+"""
+import json
+import os
+import subprocess
+import sys
+
+_PROBES = {
+    # what the API did before: unpickle model and preprocessor
+    "pickle": r"""
+import time, warnings
+warnings.filterwarnings("ignore")
+t0 = time.perf_counter()
+import joblib
+model = joblib.load("models/xgboost_model.pkl")
+pre = joblib.load("models/preprocessor.pkl")
+pre.compile_plan()
+print(time.perf_counter() - t0)
+""",
+    "bundle": r"""
+import time
+t0 = time.perf_counter()
+from src.models import artifacts
+model = artifacts.load_model("models/bundle")
+pre = artifacts.load_preprocessor("models/bundle")
+print(time.perf_counter() - t0)
+""",
+    # SCORING_ENGINE=numpy: preprocessor + mmap'd tree arrays, no xgboost import
+    "bundle_numpy": r"""
+import time
+t0 = time.perf_counter()
+from src.models import artifacts
+pre = artifacts.load_preprocessor("models/bundle")
+engine = artifacts.load_engine("models/bundle")
+print(time.perf_counter() - t0)
+""",
+}
+
+
+def _run(code: str) -> float:
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1]) * 1e3
+
+
+def main(runs: int = 5) -> None:
+    if not os.path.exists(os.path.join("models", "bundle", "manifest.json")):
+        raise SystemExit("models/bundle not found; run `python -m src.models.artifacts` first")
+    report = {}
+    for name, code in _PROBES.items():
+        samples = sorted(_run(code) for _ in range(runs))
+        report[name] = {"median_ms": samples[len(samples) // 2], "min_ms": samples[0], "max_ms": samples[-1]}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,151 @@
+"""Load comparison of DB_MODE=sync vs DB_MODE=async on read-heavy endpoints.
+
+For each mode a uvicorn worker is started on a seeded SQLite database (copied per run) and hit with
+a fixed number of concurrent clients; throughput and latency percentiles are reported per endpoint.
+Pool settings can be passed through the usual DB_POOL_* variables. Run from the backend folder:
+
+    python -m benchmarks.bench_db_modes [concurrency] [requests_per_endpoint]
+"""
+import asyncio
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from sqlalchemy import create_engine, insert
+
+from src.db.base import Base
+from src.db import models
+
+N_APPLICATIONS = 20000
+N_ASSESSED = 200
+
+
+def _seed(path: str) -> None:
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(0)
+    start = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(
+            insert(models.Application),
+            [
+                {
+                    "applicant_name": f"applicant {i}",
+                    "requested_amount": rng.randint(500, 50000),
+                    "purpose": "car",
+                    "created_at": start + timedelta(minutes=i),
+                    "status": rng.choice(("pending", "approved", "declined", "review")),
+                }
+                for i in range(N_APPLICATIONS)
+            ],
+        )
+        conn.execute(
+            insert(models.RiskAssessment),
+            [
+                {"application_id": app_id, "evaluator": "automated", "score": rng.random(), "created_at": start + timedelta(minutes=k)}
+                for app_id in range(1, N_ASSESSED + 1)
+                for k in range(20)
+            ],
+        )
+    engine.dispose()
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _endpoints(rng: random.Random):
+    return {
+        "GET /api/applications/{id}": lambda: f"/api/applications/{rng.randint(1, N_APPLICATIONS)}",
+        "GET /api/applications/?status": lambda: "/api/applications/?limit=50&status=approved",
+        "GET /api/risk-assessments/application/{id}": lambda: f"/api/risk-assessments/application/{rng.randint(1, N_ASSESSED)}",
+    }
+
+
+async def _load(base_url: str, make_path, concurrency: int, total: int) -> dict:
+    latencies = []
+    errors = 0
+    remaining = total
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        async def worker():
+            nonlocal remaining, errors
+            while remaining > 0:
+                remaining -= 1
+                t0 = time.perf_counter()
+                r = await client.get(make_path())
+                latencies.append(time.perf_counter() - t0)
+                errors += r.status_code != 200
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    pct = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1e3  # noqa: E731
+    return {"rps": total / elapsed, "p50_ms": pct(0.50), "p95_ms": pct(0.95), "p99_ms": pct(0.99), "errors": errors}
+
+
+def _run_mode(mode: str, seeded_db: str, concurrency: int, total: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        shutil.copy(seeded_db, db_path)
+        port = _free_port()
+        env = {**os.environ, "DB_MODE": mode, "DATABASE_URL": f"sqlite:///{db_path}", "PREDICTION_CACHE_SIZE": "0"}
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "src.api.main:app", "--port", str(port), "--log-level", "warning"],
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        base_url = f"http://127.0.0.1:{port}"
+        try:
+            deadline = time.time() + 60
+            while True:
+                try:
+                    if httpx.get(f"{base_url}/health").status_code == 200:
+                        break
+                except httpx.HTTPError:
+                    pass
+                if time.time() > deadline:
+                    raise SystemExit(f"{mode} server did not start")
+                time.sleep(0.1)
+            rng = random.Random(1)
+            results = {}
+            for name, make_path in _endpoints(rng).items():
+                asyncio.run(_load(base_url, make_path, concurrency, max(50, total // 10)))  # warm-up
+                results[name] = asyncio.run(_load(base_url, make_path, concurrency, total))
+            return results
+        finally:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+
+def main(concurrency: int = 64, total: int = 2000) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        seeded = os.path.join(tmp, "seed.db")
+        _seed(seeded)
+        report = {mode: _run_mode(mode, seeded, concurrency, total) for mode in ("sync", "async")}
+
+    print(f"concurrency={concurrency} requests/endpoint={total}")
+    print(f"{'endpoint':<44} {'mode':<6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>6}")
+    for name in report["sync"]:
+        for mode in ("sync", "async"):
+            r = report[mode][name]
+            print(f"{name:<44} {mode:<6} {r['rps']:>8.0f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['errors']:>6}")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 64,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 2000,
+    )
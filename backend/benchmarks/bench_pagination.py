@@ -0,0 +1,85 @@
+"""Deep-page latency of the applications listing: OFFSET vs keyset (cursor) pagination.
+
+Fills a throwaway SQLite database with N applications (with the model's indexes), then times fetching
+a 50-row page at several depths through list_applications_page, once with `offset` and once with the
+cursor of the row just before that depth. Keyset pages should cost the same at any depth; OFFSET pages
+grow linearly with it. Run from the backend folder:
+
+    python -m benchmarks.bench_pagination [sizes]      # e.g. 100000,1000000
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from src.db.base import Base
+from src.db import models
+from src.services.application_service import list_applications_page
+from src.utils.pagination import encode_cursor
+
+PAGE = 50
+_STATUSES = ("pending", "approved", "declined", "review")
+
+
+def _fill(engine, n: int) -> None:
+    rng = random.Random(0)
+    start = datetime(2020, 1, 1)
+    chunk = 50000
+    with engine.begin() as conn:
+        for lo in range(0, n, chunk):
+            conn.execute(
+                insert(models.Application),
+                [
+                    {
+                        "applicant_name": f"applicant {i}",
+                        "requested_amount": rng.randint(500, 50000),
+                        "purpose": "car",
+                        # a few rows share a timestamp so the id tie-breaker is exercised
+                        "created_at": start + timedelta(seconds=i // 3),
+                        "status": rng.choice(_STATUSES),
+                    }
+                    for i in range(lo, min(n, lo + chunk))
+                ],
+            )
+
+
+def _time(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1e3
+
+
+def run(n: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        t0 = time.perf_counter()
+        _fill(engine, n)
+        print(f"\n{n:,} applications (filled in {time.perf_counter() - t0:.1f} s)")
+        db = sessionmaker(bind=engine)()
+        print(f"{'depth':>10} {'filter':>16} {'offset ms':>10} {'keyset ms':>10}")
+        for status in (None, "approved"):
+            total = db.query(models.Application).filter(*([models.Application.status == status] if status else [])).count()
+            for depth in (0, total // 100, total // 10, total // 2, (total * 9) // 10):
+                # cursor of the row just before `depth` (not timed)
+                prev, _ = list_applications_page(db, limit=1, status=status, offset=depth - 1) if depth else ([], None)
+                cursor = encode_cursor(prev[0].created_at, prev[0].id) if prev else None
+                offset_ms = _time(lambda: list_applications_page(db, limit=PAGE, status=status, offset=depth))
+                keyset_ms = _time(lambda: list_applications_page(db, limit=PAGE, status=status, cursor=cursor))
+                print(f"{depth:>10,} {status or '-':>16} {offset_ms:>10.2f} {keyset_ms:>10.2f}")
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    sizes = sys.argv[1] if len(sys.argv) > 1 else "100000,1000000"
+    for size in sizes.split(","):
+        run(int(size))
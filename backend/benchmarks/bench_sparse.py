@@ -0,0 +1,66 @@
+"""Dense vs sparse (CSR) feature matrices on a synthetic wide dataset.
+
+Samples N rows of synthetic credit data with extra high-cardinality categorical columns (see
+src/models/synthetic.py) and runs each FeaturePreprocessor mode through the steps a model sees:
+fit + transform of the training matrix, xgboost training, batch scoring of payloads
+(build_feature_matrix_from_payloads + predict_proba) and batch SHAP. Reports the matrix size and the
+time of every step, and checks that the sparse model scores its CSR batch exactly like the NaN-filled
+dense rows single-row serving builds. Run from the backend folder:
+
+    python -m benchmarks.bench_sparse [rows] [wide_columns] [cardinality]     # default 20000 4 1000
+"""
+import sys
+import time
+
+import numpy as np
+
+from src.models import shap_explainer, training
+from src.models.credit_risk_model import prepare_xy
+from src.models.feature_engineering import FeaturePreprocessor, dense_from_csr, derive_features, is_sparse
+from src.models.synthetic import SyntheticCreditData
+from src.utils.schema_adapter import build_feature_matrix_from_payloads
+
+ROUNDS = 100
+BATCH = 1000
+SHAP_ROWS = 500
+
+
+def _nbytes(X) -> int:
+    return X.data.nbytes + X.indices.nbytes + X.indptr.nbytes if is_sparse(X) else X.nbytes
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    out = fn()
+    return out, (time.perf_counter() - start) * 1000.0
+
+
+def run(rows: int, wide_columns: int, cardinality: int) -> None:
+    generator = SyntheticCreditData(wide_columns=wide_columns, cardinality=cardinality)
+    df = generator.sample(rows, np.random.default_rng(0))
+    X, y = prepare_xy(derive_features(df))
+    payloads = df.drop(columns=["target"]).head(BATCH).to_dict("records")
+    print(f"{rows} rows, {wide_columns} extra columns x {cardinality} categories")
+
+    for sparse in (False, True):
+        pre = FeaturePreprocessor(sparse=sparse)
+        M, fit_ms = _timed(lambda: (pre.fit(X), pre.transform(X))[1])
+        clf = training.make_classifier({}, 42, training.resolve_jobs(None), n_estimators=ROUNDS, tree_method="hist")
+        _, train_ms = _timed(lambda: clf.fit(M, y))
+        B, vectorize_ms = _timed(lambda: build_feature_matrix_from_payloads(payloads, pre))
+        scores, predict_ms = _timed(lambda: clf.predict_proba(B)[:, 1])
+        explainer = shap_explainer.create_explainer(clf)
+        _, shap_ms = _timed(lambda: shap_explainer.explain_vector(B[:SHAP_ROWS], explainer=explainer))
+        print(
+            f"  {'sparse' if sparse else 'dense':<6} {M.shape[1]:>6} features  matrix {_nbytes(M) / 1e6:8.1f} MB"
+            f"  fit+transform {fit_ms:7.0f} ms  train {train_ms:7.0f} ms"
+            f"  batch of {BATCH}: vectorize {vectorize_ms:6.1f} ms, predict {predict_ms:6.1f} ms, SHAP ({SHAP_ROWS}) {shap_ms:6.1f} ms"
+        )
+        if sparse:
+            gap = np.abs(clf.predict_proba(dense_from_csr(B))[:, 1] - scores).max()
+            print(f"  max |CSR - dense row| prediction of the sparse model: {gap:.2e}")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:4]]
+    run(*(args + [20000, 4, 1000][len(args) :]))
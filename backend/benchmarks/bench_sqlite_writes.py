@@ -0,0 +1,93 @@
+"""SQLite write throughput: default journal vs SQLITE_PROFILE=performance vs performance + group commit.
+
+Each configuration runs in a fresh interpreter (the engine and writer are configured from the
+environment at import) against a new database file. A number of threads insert risk assessments
+through risk_service.create_risk_assessment_with_score, one request-sized transaction per call, as
+concurrent /calculate requests would. Run from the backend folder:
+
+    python -m benchmarks.bench_sqlite_writes [threads] [rows_per_thread]
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+CONFIGS = {
+    "default": {"SQLITE_PROFILE": "default", "DB_GROUP_COMMIT_MS": "0"},
+    "performance": {"SQLITE_PROFILE": "performance", "DB_GROUP_COMMIT_MS": "0"},
+    "performance+group_commit": {"SQLITE_PROFILE": "performance", "DB_GROUP_COMMIT_MS": "2"},
+}
+
+
+def _worker(threads: int, rows_per_thread: int) -> None:
+    import threading
+    import time
+
+    from src.db.base import Base
+    from src.db import group_commit
+    from src.db.session import SessionLocal, engine
+    from src.services import risk_service
+
+    Base.metadata.create_all(bind=engine)
+    latencies = []
+    lock = threading.Lock()
+
+    def run(tid: int):
+        db = SessionLocal()
+        local = []
+        try:
+            for i in range(rows_per_thread):
+                t0 = time.perf_counter()
+                risk_service.create_risk_assessment_with_score(db, tid * rows_per_thread + i + 1, "bench", "", 0.1)
+                local.append(time.perf_counter() - t0)
+        finally:
+            db.close()
+        with lock:
+            latencies.extend(local)
+
+    start = time.perf_counter()
+    pool = [threading.Thread(target=run, args=(t,)) for t in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - start
+    stats = group_commit.writer_metrics()
+    group_commit.shutdown_writer()
+
+    latencies.sort()
+    pct = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1e3  # noqa: E731
+    print(json.dumps({
+        "rows_per_s": len(latencies) / elapsed,
+        "p50_ms": pct(0.50),
+        "p99_ms": pct(0.99),
+        "rows_per_commit": stats.get("avg_rows_per_commit", 1.0),
+    }))
+
+
+def main(threads: int = 16, rows_per_thread: int = 200) -> None:
+    print(f"threads={threads} rows/thread={rows_per_thread}")
+    print(f"{'config':<26} {'rows/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'rows/commit':>12}")
+    for name, overrides in CONFIGS.items():
+        with tempfile.TemporaryDirectory() as tmp:
+            env = {**os.environ, **overrides, "DATABASE_URL": f"sqlite:///{os.path.join(tmp, 'bench.db')}"}
+            out = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_sqlite_writes", "--worker", str(threads), str(rows_per_thread)],
+                env=env,
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            r = json.loads(out.strip().splitlines()[-1])
+            print(f"{name:<26} {r['rows_per_s']:>8.0f} {r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f} {r['rows_per_commit'] or 1.0:>12.1f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--worker":
+        _worker(int(sys.argv[2]), int(sys.argv[3]))
+    else:
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 16,
+            int(sys.argv[2]) if len(sys.argv) > 2 else 200,
+        )
@@ -0,0 +1,52 @@
+"""Startup-time benchmark: API import time, time to first /health and time until /ready turns green.
+
+Each measurement runs in a fresh interpreter. Run from the backend folder:
+
+    python -m benchmarks.bench_startup [runs]
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+_PROBE = r"""
+import json, os, time
+t0 = time.perf_counter()
+from src.api.main import app
+t_import = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(app) as client:
+    t_started = time.perf_counter()
+    client.get("/health")
+    t_health = time.perf_counter()
+    while client.get("/ready").status_code != 200:
+        if time.perf_counter() - t0 > 120:
+            raise SystemExit("not ready after 120 s")
+        time.sleep(0.005)
+    t_ready = time.perf_counter()
+print(json.dumps({
+    "import_ms": (t_import - t0) * 1e3,
+    "health_ms": (t_health - t0) * 1e3,
+    "ready_ms": (t_ready - t0) * 1e3,
+    "startup_ms": (t_started - t0) * 1e3,
+}))
+"""
+
+
+def run_once() -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp}/bench.db")
+        out = subprocess.run([sys.executable, "-c", _PROBE], env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(runs: int = 3) -> None:
+    results = [run_once() for _ in range(runs)]
+    print(f"{'metric':<12} " + " ".join(f"{'run ' + str(i + 1):>10}" for i in range(runs)))
+    for key in ("import_ms", "startup_ms", "health_ms", "ready_ms"):
+        print(f"{key:<12} " + " ".join(f"{r[key]:>10.0f}" for r in results))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 3)
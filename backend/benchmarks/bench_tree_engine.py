@@ -0,0 +1,50 @@
+"""Parity check and latency comparison: compiled NumPy tree engine vs XGBClassifier.predict_proba.
+
+Run from the backend folder:
+
+    python -m benchmarks.bench_tree_engine
+"""
+import time
+
+import joblib
+import numpy as np
+
+from src.models.tree_engine import CompiledTreeEnsemble
+
+BATCH_SIZES = (1, 64, 4096)
+
+
+def _time_per_call(fn, X, repeats: int) -> float:
+    fn(X)  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn(X)
+    return (time.perf_counter() - start) / repeats
+
+
+def main(model_path: str = "models/xgboost_model.pkl", seed: int = 0) -> None:
+    model = joblib.load(model_path)
+    engine = CompiledTreeEnsemble.from_model(model)
+    rng = np.random.default_rng(seed)
+
+    # Parity: standardized numerics / one-hot style inputs, with some missing values
+    X = rng.normal(size=(4096, engine.n_features))
+    X[:, 9:] = (X[:, 9:] > 0.8).astype(float)
+    X[rng.random(X.shape) < 0.02] = np.nan
+    expected = model.predict_proba(X)[:, 1]
+    got = engine.predict_proba(X)[:, 1]
+    max_err = float(np.max(np.abs(expected - got)))
+    print(f"parity: {engine.n_trees} trees, max depth {engine.max_depth}, max |p_xgb - p_numpy| = {max_err:.2e}")
+    assert max_err < 1e-5, "compiled engine diverges from xgboost"
+
+    print(f"{'batch':>6} {'xgboost ms':>12} {'numpy ms':>10} {'speedup':>8}")
+    for n in BATCH_SIZES:
+        Xb = X[:n]
+        repeats = 200 if n < 1000 else 20
+        t_xgb = _time_per_call(model.predict_proba, Xb, repeats)
+        t_np = _time_per_call(engine.predict_proba, Xb, repeats)
+        print(f"{n:>6} {t_xgb * 1e3:>12.3f} {t_np * 1e3:>10.3f} {t_xgb / t_np:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""
+Write a synthetic credit dataset in the german_credit.csv schema (see src/models/synthetic.py), for
+trying the out-of-core training path on realistic sizes. Run from the backend folder:
+
+    python generate_synthetic_data.py data/synthetic/credit_10m.csv --rows 10000000
+    python train_model.py --data data/synthetic/credit_10m.csv --out-of-core
+    python generate_synthetic_data.py data/synthetic/wide.csv --rows 200000 --wide-columns 5 --cardinality 2000
+"""
+import argparse
+import time
+
+from src.models import synthetic
+
+parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+parser.add_argument("path", help="CSV to write")
+parser.add_argument("--rows", type=int, default=1_000_000)
+parser.add_argument("--chunk-size", type=int, default=100_000, help="rows generated and written at a time")
+parser.add_argument("--seed", type=int, default=0)
+parser.add_argument("--wide-columns", type=int, default=0, help="extra high-cardinality categorical columns")
+parser.add_argument("--cardinality", type=int, default=1000, help="categories per extra column")
+parser.add_argument("--reference", default=synthetic.REFERENCE_PATH, help="dataset the distributions are learned from")
+args = parser.parse_args()
+
+start = time.perf_counter()
+size = synthetic.write_csv(
+    args.path,
+    args.rows,
+    chunk_size=args.chunk_size,
+    seed=args.seed,
+    reference_path=args.reference,
+    wide_columns=args.wide_columns,
+    cardinality=args.cardinality,
+)
+print(f"✓ Wrote {args.rows} rows ({size / 1e6:.1f} MB) to {args.path} in {time.perf_counter() - start:.1f} s")
@@ -0,0 +1,47 @@
+"""
+Bulk-load applications from an NDJSON or CSV file (or stdin) into the configured database.
+
+The file is streamed and committed in chunks, so memory stays flat for any input size; invalid rows
+are reported by record number and skipped. Run from the backend folder:
+
+    python ingest_applications.py applications.csv [--format csv|ndjson] [--chunk-size 1000] [--score] [--model-version V]
+    cat applications.ndjson | python ingest_applications.py -
+"""
+import argparse
+import json
+import sys
+
+from src.db.base import Base
+from src.db.session import DATABASE_URL, SessionLocal, engine
+from src.services import ingest_service
+
+parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+parser.add_argument("path", help="NDJSON or CSV file, or - for stdin")
+parser.add_argument("--format", choices=ingest_service.FORMATS, help="default: from the file extension, else ndjson")
+parser.add_argument("--chunk-size", type=int, default=ingest_service.DEFAULT_CHUNK_SIZE)
+parser.add_argument("--score", action="store_true", help="persist a risk assessment for every inserted application")
+parser.add_argument("--model-version", help="resident model version used with --score (default: active)")
+parser.add_argument("--max-errors", type=int, default=ingest_service.DEFAULT_MAX_ERRORS, help="row errors listed in the report")
+args = parser.parse_args()
+
+fmt = args.format or ingest_service.detect_format(filename=args.path)
+Base.metadata.create_all(bind=engine)
+print(f"Ingesting {args.path} ({fmt}) into {DATABASE_URL} ...", file=sys.stderr)
+
+stream = sys.stdin if args.path == "-" else open(args.path, newline="", encoding="utf-8")
+db = SessionLocal()
+try:
+    report = ingest_service.ingest_lines(
+        db, stream, fmt, chunk_size=args.chunk_size, score=args.score, model_version=args.model_version, max_errors=args.max_errors
+    )
+finally:
+    db.close()
+    if stream is not sys.stdin:
+        stream.close()
+
+for err in report["errors"]:
+    print(f"  ✗ row {err['row']}: {err['error']}", file=sys.stderr)
+if report["errors_truncated"]:
+    print(f"  ... {report['failed'] - len(report['errors'])} more failed rows", file=sys.stderr)
+print(json.dumps({k: v for k, v in report.items() if k != "errors"}))
+sys.exit(1 if report["inserted"] == 0 and report["received"] > 0 else 0)
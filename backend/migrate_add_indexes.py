@@ -0,0 +1,29 @@
+"""
+Migration script to create the listing/pagination indexes declared on the models
+(applications, risk_assessments, shap_explanations) in an existing database.
+Tables created by the API on a fresh database already have them. Safe to run repeatedly.
+"""
+from sqlalchemy import inspect
+
+from src.db.base import Base
+from src.db import models  # noqa: F401  (registers the tables on Base.metadata)
+from src.db.session import engine, DATABASE_URL
+
+print(f"Creating missing indexes on {DATABASE_URL} ...")
+inspector = inspect(engine)
+for table in Base.metadata.sorted_tables:
+    if not inspector.has_table(table.name):
+        print(f"  - Table {table.name} does not exist yet, skipping")
+        continue
+    existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+    for index in sorted(table.indexes, key=lambda ix: ix.name):
+        if index.name in existing:
+            print(f"  - Index {index.name} already exists, skipping")
+            continue
+        try:
+            index.create(bind=engine)
+            print(f"  ✓ Created index: {index.name}")
+        except Exception as e:
+            print(f"  ✗ Error creating index {index.name}: {e}")
+
+print("\nMigration completed!")
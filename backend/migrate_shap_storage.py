@@ -0,0 +1,96 @@
+"""
+Migration script to move SHAP explanations to the compact storage format.
+
+- applies the retention policy (SHAP_RETENTION latest explanations per application, 0 keeps all)
+- creates the shap_feature_sets table and the compact columns on shap_explanations
+- converts JSON rows to feature-set indexes + float32 impacts and clears their shap_json
+
+The schema step is shap_storage.upgrade_schema, which the API also runs at startup: one transaction,
+and on SQLite a table rebuild because the NOT NULL on shap_json cannot be relaxed in place. Rows are
+then converted in place, one committed batch at a time, skipping rows already converted, so the
+script can be interrupted and re-run. Names are indexed into the current model's feature table when
+the model artifacts load. Pass --vacuum on SQLite to return the freed pages to the file system.
+"""
+import json
+import sys
+
+from sqlalchemy import inspect, select, text, update
+
+from src.db import models
+from src.db.session import DATABASE_URL, SessionLocal, engine
+from src.services import shap_storage
+
+BATCH_SIZE = 5000
+TABLE = models.ShapExplanation.__tablename__
+
+
+def _load_model() -> None:
+    from src.models import credit_risk_model
+
+    try:
+        credit_risk_model.load_artifacts()
+        print(f"  - Indexing names into the feature table of model {credit_risk_model.get_model_version()}")
+    except Exception as e:
+        print(f"  - Model artifacts not loaded ({e}); each distinct name list gets its own feature set")
+
+
+def _compact(db, shap_json):
+    try:
+        shap_list = json.loads(shap_json)
+    except (TypeError, ValueError):
+        return None
+    return shap_storage.compact_columns(db, shap_list, None)
+
+
+def _convert_in_place(db) -> int:
+    """Convert the JSON rows still present batch by batch; returns the number converted."""
+    SE = models.ShapExplanation
+    converted, last_id = 0, 0
+    while True:
+        rows = db.execute(
+            select(SE.id, SE.shap_json).where(SE.id > last_id, SE.impacts.is_(None), SE.shap_json.is_not(None)).order_by(SE.id).limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            return converted
+        for row in rows:
+            values = _compact(db, row.shap_json)
+            if values is not None:
+                db.execute(update(SE).where(SE.id == row.id).values(shap_json=None, **values))
+                converted += 1
+        db.commit()
+        last_id = rows[-1].id
+        print(f"  - Converted up to id {last_id} ...")
+
+
+def main(vacuum: bool = False) -> None:
+    print(f"Migrating SHAP explanations on {DATABASE_URL} ...")
+    inspector = inspect(engine)
+    if not inspector.has_table(TABLE):
+        print(f"  - Table {TABLE} does not exist yet; the API creates it in the compact format")
+        return
+
+    keep = shap_storage.retention()
+    if keep:
+        with engine.begin() as conn:
+            pruned = conn.execute(shap_storage.prune_statement(None, keep)).rowcount
+        print(f"  ✓ Retention: deleted {pruned} explanations beyond the latest {keep} per application")
+
+    if shap_storage.upgrade_schema(engine):
+        print("  ✓ Added the compact columns to the table")
+    _load_model()
+    db = SessionLocal()
+    try:
+        converted = _convert_in_place(db)
+    finally:
+        db.close()
+    print(f"  ✓ Converted {converted} JSON explanations to the compact format")
+
+    if vacuum and engine.dialect.name == "sqlite":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("VACUUM"))
+        print("  ✓ VACUUM done")
+    print("\nMigration completed!")
+
+
+if __name__ == "__main__":
+    main(vacuum="--vacuum" in sys.argv[1:])
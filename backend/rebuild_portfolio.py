@@ -0,0 +1,20 @@
+"""
+Recompute the portfolio summary aggregates from applications and their latest scored assessments.
+
+The aggregates are normally maintained on every write; run this after restoring a backup, bulk edits
+made outside the API, or any other time they may have drifted. Safe to run at any time.
+"""
+from src.db.base import Base
+from src.db.session import DATABASE_URL, SessionLocal, engine
+from src.services import portfolio_service
+
+print(f"Rebuilding portfolio aggregates on {DATABASE_URL} ...")
+Base.metadata.create_all(bind=engine)
+db = SessionLocal()
+try:
+    buckets = portfolio_service.rebuild(db)
+    totals = portfolio_service.get_summary(db)["totals"]
+finally:
+    db.close()
+print(f"  ✓ {buckets} buckets, {totals['applications']} scored applications, expected loss {totals['expected_loss']:.2f}")
+print("\nRebuild completed!")
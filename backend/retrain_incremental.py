@@ -0,0 +1,62 @@
+"""
+Continue training the deployed model on applications approved or declined since it was trained (see
+src/models/incremental.py) and write the result to models/versions/<version>. Run from the backend folder:
+
+    python retrain_incremental.py [--base-version VERSION] [--rounds 100] [--chunk-size 10000]
+
+The new version is only saved when its holdout logloss beats the base model's, and it is not
+activated; load it with POST /api/models/load {"version": "<version>"} once its holdout metrics look
+right. Chain runs by passing the previous run's version as --base-version.
+"""
+import argparse
+import json
+
+from src.db.session import DATABASE_URL, SessionLocal
+from src.models import incremental
+
+parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+parser.add_argument("--models-dir", default="models")
+parser.add_argument("--base-version", help="version under models/versions to continue from (default: models/ itself)")
+parser.add_argument("--rounds", type=int, default=incremental.DEFAULT_ROUNDS, help="new trees at most")
+parser.add_argument("--early-stopping-rounds", type=int, default=20, help="0 disables early stopping")
+parser.add_argument("--learning-rate", type=float, help="learning rate of the new trees (default: the base's)")
+parser.add_argument("--holdout", type=float, default=0.2, help="share of new rows held out")
+parser.add_argument("--chunk-size", type=int, default=incremental.DEFAULT_CHUNK_SIZE, help="rows fetched from the database at a time")
+parser.add_argument("--after-id", type=int, help="train on labelled applications above this id instead of the base's watermark")
+parser.add_argument("--min-rows", type=int, default=100)
+parser.add_argument("--jobs", type=int, default=0, help="cores to use (0: all)")
+args = parser.parse_args()
+
+print(f"Incremental training from {DATABASE_URL} ...")
+db = SessionLocal()
+try:
+    result = incremental.train_incremental(
+        db,
+        models_dir=args.models_dir,
+        base_version=args.base_version,
+        rounds=args.rounds,
+        params={"learning_rate": args.learning_rate} if args.learning_rate is not None else None,
+        early_stopping_rounds=args.early_stopping_rounds or None,
+        holdout_fraction=args.holdout,
+        chunk_size=args.chunk_size,
+        after_id=args.after_id,
+        min_rows=args.min_rows,
+        n_jobs=args.jobs,
+    )
+finally:
+    db.close()
+
+if "rows" in result:
+    print(f"  {result['rows']} labelled applications with ids {result['after_application_id'] + 1}..{result['last_application_id']}", end="")
+    print(f" ({result['train_rows']} train, {result['holdout_rows']} holdout; {result['varying_features']} of {result['features']} features vary)")
+if "holdout_metrics" in result:
+    print(f"  {result['base_rounds']} + {result['new_rounds']} trees on top of {result['base_version']}")
+    print(f"  {'holdout':<10} {'base':>10} {'new':>10}")
+    for metric in ("roc_auc", "logloss", "precision", "recall"):
+        values = [result["base_holdout_metrics"][metric], result["holdout_metrics"][metric]]
+        print(f"  {metric:<10}", " ".join(f"{v:10.4f}" if v is not None else f"{'-':>10}" for v in values))
+print("  Stages (ms):", json.dumps({k: round(v, 1) for k, v in result["timings"].items()}))
+if not result["trained"]:
+    print(f"  - nothing saved on top of {result['base_version']}: {result['reason']}")
+else:
+    print(f"✓ Saved model {result['model_version']} to {result['bundle_path']}")
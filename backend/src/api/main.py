@@ -1,17 +1,25 @@
 from contextlib import asynccontextmanager
 import os
+import threading
+import time
 
 from fastapi import FastAPI
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from loguru import logger
 
-from ..db.session import engine
+from ..db.session import DB_MODE, dispose_async_engine, engine
 from ..db import base as base_module
+from ..db import group_commit
+from ..models import credit_risk_model
+from ..services import analytics_service, explanation_worker, risk_service, shap_storage
 
 from .routes.applications import router as applications_router
 from .routes.risk_assessment import router as risk_router
 from .routes.simulation import router as simulation_router
+from .routes.models import router as models_router
+from .routes.portfolio import router as portfolio_router
+from .routes.analytics import router as analytics_router
 
 
 def configure_logging() -> None:
@@ -20,6 +28,22 @@ def configure_logging() -> None:
     logger.add(lambda msg: msg, serialize=True)
 
 
+# Readiness: flipped by the warm-up thread once artifacts are loaded and a prediction + explanation ran
+_readiness = {"ready": False, "error": None, "warmup": None}
+
+
+def _load_and_warm_up() -> None:
+    start = time.perf_counter()
+    try:
+        timings = credit_risk_model.warm_up()
+        timings["total_ms"] = (time.perf_counter() - start) * 1000.0
+        _readiness.update(ready=True, error=None, warmup=timings)
+        logger.info("Model artifacts loaded and warmed up in {:.0f} ms", timings["total_ms"])
+    except Exception as e:
+        _readiness.update(ready=False, error=str(e))
+        logger.error("Model warm-up failed: {}", e)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
@@ -27,8 +51,18 @@ async def lifespan(app: FastAPI):
     logger.info("Starting application and ensuring DB tables exist")
     # Create tables for dev - production should use Alembic migrations
     base_module.Base.metadata.create_all(bind=engine)
+    # create_all does not alter existing tables: add the compact SHAP columns to a pre-existing one
+    if shap_storage.upgrade_schema(engine):
+        logger.info("Upgraded shap_explanations to the compact schema; run migrate_shap_storage.py to convert its JSON rows")
+    # Load model artifacts and warm up in the background; /health answers right away, /ready once warm
+    _readiness.update(ready=False, error=None, warmup=None)
+    threading.Thread(target=_load_and_warm_up, name="model-warmup", daemon=True).start()
     yield
-    # Shutdown (if needed in the future)
+    # Shutdown: stop the model loader, the per-version scoring micro-batchers, background SHAP pool and group-commit writer
+    credit_risk_model.shutdown_coalescer()
+    explanation_worker.shutdown_worker()
+    group_commit.shutdown_writer()
+    await dispose_async_engine()
 
 
 app = FastAPI(title="Credit Risk - Backend (FastAPI)", lifespan=lifespan)
@@ -53,10 +87,15 @@ def root():
         "version": "1.0.0",
         "docs": "/docs",
         "health": "/health",
+        "ready": "/ready",
+        "metrics": "/metrics",
         "endpoints": {
             "applications": "/api/applications",
             "risk_assessments": "/api/risk-assessments",
-            "simulation": "/api/simulation"
+            "simulation": "/api/simulation",
+            "models": "/api/models",
+            "portfolio": "/api/portfolio",
+            "analytics": "/api/analytics"
         }
     })
 
@@ -66,8 +105,44 @@ def health():
     return JSONResponse({"status": "OK"})
 
 
+@app.get("/ready")
+def ready():
+    if _readiness["ready"]:
+        return JSONResponse({"status": "READY", "warmup": _readiness["warmup"]})
+    return JSONResponse(
+        {"status": "FAILED" if _readiness["error"] else "STARTING", "error": _readiness["error"]},
+        status_code=503,
+    )
+
+
+@app.get("/metrics")
+def metrics():
+    worker = explanation_worker.get_worker()
+    return JSONResponse({
+        "scoring": credit_risk_model.scoring_metrics(),
+        "prediction_cache": credit_risk_model.prediction_cache_metrics(),
+        "models": credit_risk_model.model_registry_metrics(),
+        "explanations": worker.stats() if worker is not None else {"background_enabled": False},
+        "shap_cache": risk_service.shap_cache_metrics(),
+        "group_commit": group_commit.writer_metrics(),
+        "analytics_cache": analytics_service.cache_metrics(),
+    })
+
+
+if DB_MODE == "async":
+    # AsyncSession endpoints, mounted first so their paths shadow the sync ones; the rest (ingest, batch,
+    # simulation) keep their sync implementations
+    from .routes.async_applications import router as async_applications_router
+    from .routes.async_risk_assessment import router as async_risk_router
+
+    app.include_router(async_applications_router, prefix="/api/applications", tags=["applications"])
+    app.include_router(async_risk_router, prefix="/api/risk-assessments", tags=["risk_assessments"])
 app.include_router(applications_router, prefix="/api/applications", tags=["applications"])
 # risk endpoints including calculate and simulate
 app.include_router(risk_router, prefix="/api/risk-assessments", tags=["risk_assessments"])
 # keep old simulation router (not used) but mounted for compatibility
 app.include_router(simulation_router, prefix="/api/simulation", tags=["simulation"])
+# model registry: resident versions, background load + hot swap
+app.include_router(models_router, prefix="/api/models", tags=["models"])
+app.include_router(portfolio_router, prefix="/api/portfolio", tags=["portfolio"])
+app.include_router(analytics_router, prefix="/api/analytics", tags=["analytics"])
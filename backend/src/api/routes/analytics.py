@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from ...db.session import get_db
+from ...schemas.risk_schemas import AnalyticsQuery
+from ...services import analytics_service
+
+router = APIRouter()
+
+
+@router.post("/query")
+def run_analytics_query(spec: AnalyticsQuery, db: Session = Depends(get_db)):
+    """Aggregate applications (with their latest scored assessment) grouped by the spec's dimensions.
+
+    Example, approval rate by credit-score band per month:
+    {"group_by": [{"field": "month"}, {"field": "credit_score", "width": 50}],
+     "metrics": [{"op": "count"}, {"op": "share", "field": "status", "value": "approved"}]}
+    """
+    try:
+        return analytics_service.run_query(db, spec)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
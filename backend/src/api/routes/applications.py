@@ -1,10 +1,14 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from decimal import Decimal
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from ...db.session import get_db
-from ...schemas.risk_schemas import ApplicationCreate, ApplicationRead, ApplicationStatusUpdate
-from ...services.application_service import create_application, get_application, list_applications, update_application_status
+from ...schemas.risk_schemas import ApplicationCreate, ApplicationRead, ApplicationStatusUpdate, IngestReport
+from ...services import ingest_service
+from ...services.application_service import create_application, get_application, list_applications_page, update_application_status
+from ...utils.pagination import NEXT_CURSOR_HEADER, InvalidCursor
 
 router = APIRouter()
 
@@ -16,9 +20,76 @@ def create_application_endpoint(
     return create_application(db, payload)
 
 
+@router.post("/ingest", response_model=IngestReport)
+async def ingest_applications_endpoint(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(ndjson|csv)$"),
+    chunk_size: int = Query(ingest_service.DEFAULT_CHUNK_SIZE, ge=1, le=50000),
+    score: bool = False,
+    model_version: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """Bulk-create applications from a streamed NDJSON or CSV request body.
+
+    The body is read incrementally and committed every `chunk_size` records, so uploads of any size
+    use constant memory. The format comes from `format` or the Content-Type (text/csv for CSV, NDJSON
+    otherwise). With score=true each chunk is also scored in one batch and its assessments persisted.
+    Invalid rows are listed in the report and skipped; the rest of the load continues.
+    """
+    try:
+        parser = ingest_service.RecordParser(format or ingest_service.detect_format(request.headers.get("content-type")))
+    except ingest_service.IngestFormatError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    ingestor = ingest_service.Ingestor(db, score=score, model_version=model_version)
+    splitter = ingest_service.LineSplitter()
+    chunk = []
+
+    async def flush():
+        # DB writes and scoring run on the threadpool; the body is not read further until they finish
+        await run_in_threadpool(ingestor.process, chunk[:])
+        chunk.clear()
+
+    try:
+        async for data in request.stream():
+            for line in splitter.feed(data):
+                chunk.extend(parser.feed(line))
+                if len(chunk) >= chunk_size:
+                    await flush()
+        for line in splitter.finish():
+            chunk.extend(parser.feed(line))
+        chunk.extend(parser.finish())
+    except ingest_service.IngestFormatError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if chunk:
+        await flush()
+    return ingestor.report()
+
+
 @router.get("/", response_model=List[ApplicationRead])
-def list_applications_endpoint(limit: int = 50, offset: int = 0, db: Session = Depends(get_db)):
-    return list_applications(db, limit=limit, offset=offset)
+def list_applications_endpoint(
+    response: Response,
+    limit: int = Query(50, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
+    status: Optional[str] = Query(None, pattern="^(approved|declined|review|pending)$"),
+    min_amount: Optional[Decimal] = Query(None, ge=0),
+    max_amount: Optional[Decimal] = Query(None, ge=0),
+    db: Session = Depends(get_db),
+):
+    """List applications newest first, optionally filtered by status and requested-amount range.
+
+    Pass the X-Next-Cursor response header back as `cursor` to fetch the next page; `offset` still
+    works but deep offsets are slow on large tables.
+    """
+    try:
+        apps, next_page = list_applications_page(
+            db, limit=limit, cursor=cursor, status=status, min_amount=min_amount, max_amount=max_amount, offset=offset
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if next_page is not None:
+        response.headers[NEXT_CURSOR_HEADER] = next_page
+    return apps
 
 
 @router.get("/{application_id}", response_model=ApplicationRead)
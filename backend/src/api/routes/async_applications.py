@@ -0,0 +1,58 @@
+"""Async variants of the applications endpoints, mounted instead of the sync ones when DB_MODE=async."""
+from typing import List, Optional
+from decimal import Decimal
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...db.session import get_async_db
+from ...schemas.risk_schemas import ApplicationCreate, ApplicationRead, ApplicationStatusUpdate
+from ...services import async_application_service as service
+from ...utils.pagination import NEXT_CURSOR_HEADER, InvalidCursor
+
+router = APIRouter()
+
+
+@router.post("/", response_model=ApplicationRead, status_code=status.HTTP_201_CREATED)
+async def create_application_endpoint(payload: ApplicationCreate, db: AsyncSession = Depends(get_async_db)):
+    return await service.create_application(db, payload)
+
+
+@router.get("/", response_model=List[ApplicationRead])
+async def list_applications_endpoint(
+    response: Response,
+    limit: int = Query(50, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
+    status: Optional[str] = Query(None, pattern="^(approved|declined|review|pending)$"),
+    min_amount: Optional[Decimal] = Query(None, ge=0),
+    max_amount: Optional[Decimal] = Query(None, ge=0),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """See the sync endpoint: newest first, X-Next-Cursor for the next page."""
+    try:
+        apps, next_page = await service.list_applications_page(
+            db, limit=limit, cursor=cursor, status=status, min_amount=min_amount, max_amount=max_amount, offset=offset
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if next_page is not None:
+        response.headers[NEXT_CURSOR_HEADER] = next_page
+    return apps
+
+
+@router.get("/{application_id}", response_model=ApplicationRead)
+async def get_application_endpoint(application_id: int, db: AsyncSession = Depends(get_async_db)):
+    app = await service.get_application(db, application_id)
+    if not app:
+        raise HTTPException(status_code=404, detail="Application not found")
+    return app
+
+
+@router.patch("/{application_id}/status", response_model=ApplicationRead)
+async def update_application_status_endpoint(
+    application_id: int, payload: ApplicationStatusUpdate, db: AsyncSession = Depends(get_async_db)
+):
+    app = await service.update_application_status(db, application_id, payload.status)
+    if not app:
+        raise HTTPException(status_code=404, detail="Application not found")
+    return app
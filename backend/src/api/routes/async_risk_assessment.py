@@ -0,0 +1,93 @@
+"""Async variants of the DB-bound risk assessment endpoints (DB_MODE=async).
+
+Mounted ahead of the sync router under the same prefix, so these paths take precedence and the
+remaining endpoints (batch, simulation) keep their sync implementations. Model scoring and SHAP are
+CPU work and run on the threadpool so they do not block the event loop.
+"""
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from loguru import logger
+
+from ...db.session import get_async_db
+from ...schemas.risk_schemas import RiskAssessmentCreate, RiskAssessmentRead
+from ...services import async_application_service, async_risk_service
+from ...services.risk_service import scoring_payload
+from ...models import credit_risk_model
+from ...models.registry import ModelVersionNotFound
+from ...services import explanation_worker
+from ...utils.pagination import InvalidCursor
+from .risk_assessment import _calculate_response, _explainability_response, _risks_page
+
+router = APIRouter()
+
+
+@router.post("/calculate", status_code=status.HTTP_201_CREATED)
+async def calculate_risk(payload: RiskAssessmentCreate, db: AsyncSession = Depends(get_async_db)):
+    """Async /calculate: same request and response as the sync endpoint."""
+    app = await async_application_service.get_application(db, payload.application_id)
+    if not app:
+        raise HTTPException(status_code=404, detail="Application not found")
+    app_dict = scoring_payload(app)
+
+    try:
+        pred = await run_in_threadpool(credit_risk_model.predict_from_payload, app_dict, payload.model_version)
+    except ModelVersionNotFound:
+        raise HTTPException(status_code=404, detail=f"Model version not found: {payload.model_version}")
+    except Exception as e:
+        logger.error("Prediction failed for application {}: {}", payload.application_id, e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+    try:
+        ra = await async_risk_service.create_risk_assessment_with_score(
+            db, payload.application_id, payload.evaluator or "automated", payload.notes or "", pred["prob_default"]
+        )
+    except Exception as e:
+        logger.error("Failed to persist risk assessment: {}", e)
+        raise HTTPException(status_code=500, detail="Failed to persist assessment")
+
+    expl = None
+    worker = explanation_worker.get_worker()
+    if worker is not None and worker.submit(payload.application_id, app_dict, top_k=20, model_version=pred["model_version"]):
+        explain_status = explanation_worker.PENDING
+    else:
+        try:
+            expl = await run_in_threadpool(credit_risk_model.explain_payload, app_dict, 20, pred["model_version"])
+            await async_risk_service.cache_shap_for_application(db, payload.application_id, expl, pred["model_version"])
+            explain_status = explanation_worker.READY
+        except Exception as e:
+            # Do not fail the request for explainability errors
+            logger.warning("SHAP explanation failed: {}", e)
+            expl = None
+            explain_status = explanation_worker.FAILED
+
+    return _calculate_response(ra, pred, expl, explain_status)
+
+
+@router.get("/application/{application_id}", response_model=List[RiskAssessmentRead])
+async def get_risks_by_application(
+    application_id: int,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    try:
+        risks, shap_data, next_page = await async_risk_service.list_risks_with_latest_shap(db, application_id, limit=limit, cursor=cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return _risks_page(risks, shap_data, next_page, response)
+
+
+@router.get("/application/{application_id}/explainability")
+async def get_explainability_for_application(application_id: int, db: AsyncSession = Depends(get_async_db)):
+    return _explainability_response(application_id, await async_risk_service.get_cached_shap(db, application_id))
+
+
+@router.get("/{risk_id}", response_model=RiskAssessmentRead)
+async def get_risk(risk_id: int, db: AsyncSession = Depends(get_async_db)):
+    risk = await async_risk_service.get_risk_assessment(db, risk_id)
+    if not risk:
+        raise HTTPException(status_code=404, detail="Risk assessment not found")
+    return risk
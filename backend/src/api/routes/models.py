@@ -0,0 +1,55 @@
+from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import JSONResponse
+from loguru import logger
+
+from ...models import credit_risk_model
+from ...models.registry import ModelVersionNotFound
+from ...schemas.risk_schemas import ModelLoadRequest
+
+router = APIRouter()
+
+
+@router.get("")
+def list_models():
+    """Active version, resident versions (load time, memory delta), versions available on disk and the last swap."""
+    return credit_risk_model.model_registry_metrics()
+
+
+@router.post("/load")
+def load_model(payload: ModelLoadRequest):
+    """Load a version from models/versions/<version> (or reload models/) in the background, warm it up and swap it in.
+
+    Scoring keeps using the current version until the new one is warm. Returns 202 unless wait=true.
+    """
+    try:
+        result = credit_risk_model.reload_model(payload.version, activate=payload.activate, wait=payload.wait)
+    except ModelVersionNotFound:
+        raise HTTPException(status_code=404, detail=f"Model version not found: {payload.version}")
+    except Exception as e:
+        logger.error("Model load failed for {}: {}", payload.version, e)
+        raise HTTPException(status_code=500, detail=str(e))
+    if not payload.wait:
+        return JSONResponse({"status": "LOADING", "version": payload.version}, status_code=status.HTTP_202_ACCEPTED)
+    registry = credit_risk_model.get_registry()
+    return {"status": "LOADED", **result.info(), "active": registry.active is result, "last_swap": registry.last_swap}
+
+
+@router.post("/{version}/activate")
+def activate_model(version: str):
+    """Make an already resident version the active one."""
+    try:
+        bundle = credit_risk_model.get_registry().activate(version)
+    except ModelVersionNotFound:
+        raise HTTPException(status_code=404, detail=f"Model version not resident: {version}")
+    return {"status": "ACTIVE", **bundle.info(), "last_swap": credit_risk_model.get_registry().last_swap}
+
+
+@router.delete("/{version}", status_code=status.HTTP_204_NO_CONTENT)
+def unload_model(version: str):
+    """Drop a resident version that is not active."""
+    try:
+        credit_risk_model.get_registry().unload(version)
+    except ModelVersionNotFound:
+        raise HTTPException(status_code=404, detail=f"Model version not resident: {version}")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
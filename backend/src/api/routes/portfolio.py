@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from ...db.session import get_db
+from ...services import portfolio_service
+
+router = APIRouter()
+
+
+@router.get("/summary")
+def get_portfolio_summary(db: Session = Depends(get_db)):
+    """Counts by tier, average PD and expected loss (PD x requested amount), overall and by status and purpose.
+
+    Covers every application with a scored assessment, using its latest one. Served from running
+    aggregates maintained on each write, so the cost does not grow with the portfolio.
+    """
+    return portfolio_service.get_summary(db)
@@ -1,25 +1,34 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 from datetime import datetime
 
 from ...db.session import get_db
 from ...schemas.risk_schemas import (
     RiskAssessmentCreate,
+    BatchRiskAssessmentCreate,
     RiskAssessmentRead,
     SimulationRequest,
     SimulationResponse,
+    SimulationSweepRequest,
     FeatureContribution,
 )
 from ...services.risk_service import (
     create_risk_assessment_with_score,
+    create_risk_assessments_bulk,
     get_risk_assessment,
-    list_risks_for_application,
+    list_risks_with_latest_shap,
+    confidence_from_scores,
     cache_shap_for_application,
+    cache_shap_for_applications_bulk,
     get_cached_shap,
+    scoring_payload,
+    sweep_scenarios,
 )
 from ...models import credit_risk_model
-from ...models import shap_explainer
+from ...models.registry import ModelVersionNotFound
+from ...services import explanation_worker
+from ...utils.pagination import NEXT_CURSOR_HEADER, InvalidCursor
 from loguru import logger
 
 router = APIRouter()
@@ -37,20 +46,12 @@ def calculate_risk(payload: RiskAssessmentCreate, db: Session = Depends(get_db))
         raise HTTPException(status_code=404, detail="Application not found")
 
     # Build payload dict from application model for prediction
-    app_dict = {
-        k: getattr(app, k)
-        for k in [
-            "applicant_name",
-            "applicant_email",
-            "requested_amount",
-            "purpose",
-            "created_at",
-        ]
-        if hasattr(app, k)
-    }
+    app_dict = scoring_payload(app)
 
     try:
-        pred = credit_risk_model.predict_from_payload(app_dict)
+        pred = credit_risk_model.predict_from_payload(app_dict, model_version=payload.model_version)
+    except ModelVersionNotFound:
+        raise HTTPException(status_code=404, detail=f"Model version not found: {payload.model_version}")
     except Exception as e:
         logger.error("Prediction failed for application %s: %s", payload.application_id, e)
         raise HTTPException(status_code=500, detail=str(e))
@@ -62,16 +63,27 @@ def calculate_risk(payload: RiskAssessmentCreate, db: Session = Depends(get_db))
         logger.error("Failed to persist risk assessment: %s", e)
         raise HTTPException(status_code=500, detail="Failed to persist assessment")
 
-    # Compute SHAP explanation and persist it
-    try:
-        expl = shap_explainer.explain_payload(app_dict, credit_risk_model.PREPROCESSOR, top_k=20)
-        # persist SHAP explanation to DB
-        cache_shap_for_application(db, payload.application_id, expl)
-    except Exception as e:
-        # Do not fail the request for explainability errors
-        logger.warning("SHAP explanation failed: %s", e)
-        expl = None
+    # Compute SHAP explanation and persist it, or hand it to the background pool (SHAP_MODE=background)
+    expl = None
+    worker = explanation_worker.get_worker()
+    if worker is not None and worker.submit(payload.application_id, app_dict, top_k=20, model_version=pred["model_version"]):
+        explain_status = explanation_worker.PENDING
+    else:
+        try:
+            expl = credit_risk_model.explain_payload(app_dict, top_k=20, model_version=pred["model_version"])
+            # persist SHAP explanation to DB
+            cache_shap_for_application(db, payload.application_id, expl, pred["model_version"])
+            explain_status = explanation_worker.READY
+        except Exception as e:
+            # Do not fail the request for explainability errors
+            logger.warning("SHAP explanation failed: %s", e)
+            expl = None
+            explain_status = explanation_worker.FAILED
 
+    return _calculate_response(ra, pred, expl, explain_status)
+
+
+def _calculate_response(ra, pred: dict, expl, explain_status: str) -> dict:
     # attach score to response and return assessment + explainability
     ra.score = pred["prob_default"]
     confidence = pred.get("confidence", 0.8)
@@ -95,10 +107,97 @@ def calculate_risk(payload: RiskAssessmentCreate, db: Session = Depends(get_db))
             "confidence": float(confidence),
         },
         "explainability": formatted_expl,
+        "explainability_status": explain_status,
+        "model_version": pred["model_version"],
     }
     return response
 
 
+@router.post("/calculate-batch", status_code=status.HTTP_201_CREATED)
+def calculate_risk_batch(payload: BatchRiskAssessmentCreate, db: Session = Depends(get_db)):
+    """Score many applications (by id) and/or ad-hoc payloads with a single vectorized model call.
+
+    Assessments for application ids are persisted with one bulk insert; ad-hoc payloads are scored only.
+    With explain=true, top-k SHAP explanations for all rows come from one batched call and are persisted
+    for the application ids.
+    """
+    from ...services.application_service import get_applications_by_ids
+
+    apps = get_applications_by_ids(db, payload.application_ids)
+    app_ids = [i for i in dict.fromkeys(payload.application_ids) if i in apps]
+    missing_ids = [i for i in dict.fromkeys(payload.application_ids) if i not in apps]
+
+    scoring_payloads = [scoring_payload(apps[i]) for i in app_ids] + list(payload.payloads)
+    try:
+        preds = credit_risk_model.predict_from_payloads(scoring_payloads, model_version=payload.model_version)
+    except ModelVersionNotFound:
+        raise HTTPException(status_code=404, detail=f"Model version not found: {payload.model_version}")
+    except Exception as e:
+        logger.error("Batch prediction failed: {}", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+    app_preds, adhoc_preds = preds[:len(app_ids)], preds[len(app_ids):]
+    # explanations use the same version as the scores even if the active model is swapped meanwhile
+    model_version = preds[0]["model_version"] if preds else credit_risk_model.get_model_version()
+
+    explanations = None
+    if payload.explain:
+        try:
+            explanations = credit_risk_model.explain_payloads(scoring_payloads, top_k=payload.top_k, model_version=model_version)
+        except Exception as e:
+            # Do not fail the batch for explainability errors
+            logger.warning("Batch SHAP explanation failed: {}", e)
+
+    try:
+        ras = create_risk_assessments_bulk(
+            db,
+            [
+                {
+                    "application_id": app_id,
+                    "evaluator": payload.evaluator or "automated",
+                    "notes": payload.notes or "",
+                    "score": pred["prob_default"],
+                }
+                for app_id, pred in zip(app_ids, app_preds)
+            ],
+        )
+    except Exception as e:
+        logger.error("Failed to persist batch risk assessments: {}", e)
+        raise HTTPException(status_code=500, detail="Failed to persist assessments")
+
+    assessments = [
+        {
+            "id": ra.id,
+            "application_id": ra.application_id,
+            "evaluator": ra.evaluator,
+            "notes": ra.notes,
+            "score": float(pred["prob_default"]),
+            "created_at": ra.created_at,
+            "confidence": float(pred["confidence"]),
+            "risk_score": pred["risk_score"],
+            "tier": pred["tier"],
+        }
+        for ra, pred in zip(ras, app_preds)
+    ]
+
+    if explanations is not None:
+        try:
+            cache_shap_for_applications_bulk(db, list(zip(app_ids, explanations)), model_version)
+        except Exception as e:
+            logger.warning("Failed to persist batch SHAP explanations: {}", e)
+        for item, expl in zip(assessments, explanations):
+            item["explainability"] = expl
+        for pred, expl in zip(adhoc_preds, explanations[len(app_ids):]):
+            pred["explainability"] = expl
+
+    return {
+        "assessments": assessments,
+        "predictions": adhoc_preds,
+        "missing_application_ids": missing_ids,
+        "model_version": model_version,
+    }
+
+
 @router.post("/simulate", status_code=status.HTTP_200_OK)
 def simulate(payload: SimulationRequest, db: Session = Depends(get_db)):
     """Run a simulation from an existing application and a scenario override. Does NOT persist results."""
@@ -133,7 +232,7 @@ def simulate(payload: SimulationRequest, db: Session = Depends(get_db)):
 
     # get SHAP explanation but do not cache (unless we want to)
     try:
-        expl = shap_explainer.explain_payload(app_dict, credit_risk_model.PREPROCESSOR, top_k=20)
+        expl = credit_risk_model.explain_payload(app_dict, top_k=20)
     except Exception as e:
         logger.warning("SHAP explanation failed for simulation: %s", e)
         expl = None
@@ -147,6 +246,24 @@ def simulate(payload: SimulationRequest, db: Session = Depends(get_db)):
     return resp
 
 
+@router.post("/simulate-sweep", status_code=status.HTTP_200_OK)
+def simulate_sweep(payload: SimulationSweepRequest, db: Session = Depends(get_db)):
+    """Evaluate a grid of one or two varied fields (e.g. requested_amount x annual_income) in one model call.
+
+    Does NOT persist results. Returns score, risk score, tier and confidence surfaces over the grid.
+    """
+    try:
+        result = sweep_scenarios(db, payload.application_id, payload.scenario, payload.axes)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        logger.error("Sweep prediction failed: {}", e)
+        raise HTTPException(status_code=500, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Application not found")
+    return result
+
+
 @router.get("/{risk_id}", response_model=RiskAssessmentRead)
 def get_risk(risk_id: int, db: Session = Depends(get_db)):
     risk = get_risk_assessment(db, risk_id)
@@ -156,30 +273,57 @@ def get_risk(risk_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/application/{application_id}", response_model=List[RiskAssessmentRead])
-def get_risks_by_application(application_id: int, db: Session = Depends(get_db)):
-    risks = list_risks_for_application(db, application_id)
-    # Try to get SHAP explanations and add confidence if available
-    for risk in risks:
-        shap_data = get_cached_shap(db, application_id)
-        if shap_data:
-            # Calculate confidence from score if available
-            if risk.score is not None:
-                prob = float(risk.score)
-                confidence = 1.0 - 2.0 * abs(prob - 0.5)
-                confidence = max(0.0, min(1.0, confidence))
+def get_risks_by_application(
+    application_id: int,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """Assessments for an application, newest first.
+
+    Confidence is filled in when the application has a SHAP explanation. With `limit`, results are
+    paginated; the cursor for the next page is returned in the X-Next-Cursor header.
+    """
+    try:
+        risks, shap_data, next_page = list_risks_with_latest_shap(db, application_id, limit=limit, cursor=cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return _risks_page(risks, shap_data, next_page, response)
+
+
+def _risks_page(risks: list, shap_data, next_page, response: Response) -> list:
+    if shap_data:
+        for risk, confidence in zip(risks, confidence_from_scores([r.score for r in risks])):
+            if confidence is not None:
                 risk.confidence = confidence
+    if next_page is not None:
+        response.headers[NEXT_CURSOR_HEADER] = next_page
     return risks
 
 
 @router.get("/application/{application_id}/explainability")
 def get_explainability_for_application(application_id: int, db: Session = Depends(get_db)):
-    """Get SHAP explainability for an application."""
-    shap_data = get_cached_shap(db, application_id)
+    """Get SHAP explainability for an application.
+
+    status is "pending" or "failed" while a background explanation job is in flight or has failed,
+    "ready" when a persisted explanation exists and "missing" otherwise.
+    """
+    return _explainability_response(application_id, get_cached_shap(db, application_id))
+
+
+def _explainability_response(application_id: int, shap_data) -> dict:
+    job = explanation_worker.job_status(application_id)
+    if job is not None:
+        explain_status = job["status"]
+    else:
+        explain_status = explanation_worker.READY if shap_data else "missing"
+
     if not shap_data:
-        return {"explainability": None}
+        return {"explainability": None, "status": explain_status}
     
     formatted_expl = [
         {"feature": item.get("feature", ""), "impact": float(item.get("impact", 0))}
         for item in shap_data
     ]
-    return {"explainability": formatted_expl}
+    return {"explainability": formatted_expl, "status": explain_status}
@@ -10,10 +10,11 @@ router = APIRouter()
 
 @router.post("/run", response_model=SimulationResponse)
 def run_simulation(payload: SimulationRequest, db: Session = Depends(get_db)):
-    # Simulation/ML logic is intentionally not implemented in this scaffold.
-    # We provide a clear 501 to indicate the implementation is pending.
+    """Score an application under a scenario without persisting. List-valued scenario fields are swept."""
     try:
         result = simulate_scenario(db, payload)
-    except NotImplementedError as e:
-        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Application not found")
     return result
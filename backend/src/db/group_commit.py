@@ -0,0 +1,212 @@
+"""Group commit: batch small ORM inserts from concurrent requests into one transaction.
+
+Each request hands its new row to the writer and blocks until the row is committed. A background
+thread collects rows until the commit window elapses (or max_batch rows are waiting), inserts them all
+with one flush and commits once, so N concurrent requests cost one commit (one fsync on SQLite)
+instead of N. Rows are returned detached with their primary keys populated, as after db.refresh().
+If a batch fails, its rows are retried one transaction each so a bad row only fails its own request.
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+from loguru import logger
+
+
+class _Pending:
+    __slots__ = ("obj", "before_commit", "future", "submitted")
+
+    def __init__(self, obj: Any, before_commit: Optional[Callable[[Any], None]] = None):
+        self.obj = obj
+        self.before_commit = before_commit
+        self.future: Future = Future()
+        self.submitted = time.perf_counter()
+
+
+class GroupCommitWriter:
+    """Commit rows submitted from many threads in shared transactions.
+
+    - session_factory: creates the Session used for each batch (e.g. SessionLocal)
+    - window_ms: how long the first row of a batch waits for company
+    - max_batch: commit as soon as this many rows are waiting
+    """
+
+    def __init__(self, session_factory: Callable[[], Any], window_ms: float = 2.0, max_batch: int = 256):
+        self.session_factory = session_factory
+        self.window = max(0.0, float(window_ms)) / 1000.0
+        self.max_batch = max(1, int(max_batch))
+        self._queue: "queue.Queue[Optional[_Pending]]" = queue.Queue()
+        self._lock = threading.Lock()
+        # orders submit() against close(): nothing is queued behind the shutdown sentinel
+        self._close_lock = threading.Lock()
+        self._closed = False
+        self._rows = 0
+        self._commits = 0
+        self._failed_batches = 0
+        self._thread = threading.Thread(target=self._run, name="group-commit", daemon=True)
+        self._thread.start()
+
+    def submit(self, obj: Any, before_commit: Optional[Callable[[Any], None]] = None) -> Future:
+        """Queue a new ORM object; the future resolves to the same object once it is committed.
+
+        `before_commit(session)` runs after the row is flushed, in the same transaction (e.g. to prune
+        older rows it supersedes).
+        """
+        pending = _Pending(obj, before_commit)
+        with self._close_lock:
+            if self._closed:
+                raise RuntimeError("Group commit writer is closed")
+            self._queue.put(pending)
+        return pending.future
+
+    def add(self, obj: Any, timeout: Optional[float] = None, before_commit: Optional[Callable[[Any], None]] = None) -> Any:
+        """Insert one row and wait for its commit. Raises the commit error for this row."""
+        return self.submit(obj, before_commit).result(timeout)
+
+    def close(self) -> None:
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join(timeout=5)
+
+    def _collect(self, first: _Pending) -> List[_Pending]:
+        batch = [first]
+        deadline = first.submitted + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get_nowait() if remaining <= 0 else self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # keep the shutdown sentinel for the main loop
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                self._fail_queued()
+                return
+            batch = self._collect(first)
+            try:
+                self._commit(batch)
+            except Exception as e:
+                logger.warning("Group commit of {} rows failed, retrying individually: {}", len(batch), e)
+                with self._lock:
+                    self._failed_batches += 1
+                for p in batch:
+                    try:
+                        self._commit([p])
+                    except Exception as row_error:
+                        p.future.set_exception(row_error)
+                    else:
+                        p.future.set_result(p.obj)
+                continue
+            for p in batch:
+                p.future.set_result(p.obj)
+
+    def _fail_queued(self) -> None:
+        # defensive: nothing should follow the sentinel, but never leave a caller waiting on a future
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None:
+                item.future.set_exception(RuntimeError("Group commit writer is closed"))
+
+    def _commit(self, batch: List[_Pending]) -> None:
+        objs = [p.obj for p in batch]
+        db = self.session_factory()
+        try:
+            db.add_all(objs)
+            db.flush()
+            for p in batch:
+                if p.before_commit is not None:
+                    p.before_commit(db)
+            # detach before commit so the objects keep their loaded state (no refresh SELECT)
+            for obj in objs:
+                db.expunge(obj)
+            db.commit()
+        except Exception:
+            db.rollback()
+            # a failed flush leaves the objects pending in this session; detach them for the retry
+            for obj in objs:
+                if obj in db:
+                    db.expunge(obj)
+            raise
+        finally:
+            db.close()
+        with self._lock:
+            self._rows += len(objs)
+            self._commits += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "window_ms": self.window * 1000.0,
+                "max_batch": self.max_batch,
+                "rows": self._rows,
+                "commits": self._commits,
+                "avg_rows_per_commit": self._rows / self._commits if self._commits else 0.0,
+                "failed_batches": self._failed_batches,
+                "queued": self._queue.qsize(),
+            }
+
+
+_WRITER: Optional[GroupCommitWriter] = None
+_WRITER_LOCK = threading.Lock()
+
+
+def get_writer() -> Optional[GroupCommitWriter]:
+    """Shared writer when DB_GROUP_COMMIT_MS > 0, else None (each service call commits on its own)."""
+    global _WRITER
+    window_ms = float(os.getenv("DB_GROUP_COMMIT_MS", "0") or 0)
+    if window_ms <= 0:
+        return None
+    if _WRITER is None:
+        with _WRITER_LOCK:
+            if _WRITER is None:
+                from .session import SessionLocal
+
+                _WRITER = GroupCommitWriter(SessionLocal, window_ms=window_ms, max_batch=int(os.getenv("DB_GROUP_COMMIT_MAX_BATCH", "256")))
+    return _WRITER
+
+
+def shutdown_writer() -> None:
+    global _WRITER
+    with _WRITER_LOCK:
+        if _WRITER is not None:
+            _WRITER.close()
+            _WRITER = None
+
+
+def writer_metrics() -> Dict[str, Any]:
+    writer = _WRITER
+    return writer.stats() if writer is not None else {"enabled": float(os.getenv("DB_GROUP_COMMIT_MS", "0") or 0) > 0}
+
+
+def persist(db, obj: Any, before_commit: Optional[Callable[[Any], None]] = None) -> Any:
+    """Insert a new row: through the shared group-commit writer when enabled, else add/commit/refresh on `db`.
+
+    `before_commit(session)` runs after the insert is flushed, inside the committing transaction.
+    """
+    writer = get_writer()
+    if writer is not None:
+        return writer.add(obj, before_commit=before_commit)
+    db.add(obj)
+    if before_commit is not None:
+        db.flush()
+        before_commit(db)
+    db.commit()
+    db.refresh(obj)
+    return obj
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Numeric, Text
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Numeric, Text, Index, LargeBinary, UniqueConstraint
 from sqlalchemy.orm import relationship
 from .base import Base
 
@@ -33,6 +33,13 @@ class Application(Base):
     # store persisted SHAP explainability entries
     shap_explanations = relationship("ShapExplanation", back_populates="application", cascade="all, delete-orphan")
 
+    # keyset pagination on (created_at, id), optionally filtered by status and requested-amount range
+    __table_args__ = (
+        Index("ix_applications_created", "created_at", "id"),
+        Index("ix_applications_status_created", "status", "created_at", "id"),
+        Index("ix_applications_status_amount", "status", "requested_amount"),
+    )
+
 
 class RiskAssessment(Base):
     __tablename__ = "risk_assessments"
@@ -46,13 +53,68 @@ class RiskAssessment(Base):
 
     application = relationship("Application", back_populates="risk_assessments")
 
+    # newest-first listing per application with (created_at, id) keyset pagination
+    __table_args__ = (Index("ix_risk_assessments_app_created", "application_id", "created_at", "id"),)
+
 
 class ShapExplanation(Base):
     __tablename__ = "shap_explanations"
 
     id = Column(Integer, primary_key=True, index=True)
     application_id = Column(Integer, ForeignKey("applications.id"), nullable=False, index=True)
-    shap_json = Column(Text, nullable=False)
+    # legacy JSON list of {feature, impact}; new rows use the compact columns (see migrate_shap_storage.py)
+    shap_json = Column(Text, nullable=True)
+    # compact form: uint16 indexes into the feature set's names and float32 impacts, in ranking order
+    feature_set_id = Column(Integer, ForeignKey("shap_feature_sets.id"), nullable=True)
+    feature_idx = Column(LargeBinary, nullable=True)
+    impacts = Column(LargeBinary, nullable=True)
     created_at = Column(DateTime, nullable=False)
 
     application = relationship("Application", back_populates="shap_explanations")
+    feature_set = relationship("ShapFeatureSet")
+
+    # latest explanation per application
+    __table_args__ = (Index("ix_shap_explanations_app_created", "application_id", "created_at"),)
+
+
+class ShapFeatureSet(Base):
+    """Feature-name table shared by the compact SHAP explanations of one model version."""
+
+    __tablename__ = "shap_feature_sets"
+
+    id = Column(Integer, primary_key=True, index=True)
+    model_version = Column(String(128), nullable=True, index=True)
+    # sha256 of (model_version, feature_names): one row per distinct table
+    digest = Column(String(64), nullable=False, unique=True)
+    feature_names = Column(Text, nullable=False)  # JSON list
+    created_at = Column(DateTime, nullable=False)
+
+
+class PortfolioAggregate(Base):
+    """Running totals over the latest scored assessment of each application, per (status, purpose, tier).
+
+    Maintained by services/portfolio_service.py; rebuild_portfolio.py recomputes them from scratch.
+    """
+
+    __tablename__ = "portfolio_aggregates"
+
+    id = Column(Integer, primary_key=True, index=True)
+    status = Column(String(50), nullable=False)
+    purpose = Column(String(255), nullable=False, default="")  # "" for applications without a purpose
+    tier = Column(String(16), nullable=False)
+    applications = Column(Integer, nullable=False, default=0)
+    pd_sum = Column(Float, nullable=False, default=0.0)
+    requested_amount_sum = Column(Float, nullable=False, default=0.0)
+    expected_loss_sum = Column(Float, nullable=False, default=0.0)  # sum of PD x requested_amount
+
+    __table_args__ = (UniqueConstraint("status", "purpose", "tier", name="uq_portfolio_aggregates_bucket"),)
+
+
+class DataVersion(Base):
+    """Counter bumped by every write to applications or risk assessments (keys derived caches)."""
+
+    __tablename__ = "data_versions"
+
+    name = Column(String(64), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False)
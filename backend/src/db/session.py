@@ -1,5 +1,7 @@
 import os
-from sqlalchemy import create_engine
+from typing import Optional
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 
 from dotenv import load_dotenv
@@ -8,8 +10,82 @@ load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./dev.db")
 
+# "sync" (Session on Starlette's threadpool) or "async" (AsyncSession: aiosqlite / asyncpg)
+DB_MODE = os.getenv("DB_MODE", "sync").lower()
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    return url.startswith("sqlite") and (":memory:" in url or url.rstrip("/").endswith("sqlite:"))
+
+
+# Starlette runs sync endpoints and the get_db teardown on a 40-thread pool. A smaller connection pool
+# can deadlock under load: every thread waits for a connection that is only returned by a teardown that
+# needs a free thread. Size the sync pool so each thread can hold one.
+SYNC_POOL_DEFAULTS = {"pool_size": 20, "max_overflow": 20}
+
+
+def pool_kwargs(url: str, defaults: Optional[dict] = None) -> dict:
+    """Connection pool settings from DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE and DB_POOL_PRE_PING.
+
+    Unset variables fall back to `defaults`, then to SQLAlchemy's defaults. In-memory SQLite uses a
+    single-connection pool that takes no sizing arguments.
+    """
+    kwargs = {"pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "0").lower() in ("1", "true", "yes")}
+    if os.getenv("DB_POOL_RECYCLE"):
+        kwargs["pool_recycle"] = int(os.getenv("DB_POOL_RECYCLE"))
+    if _is_memory_sqlite(url):
+        return kwargs
+    kwargs.update(defaults or {})
+    for env, key in (("DB_POOL_SIZE", "pool_size"), ("DB_MAX_OVERFLOW", "max_overflow"), ("DB_POOL_TIMEOUT", "pool_timeout")):
+        if os.getenv(env):
+            kwargs[key] = int(os.getenv(env))
+    return kwargs
+
+
+def _connect_args(url: str) -> dict:
+    return {"check_same_thread": False} if url.startswith("sqlite") else {}
+
+
+def sqlite_pragmas() -> list:
+    """PRAGMAs run on every new SQLite connection for SQLITE_PROFILE=performance (empty otherwise).
+
+    WAL lets readers proceed during a write and, with synchronous=NORMAL, commits append to the WAL
+    without an fsync each (durable across application crashes; an OS crash can lose the last commits).
+    """
+    if os.getenv("SQLITE_PROFILE", "default").lower() != "performance":
+        return []
+    return [
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA busy_timeout={int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))}",
+        f"PRAGMA mmap_size={int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))}",
+        # negative cache_size is in KiB
+        f"PRAGMA cache_size=-{int(os.getenv('SQLITE_CACHE_SIZE_KB', '65536'))}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+
+
+def apply_sqlite_profile(sync_engine) -> None:
+    """Run sqlite_pragmas() on connect for a SQLite engine (pass async_engine.sync_engine for async)."""
+    if sync_engine.dialect.name != "sqlite":
+        return
+    pragmas = sqlite_pragmas()
+    if not pragmas:
+        return
+
+    @event.listens_for(sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
 # echo=True can be enabled for verbose SQL in dev
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {})
+engine = create_engine(DATABASE_URL, connect_args=_connect_args(DATABASE_URL), **pool_kwargs(DATABASE_URL, SYNC_POOL_DEFAULTS))
+apply_sqlite_profile(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -20,3 +96,44 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def async_database_url(url: str) -> str:
+    """Async driver URL for DATABASE_URL: sqlite -> sqlite+aiosqlite, postgres -> postgresql+asyncpg."""
+    scheme, sep, rest = url.partition("://")
+    dialect = scheme.split("+")[0]
+    if dialect == "sqlite":
+        return f"sqlite+aiosqlite{sep}{rest}"
+    if dialect in ("postgresql", "postgres"):
+        return f"postgresql+asyncpg{sep}{rest}"
+    return url
+
+
+# Created on first use so sync deployments never import the asyncio extension (needs greenlet)
+async_engine = None
+AsyncSessionLocal = None
+
+
+def get_async_engine():
+    global async_engine, AsyncSessionLocal
+    if async_engine is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        url = async_database_url(DATABASE_URL)
+        async_engine = create_async_engine(url, **pool_kwargs(url))
+        apply_sqlite_profile(async_engine.sync_engine)
+        AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    return async_engine
+
+
+async def get_async_db():
+    get_async_engine()
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def dispose_async_engine() -> None:
+    global async_engine, AsyncSessionLocal
+    if async_engine is not None:
+        await async_engine.dispose()
+        async_engine = AsyncSessionLocal = None
@@ -0,0 +1,179 @@
+"""Versioned, pickle-free model artifact bundle.
+
+A bundle is a directory (models/bundle by default) holding:
+
+- manifest.json: bundle version, model version, creation time, feature names, library versions and a
+  sha256 per file (verified before the server loads a version unless MODEL_VERIFY_CHECKSUMS=0)
+- model.ubj: the booster in XGBoost's native binary format (loadable by any xgboost >= 1.6)
+- preprocessor.json plus preprocessor_<name>.npy: FeaturePreprocessor columns/categories and the
+  scaler statistics
+- engine_<name>.npy: the compiled tree arrays used by SCORING_ENGINE=numpy
+
+The .npy arrays are opened memory-mapped, so loading is a few small reads and worker processes serving
+the same bundle share the pages through the OS cache instead of each holding an unpickled copy.
+Convert existing joblib artifacts with `python -m src.models.artifacts [models_dir]`.
+"""
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from .feature_engineering import FeaturePreprocessor
+
+BUNDLE_DIRNAME = "bundle"
+MANIFEST = "manifest.json"
+MODEL_FILE = "model.ubj"
+PREPROCESSOR_FILE = "preprocessor.json"
+FORMAT_VERSION = 1
+
+_PREPROCESSOR_ARRAYS = ("mean", "scale", "var")
+
+
+def bundle_dir(base_dir: str) -> str:
+    return os.path.join(base_dir, BUNDLE_DIRNAME)
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _library_versions() -> Dict[str, str]:
+    versions = {"numpy": np.__version__}
+    for name in ("xgboost", "sklearn"):
+        module = sys.modules.get(name)
+        if module is not None:
+            versions[name] = getattr(module, "__version__", "unknown")
+    return versions
+
+
+def read_manifest(path: str) -> Optional[Dict[str, Any]]:
+    """Manifest of the bundle in `path`, or None if there is no bundle there."""
+    manifest_path = os.path.join(path, MANIFEST)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, "r") as fh:
+        manifest = json.load(fh)
+    if manifest.get("format_version", 0) > FORMAT_VERSION:
+        raise ValueError(f"Unsupported artifact bundle format {manifest['format_version']} in {path}")
+    return manifest
+
+
+def save_bundle(
+    path: str, model: Any, preprocessor: FeaturePreprocessor, version: str, engine: Any = None, training: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Write model, preprocessor and (optionally) compiled engine to `path` and return the manifest.
+
+    - model: XGBClassifier or Booster
+    - version: model version recorded in the manifest (served as get_model_version())
+    - engine: CompiledTreeEnsemble; compiled from the model when omitted
+    - training: JSON-serializable details of how the model was trained (parameters, metrics), kept in
+      the manifest
+    """
+    from .tree_engine import CompiledTreeEnsemble
+
+    os.makedirs(path, exist_ok=True)
+    files = []
+
+    booster = model.get_booster() if hasattr(model, "get_booster") else model
+    booster.save_model(os.path.join(path, MODEL_FILE))
+    files.append(MODEL_FILE)
+
+    state = preprocessor.get_state()
+    meta = {k: v for k, v in state.items() if k not in _PREPROCESSOR_ARRAYS}
+    with open(os.path.join(path, PREPROCESSOR_FILE), "w") as fh:
+        json.dump(meta, fh)
+    files.append(PREPROCESSOR_FILE)
+    for name in _PREPROCESSOR_ARRAYS:
+        fname = f"preprocessor_{name}.npy"
+        np.save(os.path.join(path, fname), np.ascontiguousarray(state[name]))
+        files.append(fname)
+
+    engine = engine if engine is not None else CompiledTreeEnsemble.from_model(model)
+    for name, arr in engine.to_arrays().items():
+        fname = f"engine_{name}.npy"
+        np.save(os.path.join(path, fname), np.ascontiguousarray(arr))
+        files.append(fname)
+
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "version": version,
+        "created_at": datetime.utcnow().isoformat() + "Z",
+        "feature_names": list(state["feature_names"]),
+        "libraries": _library_versions(),
+        "files": {fname: _sha256(os.path.join(path, fname)) for fname in files},
+    }
+    if training is not None:
+        manifest["training"] = training
+    # manifest last: a bundle without one is incomplete and is ignored by read_manifest
+    tmp = os.path.join(path, MANIFEST + ".tmp")
+    with open(tmp, "w") as fh:
+        json.dump(manifest, fh, indent=2)
+    os.replace(tmp, os.path.join(path, MANIFEST))
+    return manifest
+
+
+def verify_bundle(path: str) -> None:
+    """Raise ValueError if any file no longer matches the checksum recorded in the manifest."""
+    manifest = read_manifest(path)
+    if manifest is None:
+        raise ValueError(f"No artifact bundle in {path}")
+    for fname, digest in manifest["files"].items():
+        if _sha256(os.path.join(path, fname)) != digest:
+            raise ValueError(f"Checksum mismatch for {fname} in {path}")
+
+
+def load_preprocessor(path: str, mmap: bool = True) -> FeaturePreprocessor:
+    with open(os.path.join(path, PREPROCESSOR_FILE), "r") as fh:
+        state = json.load(fh)
+    mmap_mode = "r" if mmap else None
+    for name in _PREPROCESSOR_ARRAYS:
+        state[name] = np.load(os.path.join(path, f"preprocessor_{name}.npy"), mmap_mode=mmap_mode)
+    return FeaturePreprocessor.from_state(state)
+
+
+def load_engine(path: str, mmap: bool = True):
+    from .tree_engine import CompiledTreeEnsemble
+
+    mmap_mode = "r" if mmap else None
+    names = ("feature", "threshold", "left", "right", "default_left", "value", "roots", "meta")
+    if not all(os.path.exists(os.path.join(path, f"engine_{n}.npy")) for n in names):
+        return None
+    return CompiledTreeEnsemble.from_arrays({n: np.load(os.path.join(path, f"engine_{n}.npy"), mmap_mode=mmap_mode) for n in names})
+
+
+def load_model(path: str):
+    """XGBClassifier restored from the native booster file (imports xgboost)."""
+    import xgboost as xgb
+
+    model = xgb.XGBClassifier()
+    model.load_model(os.path.join(path, MODEL_FILE))
+    return model
+
+
+def convert_pickles(base_dir: str = "models", out_dir: Optional[str] = None) -> Dict[str, Any]:
+    """Build a bundle from the legacy joblib artifacts in base_dir, keeping their model version."""
+    import joblib
+
+    model = joblib.load(os.path.join(base_dir, "xgboost_model.pkl"))
+    preprocessor = joblib.load(os.path.join(base_dir, "preprocessor.pkl"))
+    version_path = os.path.join(base_dir, "model_version.json")
+    if os.path.exists(version_path):
+        with open(version_path, "r") as fh:
+            version = json.load(fh).get("version")
+    else:
+        version = f"xgboost-{int(os.path.getmtime(os.path.join(base_dir, 'xgboost_model.pkl')))}"
+    return save_bundle(out_dir or bundle_dir(base_dir), model, preprocessor, version)
+
+
+if __name__ == "__main__":
+    base = sys.argv[1] if len(sys.argv) > 1 else "models"
+    manifest = convert_pickles(base)
+    print(f"Wrote artifact bundle {manifest['version']} ({len(manifest['files'])} files) to {bundle_dir(base)}")
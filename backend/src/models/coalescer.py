@@ -0,0 +1,189 @@
+"""In-process micro-batching for concurrent single-row scoring requests.
+
+Requests submit one preprocessed vector each. A background thread collects vectors until the batch
+window elapses (or max_batch rows are waiting), runs one batched prediction (and one batched SHAP call
+for the rows that asked for an explanation), then resolves each request's future with its own row.
+Callers on the sync threadpool block on the future; async callers can await it.
+"""
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+PREDICT = "predict"
+EXPLAIN = "explain"
+
+# Upper bounds of the batch-size histogram buckets
+_BATCH_BUCKETS = (1, 4, 16, 64, 256)
+
+
+class _Request:
+    __slots__ = ("kind", "vector", "future", "submitted")
+
+    def __init__(self, kind: str, vector: np.ndarray):
+        self.kind = kind
+        self.vector = vector
+        self.future: Future = Future()
+        self.submitted = time.perf_counter()
+
+
+class PredictionCoalescer:
+    """Coalesce concurrent predict/explain calls into batched model calls.
+
+    - predict_fn: maps a 2D matrix to a 1D array of probabilities
+    - explain_fn: optional, maps a 2D matrix to a 2D array of SHAP values
+    - window_ms: how long the first request in a batch waits for company
+    - max_batch: flush as soon as this many requests are waiting
+    """
+
+    def __init__(
+        self,
+        predict_fn: Callable[[np.ndarray], np.ndarray],
+        explain_fn: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+        window_ms: float = 2.0,
+        max_batch: int = 64,
+    ):
+        self.predict_fn = predict_fn
+        self.explain_fn = explain_fn
+        self.window = max(0.0, float(window_ms)) / 1000.0
+        self.max_batch = max(1, int(max_batch))
+        self._queue: "queue.Queue[Optional[_Request]]" = queue.Queue()
+        self._lock = threading.Lock()
+        # orders submit() against close(): nothing is queued behind the shutdown sentinel
+        self._close_lock = threading.Lock()
+        self._closed = False
+        self._reset_stats()
+        self._thread = threading.Thread(target=self._run, name="prediction-coalescer", daemon=True)
+        self._thread.start()
+
+    def _reset_stats(self) -> None:
+        self._requests = 0
+        self._batches = 0
+        self._max_batch_seen = 0
+        self._queue_delay_total = 0.0
+        self._queue_delay_max = 0.0
+        self._histogram = [0] * (len(_BATCH_BUCKETS) + 1)
+
+    # ---- client side ----
+
+    def submit(self, vector: Any, kind: str = PREDICT) -> Future:
+        """Queue one 1D vector; the future resolves to a float (predict) or a 1D SHAP row (explain)."""
+        if kind == EXPLAIN and self.explain_fn is None:
+            raise RuntimeError("Coalescer has no explain function")
+        req = _Request(kind, np.asarray(vector, dtype=np.float64).reshape(-1))
+        with self._close_lock:
+            if self._closed:
+                raise RuntimeError("Coalescer is closed")
+            self._queue.put(req)
+        return req.future
+
+    def predict(self, vector: Any, timeout: Optional[float] = None) -> float:
+        return self.submit(vector, PREDICT).result(timeout)
+
+    def explain(self, vector: Any, timeout: Optional[float] = None) -> np.ndarray:
+        return self.submit(vector, EXPLAIN).result(timeout)
+
+    async def predict_async(self, vector: Any) -> float:
+        return await asyncio.wrap_future(self.submit(vector, PREDICT))
+
+    async def explain_async(self, vector: Any) -> np.ndarray:
+        return await asyncio.wrap_future(self.submit(vector, EXPLAIN))
+
+    def close(self) -> None:
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join(timeout=5)
+
+    # ---- worker side ----
+
+    def _collect(self, first: _Request) -> List[_Request]:
+        batch = [first]
+        deadline = first.submitted + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                req = self._queue.get_nowait() if remaining <= 0 else self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if req is None:
+                # keep the shutdown sentinel for the main loop
+                self._queue.put(None)
+                break
+            batch.append(req)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                self._fail_queued()
+                return
+            batch = self._collect(first)
+            self._record(batch)
+            self._dispatch([r for r in batch if r.kind == PREDICT], self.predict_fn)
+            self._dispatch([r for r in batch if r.kind == EXPLAIN], self.explain_fn)
+
+    def _fail_queued(self) -> None:
+        # defensive: nothing should follow the sentinel, but never leave a caller waiting on a future
+        while True:
+            try:
+                req = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if req is not None:
+                req.future.set_exception(RuntimeError("Coalescer is closed"))
+
+    @staticmethod
+    def _dispatch(requests: List[_Request], fn: Optional[Callable[[np.ndarray], np.ndarray]]) -> None:
+        if not requests:
+            return
+        try:
+            out = fn(np.vstack([r.vector for r in requests]))
+        except Exception as e:
+            for r in requests:
+                r.future.set_exception(e)
+            return
+        for i, r in enumerate(requests):
+            r.future.set_result(float(out[i]) if np.ndim(out) == 1 else np.asarray(out[i]))
+
+    def _record(self, batch: List[_Request]) -> None:
+        started = time.perf_counter()
+        size = len(batch)
+        bucket = next((i for i, ub in enumerate(_BATCH_BUCKETS) if size <= ub), len(_BATCH_BUCKETS))
+        with self._lock:
+            self._requests += size
+            self._batches += 1
+            self._max_batch_seen = max(self._max_batch_seen, size)
+            self._histogram[bucket] += 1
+            for r in batch:
+                delay = started - r.submitted
+                self._queue_delay_total += delay
+                self._queue_delay_max = max(self._queue_delay_max, delay)
+
+    def stats(self) -> Dict[str, Any]:
+        """Batch size and queueing delay metrics since start (or the last reset)."""
+        with self._lock:
+            labels = [f"<={ub}" for ub in _BATCH_BUCKETS] + [f">{_BATCH_BUCKETS[-1]}"]
+            return {
+                "window_ms": self.window * 1000.0,
+                "max_batch": self.max_batch,
+                "requests": self._requests,
+                "batches": self._batches,
+                "queued": self._queue.qsize(),
+                "avg_batch_size": self._requests / self._batches if self._batches else 0.0,
+                "max_batch_size": self._max_batch_seen,
+                "batch_size_histogram": dict(zip(labels, self._histogram)),
+                "avg_queue_delay_ms": self._queue_delay_total / self._requests * 1000.0 if self._requests else 0.0,
+                "max_queue_delay_ms": self._queue_delay_max * 1000.0,
+            }
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._reset_stats()
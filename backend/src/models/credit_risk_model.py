@@ -1,26 +1,30 @@
+import hashlib
 import os
-from typing import Tuple, Dict, Any
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import TYPE_CHECKING, Tuple, Dict, Any, List, Optional
 import json
 
-import joblib
 import numpy as np
-import pandas as pd
-
-from sklearn.model_selection import StratifiedKFold, train_test_split
-from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import roc_auc_score, precision_score, recall_score
-
-import xgboost as xgb
 
+from . import training
 from .feature_engineering import derive_features, FeaturePreprocessor
 
+# pandas, scikit-learn, xgboost and joblib are imported where they are used so that importing this
+# module (and the API) stays fast; serving only needs them once artifacts are loaded.
+if TYPE_CHECKING:
+    import pandas as pd
 
-def load_dataset(local_path: str = "data/raw/german_credit.csv") -> pd.DataFrame:
+
+def load_dataset(local_path: str = "data/raw/german_credit.csv") -> "pd.DataFrame":
     """Load dataset from local path if available, otherwise try kagglehub download, then OpenML as fallback.
 
     The kagglehub downloader returns a path to downloaded dataset files; this function will pick the first CSV found
     in that path and use it as the dataset.
     """
+    import pandas as pd
+
     # If file already exists locally, use it **only if** it contains a target column
     if os.path.exists(local_path):
         df_local = pd.read_csv(local_path)
@@ -75,7 +79,7 @@ def load_dataset(local_path: str = "data/raw/german_credit.csv") -> pd.DataFrame
         )
 
 
-def prepare_xy(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.Series]:
+def prepare_xy(df: "pd.DataFrame") -> Tuple["pd.DataFrame", "pd.Series"]:
     df = df.copy()
     # If target column has different name, try common names
     if "target" not in df.columns:
@@ -88,8 +92,10 @@ def prepare_xy(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.Series]:
         raise RuntimeError("No target column found in dataset; expected 'target' or common alternatives")
 
     # Normalize target to 0/1 where 1 indicates bad credit (or positive class). We'll map strings to binary.
+    from pandas.api.types import is_string_dtype
+
     y = df["target"].copy()
-    if y.dtype == object:
+    if y.dtype == object or is_string_dtype(y.dtype):
         # map common labels
         y = y.map({"good": 0, "bad": 1, "positive": 1, "negative": 0, "1": 1, "0": 0}).fillna(y)
         # If still strings like '1'/'2' map numerically
@@ -118,79 +124,164 @@ def train_and_save(
     local_data_path: str = "data/raw/german_credit.csv",
     n_splits: int = 5,
     random_state: int = 42,
+    n_jobs: Optional[int] = None,
+    cv_workers: Optional[int] = 1,
+    early_stopping_rounds: Optional[int] = training.DEFAULT_EARLY_STOPPING_ROUNDS,
+    max_rounds: int = training.DEFAULT_MAX_ROUNDS,
+    params: Optional[Dict[str, Any]] = None,
+    tune_trials: int = 0,
+    tune_checkpoint: Optional[str] = None,
+    sparse: bool = False,
 ) -> Dict[str, Any]:
-    os.makedirs(output_dir, exist_ok=True)
-
-    df = load_dataset(local_data_path)
-    df = derive_features(df)
-    X, y = prepare_xy(df)
-
-    # Split train/test for final evaluation
-    X_train, X_test, y_train, y_test = train_test_split(X, y, stratify=y, test_size=0.2, random_state=random_state)
-
-    # Fit preprocessor on training data
-    pre = FeaturePreprocessor()
-    pre.fit(X_train)
-    X_train_trans = pre.transform(X_train)
-    X_test_trans = pre.transform(X_test)
-
-    # Cross-validation with XGBoost
-    skf = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
-    roc_list = []
-    prec_list = []
-    rec_list = []
-
-    for train_idx, val_idx in skf.split(X_train_trans, y_train):
-        X_tr, X_val = X_train_trans[train_idx], X_train_trans[val_idx]
-        y_tr, y_val = y_train.iloc[train_idx], y_train.iloc[val_idx]
-
-        clf = xgb.XGBClassifier(use_label_encoder=False, eval_metric="logloss", random_state=random_state)
-        clf.fit(X_tr, y_tr)
-
-        y_score = clf.predict_proba(X_val)[:, 1]
-        y_pred = clf.predict(X_val)
-
-        roc_list.append(roc_auc_score(y_val, y_score))
-        prec_list.append(precision_score(y_val, y_pred, zero_division=0))
-        rec_list.append(recall_score(y_val, y_pred, zero_division=0))
+    """Train, cross-validate and evaluate the XGBoost model and write its artifacts to output_dir.
+
+    - n_jobs: cores for CV and the final fit (None or <= 0: all)
+    - cv_workers: folds trained at once; > 1 (or None: as many as the cores allow) runs them in a
+      process pool with the cores split between folds and xgboost threads
+    - early_stopping_rounds: each fold stops once its validation logloss has not improved for this many
+      rounds (None trains the default round count); the final model uses the folds' median best count
+    - params: extra XGBClassifier parameters (e.g. max_depth, learning_rate)
+    - tune_trials: > 0 first runs a successive-halving search over that many configurations on the
+      training split (see tuning.py) and trains with the best one; tune_checkpoint lets an interrupted
+      search resume
+    - sparse: fit a sparse FeaturePreprocessor, so CV and the final fit train on CSR matrices (for
+      high-cardinality categoricals); the saved preprocessor keeps producing CSR for batch scoring
+
+    The result includes per-stage wall times ("timings") next to the CV and test metrics.
+    """
+    from sklearn.model_selection import train_test_split
+    from sklearn.metrics import roc_auc_score, precision_score, recall_score
 
-    cv_results = {
-        "roc_auc_mean": float(np.mean(roc_list)),
-        "precision_mean": float(np.mean(prec_list)),
-        "recall_mean": float(np.mean(rec_list)),
-    }
+    os.makedirs(output_dir, exist_ok=True)
+    timer = training.StageTimer()
+
+    with timer.stage("load_ms"):
+        df = load_dataset(local_data_path)
+    with timer.stage("features_ms"):
+        df = derive_features(df)
+        X, y = prepare_xy(df)
+
+        # Split train/test for final evaluation
+        X_train, X_test, y_train, y_test = train_test_split(X, y, stratify=y, test_size=0.2, random_state=random_state)
+
+    with timer.stage("preprocess_ms"):
+        # Fit preprocessor on training data
+        pre = FeaturePreprocessor(sparse=sparse)
+        pre.fit(X_train)
+        X_train_trans = pre.transform(X_train)
+        X_test_trans = pre.transform(X_test)
+
+    tuning_report = None
+    if tune_trials > 0:
+        from . import tuning
+
+        with timer.stage("tune_ms"):
+            tuning_report = tuning.successive_halving(
+                X_train_trans,
+                y_train,
+                n_trials=tune_trials,
+                max_rounds=max_rounds,
+                random_state=random_state,
+                n_jobs=n_jobs,
+                early_stopping_rounds=early_stopping_rounds,
+                checkpoint_path=tune_checkpoint,
+            )
+        params = {**(params or {}), **tuning_report["best_params"]}
+
+    # Cross-validation with XGBoost, folds early-stopping on their validation split
+    with timer.stage("cv_ms"):
+        cv_results = training.cross_validate(
+            X_train_trans,
+            y_train,
+            n_splits=n_splits,
+            random_state=random_state,
+            n_jobs=n_jobs,
+            workers=cv_workers,
+            params=params,
+            max_rounds=max_rounds,
+            early_stopping_rounds=early_stopping_rounds,
+        )
 
     # Train final model on full training set
-    final_clf = xgb.XGBClassifier(use_label_encoder=False, eval_metric="logloss", random_state=random_state)
-    final_clf.fit(X_train_trans, y_train)
+    with timer.stage("final_fit_ms"):
+        final_kwargs = {"n_estimators": cv_results["rounds_median"]} if early_stopping_rounds else {}
+        final_clf = training.make_classifier(params, random_state, training.resolve_jobs(n_jobs), **final_kwargs)
+        final_clf.fit(X_train_trans, y_train)
 
     # Evaluate on test set
-    y_test_score = final_clf.predict_proba(X_test_trans)[:, 1]
-    y_test_pred = final_clf.predict(X_test_trans)
-    test_metrics = {
-        "roc_auc": float(roc_auc_score(y_test, y_test_score)),
-        "precision": float(precision_score(y_test, y_test_pred, zero_division=0)),
-        "recall": float(recall_score(y_test, y_test_pred, zero_division=0)),
+    with timer.stage("evaluate_ms"):
+        y_test_score = final_clf.predict_proba(X_test_trans)[:, 1]
+        y_test_pred = final_clf.predict(X_test_trans)
+        test_metrics = {
+            "roc_auc": float(roc_auc_score(y_test, y_test_score)),
+            "precision": float(precision_score(y_test, y_test_pred, zero_division=0)),
+            "recall": float(recall_score(y_test, y_test_pred, zero_division=0)),
+        }
+
+    with timer.stage("save_ms"):
+        training_info = {
+            "params": params or {},
+            "sparse": sparse,
+            "n_estimators": final_clf.get_params()["n_estimators"],
+            "cv_roc_auc": cv_results["roc_auc_mean"],
+            "test_metrics": test_metrics,
+        }
+        saved = save_artifacts(output_dir, final_clf, pre, training_info=training_info)
+
+    result = {
+        "cv_results": cv_results,
+        "timings": timer.report(),
+        "test_metrics": test_metrics,
+        "params": params or {},
+        **saved,
     }
+    if tuning_report is not None:
+        result["tuning"] = tuning_report
+    return result
+
+
+def save_artifacts(
+    output_dir: str, model: Any, pre: FeaturePreprocessor, version: Optional[str] = None, training_info: Optional[Dict[str, Any]] = None
+) -> Dict[str, str]:
+    """Write the joblib pickles, compiled engine, feature names and bundle of a trained model to output_dir.
+
+    training_info (parameters, metrics) is recorded in the bundle manifest.
+    """
+    import joblib
 
     # Save artifacts: model, scaler/encoder via joblib, and deterministic feature names
     model_path = os.path.join(output_dir, "xgboost_model.pkl")
-    joblib.dump(final_clf, model_path)
+    joblib.dump(model, model_path)
 
     preproc_path = os.path.join(output_dir, "preprocessor.pkl")
     joblib.dump(pre, preproc_path)
 
+    # Flat-array copy of the booster for the NumPy serving engine (SCORING_ENGINE=numpy)
+    from .tree_engine import CompiledTreeEnsemble
+
+    engine_path = CompiledTreeEnsemble.from_model(model).save(os.path.join(output_dir, "tree_ensemble.npz"))
+
     feature_names = pre.feature_names
     feature_names_path = os.path.join(output_dir, "feature_names.json")
     with open(feature_names_path, "w") as fh:
         json.dump(feature_names, fh)
 
+    # Pickle-free bundle (native booster, JSON + .npy preprocessor state) preferred by the loader
+    from . import artifacts
+
+    version = version or f"xgboost-{int(time.time())}"
+    bundle_path = artifacts.bundle_dir(output_dir)
+    artifacts.save_bundle(bundle_path, model, pre, version, training=training_info)
+    with open(os.path.join(output_dir, "model_version.json"), "w") as fh:
+        json.dump({"version": version}, fh)
+
     return {
-        "cv_results": cv_results,
-        "test_metrics": test_metrics,
         "model_path": model_path,
         "preprocessor_path": preproc_path,
         "feature_names_path": feature_names_path,
+        "engine_path": engine_path,
+        "bundle_path": bundle_path,
+        "model_version": version,
     }
 
 
@@ -202,83 +293,226 @@ if __name__ == "__main__":
 # Inference integration
 # ----------------------
 
-from ..utils.schema_adapter import build_feature_vector_from_payload
+from ..utils.schema_adapter import build_feature_vector_from_payload, build_feature_matrix_from_payloads
 
-# Try to load model artifacts at import time for fast inference
+# Active model artifacts, mirrored from the registry's active bundle for callers that read the module
+# globals. Scoring goes through a ModelBundle snapshot so a hot swap never mixes two versions.
 MODEL = None
 PREPROCESSOR = None
 FEATURE_NAMES = None
 MODEL_VERSION = None
+# Optional pure-NumPy scorer (SCORING_ENGINE=numpy); used in place of MODEL.predict_proba when set
+ENGINE = None
+
+_ARTIFACT_DIR = "models"
+_LOADED = False
+_LOAD_LOCK = threading.RLock()
+
+_REGISTRY = None
+
+
+def _use_engine() -> bool:
+    return os.getenv("SCORING_ENGINE", "xgboost").lower() == "numpy"
+
+
+def _verify_checksums() -> bool:
+    return os.getenv("MODEL_VERIFY_CHECKSUMS", "1").lower() in ("1", "true", "yes")
+
+
+def _on_swap(bundle) -> None:
+    global MODEL, PREPROCESSOR, FEATURE_NAMES, MODEL_VERSION, ENGINE
+    MODEL, PREPROCESSOR, FEATURE_NAMES, MODEL_VERSION, ENGINE = (
+        bundle.model,
+        bundle.preprocessor,
+        bundle.feature_names,
+        bundle.version,
+        bundle.engine,
+    )
+
+
+def get_registry():
+    """The process-wide ModelRegistry (MODEL_MAX_RESIDENT versions kept in memory)."""
+    global _REGISTRY
+    if _REGISTRY is None:
+        with _LOAD_LOCK:
+            if _REGISTRY is None:
+                from .registry import ModelRegistry
+
+                _REGISTRY = ModelRegistry(max_resident=int(os.getenv("MODEL_MAX_RESIDENT", "3")), on_swap=_on_swap)
+    return _REGISTRY
 
 
 def _load_artifacts(base_dir: str = "models"):
-    global MODEL, PREPROCESSOR, FEATURE_NAMES, MODEL_VERSION
+    global MODEL, PREPROCESSOR, FEATURE_NAMES, MODEL_VERSION, ENGINE
+    from .registry import ModelBundle
+
     try:
-        model_path = os.path.join(base_dir, "xgboost_model.pkl")
-        preproc_path = os.path.join(base_dir, "preprocessor.pkl")
-        feature_names_path = os.path.join(base_dir, "feature_names.json")
-
-        if os.path.exists(model_path):
-            MODEL = joblib.load(model_path)
-        if os.path.exists(preproc_path):
-            PREPROCESSOR = joblib.load(preproc_path)
-        if os.path.exists(feature_names_path):
-            with open(feature_names_path, "r") as fh:
-                FEATURE_NAMES = json.load(fh)
-
-        # model_version: try to read explicit version file, otherwise derive from model metadata / file mtime
-        version_path = os.path.join(base_dir, "model_version.json")
-        if os.path.exists(version_path):
-            with open(version_path, "r") as fh:
-                MODEL_VERSION = json.load(fh).get("version")
-        else:
-            if MODEL is not None and os.path.exists(model_path):
-                mtime = os.path.getmtime(model_path)
-                MODEL_VERSION = f"xgboost-{int(mtime)}"
-            elif MODEL is not None:
-                MODEL_VERSION = getattr(MODEL, "version", MODEL.__class__.__name__)
-    except Exception:
+        bundle = ModelBundle.from_dir(base_dir, use_engine=_use_engine(), verify=_verify_checksums())
+    except Exception as e:
         # artifacts may not exist during development; leave as None
-        MODEL = PREPROCESSOR = FEATURE_NAMES = MODEL_VERSION = None
+        from loguru import logger
 
-    # If SHAP is available, initialize explainer for fast reuse
+        logger.warning("Model artifacts not loaded from {}: {}", base_dir, e)
+        MODEL = PREPROCESSOR = FEATURE_NAMES = MODEL_VERSION = ENGINE = None
+        return
+    get_registry().register(bundle, activate=True)
+
+
+def load_artifacts(base_dir: str = "models", force: bool = False) -> None:
+    """Load model artifacts once (thread-safe). Called from the API lifespan; prediction helpers call it lazily."""
+    global _LOADED, _ARTIFACT_DIR
+    with _LOAD_LOCK:
+        if _LOADED and not force:
+            return
+        _ARTIFACT_DIR = base_dir
+        _load_artifacts(base_dir)
+        _LOADED = True
+
+
+def artifact_dir() -> str:
+    """Base artifact directory (models/ unless load_artifacts was given another one)."""
+    return _ARTIFACT_DIR
+
+
+def _ensure_loaded() -> None:
+    if not _LOADED:
+        load_artifacts(_ARTIFACT_DIR)
+
+
+def get_bundle(model_version: Optional[str] = None):
+    """ModelBundle for a pinned version, or the active one when model_version is None.
+
+    A version that is not resident but exists under models/versions/<version> is loaded on demand
+    (without becoming active), waiting at most MODEL_LOAD_TIMEOUT_SECONDS. Raises ModelVersionNotFound
+    for unknown versions.
+    """
+    from .registry import ModelVersionNotFound, available_versions, versions_dir
+
+    _ensure_loaded()
+    registry = get_registry()
     try:
-        from . import shap_explainer
+        return registry.get(model_version)
+    except ModelVersionNotFound:
+        if model_version is None:
+            raise RuntimeError("Model artifact not loaded")
+        if model_version not in available_versions(_ARTIFACT_DIR):
+            raise
+    future = registry.load_async(os.path.join(versions_dir(_ARTIFACT_DIR), model_version), activate=False, use_engine=_use_engine(), verify=_verify_checksums())
+    timeout = float(os.getenv("MODEL_LOAD_TIMEOUT_SECONDS", "120"))
+    try:
+        bundle = future.result(timeout=timeout)
+    except FutureTimeoutError:
+        raise RuntimeError(f"Model version {model_version} did not load within {timeout:g} s")
+    if bundle.version != model_version:
+        raise ModelVersionNotFound(f"{model_version} (directory holds version {bundle.version})")
+    return bundle
 
-        if MODEL is not None and PREPROCESSOR is not None:
-            # Create a small background using zeros or rely on SHAP defaults
-            try:
-                # If possible, create a small background sample from preprocessor internals
-                background = None
-            except Exception:
-                background = None
-            shap_explainer.init_explainer(MODEL, background_data=background, feature_names=FEATURE_NAMES or getattr(PREPROCESSOR, "feature_names", None))
-    except Exception:
-        # shap may not be installed; skip silently
-        pass
 
+def reload_model(model_version: Optional[str] = None, activate: bool = True, wait: bool = False):
+    """Load a version from disk in the background, warm it up and (optionally) swap it in.
 
-# Initialize artifacts on import
-_load_artifacts()
+    model_version names a directory under models/versions; None reloads the base artifact directory.
+    Returns the loader future, or the loaded ModelBundle when wait=True.
+    """
+    from .registry import ModelVersionNotFound, available_versions, versions_dir
+
+    _ensure_loaded()
+    if model_version is None:
+        path = _ARTIFACT_DIR
+    elif model_version in available_versions(_ARTIFACT_DIR):
+        path = os.path.join(versions_dir(_ARTIFACT_DIR), model_version)
+    else:
+        raise ModelVersionNotFound(model_version)
+    future = get_registry().load_async(path, activate=activate, use_engine=_use_engine(), verify=_verify_checksums())
+    return future.result() if wait else future
+
+
+def model_registry_metrics() -> Dict[str, Any]:
+    from .registry import available_versions
+
+    return {**get_registry().stats(), "available_versions": available_versions(_ARTIFACT_DIR)}
+
+
+def warm_up(payload: Optional[dict] = None) -> Dict[str, float]:
+    """Load artifacts and run one prediction and one explanation so the first real request pays no lazy-init cost.
+
+    Returns the wall time of each step in milliseconds.
+    """
+    payload = payload if payload is not None else {}
+    timings = {}
+    start = time.perf_counter()
+    load_artifacts(_ARTIFACT_DIR)
+    timings["load_ms"] = (time.perf_counter() - start) * 1000.0
+
+    start = time.perf_counter()
+    predict_from_payload(payload)
+    timings["predict_ms"] = (time.perf_counter() - start) * 1000.0
+
+    start = time.perf_counter()
+    explain_payload(payload, top_k=1)
+    timings["explain_ms"] = (time.perf_counter() - start) * 1000.0
+
+    bundle = get_bundle()
+    bundle.warmup_ms = timings["predict_ms"] + timings["explain_ms"]
+    return timings
+
+
+# Micro-batching of concurrent single-row requests (SCORING_BATCH_WINDOW_MS > 0 enables it); each
+# resident model version has its own batcher so a batch never mixes versions
+def get_coalescer(bundle=None):
+    """Return the PredictionCoalescer of `bundle` (default: the active one), or None when batching is disabled."""
+    window_ms = float(os.getenv("SCORING_BATCH_WINDOW_MS", "0") or 0)
+    if window_ms <= 0:
+        return None
+    bundle = bundle if bundle is not None else get_bundle()
+    return bundle.get_coalescer(
+        window_ms=window_ms,
+        max_batch=int(os.getenv("SCORING_MAX_BATCH", "64")),
+        batch_shap=os.getenv("SCORING_BATCH_SHAP", "0").lower() in ("1", "true", "yes"),
+    )
+
+
+def shutdown_coalescer() -> None:
+    registry = _REGISTRY
+    if registry is not None:
+        registry.shutdown()
+
+
+def scoring_metrics() -> Dict[str, Any]:
+    registry = _REGISTRY
+    bundle = registry.active if registry is not None else None
+    coalescer = bundle.coalescer if bundle is not None else None
+    if coalescer is None:
+        return {"batching_enabled": float(os.getenv("SCORING_BATCH_WINDOW_MS", "0") or 0) > 0}
+    return {"batching_enabled": True, "model_version": bundle.version, **coalescer.stats()}
 
 
 def get_model_version() -> str:
     return MODEL_VERSION or "unknown"
 
 
+# (minimum risk score, tier) from best to worst; scores below the last threshold are CRITICAL
+RISK_TIERS = [(800, "LOW"), (650, "MEDIUM"), (500, "HIGH")]
+LOWEST_TIER = "CRITICAL"
+
+
+def risk_score_from_pd(prob_default: float) -> int:
+    return round((1.0 - float(prob_default)) * 1000)
+
+
+def risk_tier(risk_score: int) -> str:
+    for threshold, tier in RISK_TIERS:
+        if risk_score >= threshold:
+            return tier
+    return LOWEST_TIER
+
+
 def _compute_risk_values(prob_default: float) -> Dict[str, Any]:
     # risk_score derived as provided
-    risk_score = round((1.0 - float(prob_default)) * 1000)
+    risk_score = risk_score_from_pd(prob_default)
 
     # tiers
-    if risk_score >= 800:
-        tier = "LOW"
-    elif 650 <= risk_score <= 799:
-        tier = "MEDIUM"
-    elif 500 <= risk_score <= 649:
-        tier = "HIGH"
-    else:
-        tier = "CRITICAL"
+    tier = risk_tier(risk_score)
 
     # confidence: 1 - 2 * abs(prob_default - 0.5)
     confidence = 1.0 - 2.0 * abs(float(prob_default) - 0.5)
@@ -288,38 +522,154 @@ def _compute_risk_values(prob_default: float) -> Dict[str, Any]:
     return {"risk_score": risk_score, "tier": tier, "confidence": confidence}
 
 
-def predict_proba_from_vector(X_vector) -> float:
+def predict_proba_from_matrix(X_matrix, model_version: Optional[str] = None) -> np.ndarray:
+    """Given a preprocessed 2D feature matrix, return the probability of default (class=1) for every row.
+
+    Scores the whole matrix with a single predict_proba call, on the compiled NumPy engine when enabled
+    and on the xgboost model otherwise.
+    """
+    return get_bundle(model_version).predict_proba(X_matrix)
+
+
+def predict_proba_from_vector(X_vector, model_version: Optional[str] = None) -> float:
     """Given a preprocessed feature vector (2D numpy array or 1D), return probability of default (class=1).
 
-    Expects MODEL to be loaded.
+    Expects the model (or the compiled engine) to be loaded.
     """
-    if MODEL is None:
-        raise RuntimeError("Model artifact not loaded")
-    arr = X_vector
-    if hasattr(arr, "ndim") and arr.ndim == 1:
-        arr = arr.reshape(1, -1)
-    elif isinstance(arr, list):
-        import numpy as _np
-
-        arr = _np.array(arr).reshape(1, -1)
-    prob = MODEL.predict_proba(arr)[:, 1][0]
-    return float(prob)
-
-
-def predict_from_payload(payload: dict) -> Dict[str, Any]:
-    """High-level prediction API: accepts frontend payload (dict), returns dict with probability, risk_score, tier, confidence, model_version."""
-    if PREPROCESSOR is None:
-        raise RuntimeError("Preprocessor not loaded; cannot vectorize payload")
+    arr = np.asarray(X_vector).reshape(1, -1)
+    return float(predict_proba_from_matrix(arr, model_version)[0])
 
-    # build feature vector using shared adapter
-    X_vector = build_feature_vector_from_payload(payload, PREPROCESSOR)
-    prob_default = predict_proba_from_vector(X_vector)
-    risk_info = _compute_risk_values(prob_default)
+
+def _prediction_result(prob_default: float, risk_info: Optional[Dict[str, Any]] = None, model_version: Optional[str] = None) -> Dict[str, Any]:
+    risk_info = risk_info or _compute_risk_values(prob_default)
     return {
         "prob_default": prob_default,
         "risk_score": risk_info["risk_score"],
         "tier": risk_info["tier"],
         "confidence": risk_info["confidence"],
-        "model_version": get_model_version(),
+        "model_version": model_version or get_model_version(),
     }
 
+
+# Content-addressed cache of predictions/explanations keyed by preprocessed vector + model version
+_PREDICTION_CACHE = None
+_PREDICTION_CACHE_VERSION = None
+_PREDICTION_CACHE_LOCK = threading.Lock()
+
+
+def get_prediction_cache():
+    """Shared prediction cache (PREDICTION_CACHE_SIZE > 0), cleared whenever the active model version changes."""
+    global _PREDICTION_CACHE, _PREDICTION_CACHE_VERSION
+    max_size = int(os.getenv("PREDICTION_CACHE_SIZE", "1024") or 0)
+    if max_size <= 0:
+        return None
+    if _PREDICTION_CACHE is None:
+        with _PREDICTION_CACHE_LOCK:
+            if _PREDICTION_CACHE is None:
+                from ..utils.lru_cache import LRUCache
+
+                ttl = float(os.getenv("PREDICTION_CACHE_TTL_SECONDS", "300") or 0)
+                _PREDICTION_CACHE = LRUCache(max_size=max_size, ttl_seconds=ttl)
+    version = get_model_version()
+    if _PREDICTION_CACHE_VERSION != version:
+        _PREDICTION_CACHE.clear()
+        _PREDICTION_CACHE_VERSION = version
+    return _PREDICTION_CACHE
+
+
+def _vector_cache_key(X_vector, model_version: Optional[str] = None) -> str:
+    digest = hashlib.blake2b(np.ascontiguousarray(X_vector, dtype=np.float64).tobytes(), digest_size=16).hexdigest()
+    return f"{model_version or get_model_version()}:{digest}"
+
+
+def prediction_cache_metrics() -> Dict[str, Any]:
+    cache = _PREDICTION_CACHE
+    return cache.stats() if cache is not None else {"enabled": int(os.getenv("PREDICTION_CACHE_SIZE", "1024") or 0) > 0}
+
+
+def predict_from_payload(payload: dict, model_version: Optional[str] = None) -> Dict[str, Any]:
+    """High-level prediction API: accepts frontend payload (dict), returns dict with probability, risk_score, tier, confidence, model_version.
+
+    model_version pins a resident (or loadable) version; the active version is used otherwise.
+    """
+    bundle = get_bundle(model_version)
+    if bundle.preprocessor is None:
+        raise RuntimeError("Preprocessor not loaded; cannot vectorize payload")
+
+    # build feature vector using shared adapter
+    X_vector = build_feature_vector_from_payload(payload, bundle.preprocessor)
+
+    cache = get_prediction_cache()
+    key = _vector_cache_key(X_vector, bundle.version) if cache is not None else None
+    entry = cache.get(key) if cache is not None else None
+    if entry is not None and entry.get("prob_default") is not None:
+        return _prediction_result(entry["prob_default"], entry["risk_info"], bundle.version)
+
+    coalescer = get_coalescer(bundle)
+    prob_default = coalescer.predict(X_vector) if coalescer is not None else float(bundle.predict_proba(X_vector)[0])
+    risk_info = _compute_risk_values(prob_default)
+    if cache is not None:
+        cache.set(key, {**(entry or {}), "prob_default": prob_default, "risk_info": risk_info})
+    return _prediction_result(prob_default, risk_info, bundle.version)
+
+
+def explain_payload(payload: dict, top_k: Optional[int] = None, model_version: Optional[str] = None) -> List[Dict[str, float]]:
+    """SHAP explanation for a frontend payload as a list of {feature, impact}, largest impact first.
+
+    Served from the prediction cache when the same vector was explained before with at least top_k
+    features. Goes through the coalescer's batched SHAP path when SCORING_BATCH_SHAP is enabled.
+    """
+    from . import shap_explainer
+
+    bundle = get_bundle(model_version)
+    if bundle.preprocessor is None:
+        raise RuntimeError("Preprocessor not loaded; cannot vectorize payload")
+    X_vector = build_feature_vector_from_payload(payload, bundle.preprocessor)
+
+    cache = get_prediction_cache()
+    key = _vector_cache_key(X_vector, bundle.version) if cache is not None else None
+    entry = cache.get(key) if cache is not None else None
+    if entry is not None and entry.get("explanation") is not None:
+        cached_k = entry["top_k"]
+        if cached_k is None or (top_k is not None and top_k <= cached_k):
+            return list(entry["explanation"][:top_k])
+
+    coalescer = get_coalescer(bundle)
+    if coalescer is not None and coalescer.explain_fn is not None:
+        row = coalescer.explain(X_vector)
+    else:
+        row = bundle.shap_values(X_vector)[0]
+    expl = shap_explainer.explanation_from_row(row, bundle.preprocessor, top_k=top_k, feature_names=bundle.feature_names)
+    if cache is not None:
+        cache.set(key, {**(entry or {}), "explanation": expl, "top_k": top_k})
+    return list(expl)
+
+
+def predict_from_payloads(payloads: List[dict], model_version: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Batch variant of predict_from_payload.
+
+    Vectorizes all payloads into one matrix and scores it with a single model call. Returns one result dict
+    (same keys as predict_from_payload) per payload, in input order.
+    """
+    bundle = get_bundle(model_version)
+    if bundle.preprocessor is None:
+        raise RuntimeError("Preprocessor not loaded; cannot vectorize payload")
+    if not payloads:
+        return []
+
+    X_matrix = build_feature_matrix_from_payloads(payloads, bundle.preprocessor)
+    probs = bundle.predict_proba(X_matrix)
+    return [_prediction_result(float(p), model_version=bundle.version) for p in probs]
+
+
+def explain_payloads(payloads: List[dict], top_k: Optional[int] = None, model_version: Optional[str] = None) -> List[List[Dict[str, float]]]:
+    """Batch variant of explain_payload: one feature matrix and one SHAP call for all payloads."""
+    from . import shap_explainer
+
+    if not payloads:
+        return []
+    bundle = get_bundle(model_version)
+    X_matrix = build_feature_matrix_from_payloads(payloads, bundle.preprocessor)
+    return shap_explainer.explain_matrix(
+        X_matrix, bundle.preprocessor, top_k=top_k, explainer=bundle.explainer, feature_names=bundle.feature_names
+    )
@@ -1,10 +1,18 @@
-from typing import List, Tuple, Dict, Any
+from typing import TYPE_CHECKING, Iterable, List, Tuple, Dict, Any, Optional
+from decimal import Decimal
+import math
+import sys
+
 import numpy as np
-import pandas as pd
-from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+# pandas / scikit-learn are only needed for fitting and the DataFrame path; import them lazily so the
+# serving path (compiled FeaturePlan) does not pay for them at startup
+if TYPE_CHECKING:
+    import pandas as pd
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
 
 
-def derive_features(df: pd.DataFrame) -> pd.DataFrame:
+def derive_features(df: "pd.DataFrame") -> "pd.DataFrame":
     """Add derived features with sensible fallbacks depending on available columns.
 
     Derived features added:
@@ -12,6 +20,8 @@ def derive_features(df: pd.DataFrame) -> pd.DataFrame:
     - employment_stability_score
     - credit_history_bucket
     """
+    import pandas as pd
+
     df = df.copy()
 
     # loan_to_income_ratio: prefer explicit monthly_income; otherwise use duration as proxy
@@ -50,23 +60,264 @@ def derive_features(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
+class UnsupportedRecord(ValueError):
+    """Raised by the compiled feature plan for records it cannot reproduce exactly; callers fall back to pandas."""
+
+
+_EMPLOYMENT_STABILITY = {"unemployed": 0.0, "temporary": 0.3, "probation": 0.5, "permanent": 1.0}
+
+
+def _is_missing(value: Any) -> bool:
+    if value is None:
+        return True
+    # pd.NA can only show up if pandas has been imported by someone
+    pandas = sys.modules.get("pandas")
+    if pandas is not None and value is pandas.NA:
+        return True
+    return isinstance(value, float) and math.isnan(value)
+
+
+def _as_number(value: Any) -> float:
+    """Return value as float for arithmetic; only plain numbers are supported (NaN stays NaN)."""
+    if isinstance(value, (bool, np.bool_)):
+        return float(value)
+    # float64 only: pandas would keep narrower floats in their own dtype
+    if isinstance(value, (int, float, np.integer)):
+        return float(value)
+    raise UnsupportedRecord(f"non-numeric operand {value!r}")
+
+
+def _as_text(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    raise UnsupportedRecord(f"non-string category {value!r}")
+
+
+def derive_record_features(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Single-record equivalent of derive_features, without building a DataFrame.
+
+    Returns a shallow copy of record with the derived features added. Raises UnsupportedRecord when the
+    record needs a branch that is only defined over a whole frame (e.g. credit amount quantile buckets).
+    """
+    rec = dict(record)
+
+    if "monthly_income" in rec and "credit_amount" in rec:
+        income = _as_number(rec["monthly_income"])
+        rec["loan_to_income_ratio"] = _as_number(rec["credit_amount"]) / (1.0 if income == 0 or math.isnan(income) else income)
+    elif "credit_amount" in rec and "duration" in rec:
+        duration = _as_number(rec["duration"])
+        rec["loan_to_income_ratio"] = _as_number(rec["credit_amount"]) / (1.0 if duration == 0 or math.isnan(duration) else duration)
+    else:
+        rec["loan_to_income_ratio"] = _as_number(rec.get("credit_amount", 0)) / 1.0
+
+    if "employment" in rec:
+        employment = rec["employment"]
+        rec["employment_stability_score"] = _EMPLOYMENT_STABILITY.get(employment, 0.5) if isinstance(employment, str) else 0.5
+    elif "age" in rec and "duration" in rec:
+        ratio = _as_number(rec["age"]) / (_as_number(rec["duration"]) + 1)
+        rec["employment_stability_score"] = (ratio if math.isnan(ratio) else min(max(ratio, 0.0), 100.0)) / 100.0
+    else:
+        rec["employment_stability_score"] = 0.5
+
+    if "credit_history" in rec:
+        rec["credit_history_bucket"] = _as_text(rec["credit_history"])
+    elif "checking_status" in rec:
+        rec["credit_history_bucket"] = _as_text(rec["checking_status"])
+    elif "credit_amount" in rec:
+        raise UnsupportedRecord("credit_amount quantile bucket needs the full frame")
+    else:
+        rec["credit_history_bucket"] = "unknown"
+
+    return rec
+
+
+class FeaturePlan:
+    """Compiled, pandas-free form of a fitted FeaturePreprocessor.
+
+    Holds the scaler mean/scale as NumPy arrays and a dict from (column, category) to output index, so a
+    dict record can be written straight into a preallocated float array. Produces exactly the same values
+    as FeaturePreprocessor.transform for the records it supports.
+
+    `absent` fills the one-hot slots of categories a record does not have: 0.0, or NaN for sparse
+    preprocessors (their models were trained on CSR matrices, where unstored entries are missing).
+    """
+
+    def __init__(
+        self,
+        numeric_cols: List[str],
+        categorical_cols: List[str],
+        mean: np.ndarray,
+        scale: np.ndarray,
+        category_index: Dict[Tuple[str, str], int],
+        n_features: int,
+        absent: float = 0.0,
+    ):
+        self.numeric_cols = list(numeric_cols)
+        self.categorical_cols = list(categorical_cols)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.category_index = category_index
+        self.n_features = int(n_features)
+        self.absent = float(absent)
+
+    def _encode_row(self, record: Dict[str, Any], num_row: np.ndarray) -> List[int]:
+        """Write the raw numeric values into num_row and return the one-hot indices of the record's categories."""
+        rec = derive_record_features(record)
+        for j, c in enumerate(self.numeric_cols):
+            v = rec.get(c)
+            if _is_missing(v):
+                x = 0.0
+            elif isinstance(v, Decimal) and v.is_finite():
+                x = float(v)
+            else:
+                x = _as_number(v)
+            # fillna(0) semantics of the pandas path
+            num_row[j] = 0.0 if math.isnan(x) else x
+        hot = []
+        for c in self.categorical_cols:
+            v = rec.get(c)
+            idx = self.category_index.get((c, "__MISSING__" if _is_missing(v) else _as_text(v)))
+            if idx is not None:
+                hot.append(idx)
+        return hot
+
+    def _encode_rows(self, records: List[Dict[str, Any]], num: np.ndarray, unsupported: Optional[List[int]]) -> List[List[int]]:
+        hot = []
+        for i, record in enumerate(records):
+            try:
+                hot.append(self._encode_row(record, num[i]))
+            except UnsupportedRecord:
+                if unsupported is None:
+                    raise
+                unsupported.append(i)
+                num[i] = 0.0
+                hot.append([])
+        return hot
+
+    def transform_record(self, record: Dict[str, Any]) -> np.ndarray:
+        """Vectorize one record into a 1D array of length n_features."""
+        return self.transform_records([record])[0]
+
+    def transform_records(self, records: List[Dict[str, Any]], sparse: bool = False, unsupported: Optional[List[int]] = None) -> Any:
+        """Vectorize records into a preallocated (n_records, n_features) array (CSR matrix with sparse=True).
+
+        Raises UnsupportedRecord (for the whole call) if any record cannot be handled exactly, unless an
+        `unsupported` list is passed: the indices of those records are appended to it instead and their
+        rows hold placeholder values for the caller to replace.
+        """
+        if sparse:
+            return self._transform_records_csr(records, unsupported)
+        n_num = len(self.numeric_cols)
+        out = np.full((len(records), self.n_features), self.absent, dtype=np.float64)
+        num = np.empty((len(records), n_num), dtype=np.float64)
+        for row, hot in zip(out, self._encode_rows(records, num, unsupported)):
+            for idx in hot:
+                row[idx] = 1.0
+        if n_num:
+            out[:, :n_num] = (num - self.mean) / self.scale
+        return out
+
+    def _transform_records_csr(self, records: List[Dict[str, Any]], unsupported: Optional[List[int]] = None) -> Any:
+        import scipy.sparse as sp
+
+        n_num = len(self.numeric_cols)
+        num = np.empty((len(records), n_num), dtype=np.float64)
+        hot = [sorted(h) for h in self._encode_rows(records, num, unsupported)]
+        if n_num:
+            num = (num - self.mean) / self.scale
+        # every numeric value is stored (zeros included), then the row's known categories
+        indptr = np.concatenate([[0], np.cumsum([n_num + len(h) for h in hot])]).astype(np.int64)
+        indices = np.empty(indptr[-1], dtype=np.int64)
+        data = np.ones(indptr[-1], dtype=np.float64)
+        for i, h in enumerate(hot):
+            lo = indptr[i]
+            indices[lo : lo + n_num] = np.arange(n_num)
+            data[lo : lo + n_num] = num[i]
+            indices[lo + n_num : indptr[i + 1]] = h
+        return sp.csr_matrix((data, indices, indptr), shape=(len(records), self.n_features))
+
+
+def csr_from_dense(X: np.ndarray) -> Any:
+    """CSR matrix storing every non-NaN entry of X, zeros included (xgboost treats unstored entries as missing)."""
+    import scipy.sparse as sp
+
+    X = np.asarray(X, dtype=np.float64)
+    present = ~np.isnan(X)
+    indptr = np.concatenate([[0], np.cumsum(present.sum(axis=1))])
+    return sp.csr_matrix((X[present], np.nonzero(present)[1], indptr), shape=X.shape)
+
+
+def dense_from_csr(X: Any) -> np.ndarray:
+    """Inverse of csr_from_dense: a dense array with NaN where X stores nothing."""
+    X = X.tocsr()
+    out = np.full(X.shape, np.nan, dtype=np.float64)
+    rows = np.repeat(np.arange(X.shape[0]), np.diff(X.indptr))
+    out[rows, X.indices] = X.data
+    return out
+
+
+def is_sparse(X: Any) -> bool:
+    return hasattr(X, "tocsr")
+
+
+MISSING_CATEGORY = "__MISSING__"
+
+
+def _is_categorical(series: "pd.Series") -> bool:
+    from pandas.api.types import is_string_dtype
+
+    # pandas >= 3 reads text columns as the "str" dtype, not object
+    return series.dtype == object or series.dtype.name == "category" or is_string_dtype(series.dtype)
+
+
+def _categorical_frame(df: "pd.DataFrame", cols: List[str]) -> "pd.DataFrame":
+    """df[cols] with missing values replaced by the __MISSING__ category (category dtypes get it added)."""
+    frame = df[cols]
+    if any(frame[c].dtype.name == "category" for c in cols):
+        frame = frame.apply(
+            lambda s: s.cat.add_categories([MISSING_CATEGORY]) if s.dtype.name == "category" and MISSING_CATEGORY not in s.cat.categories else s
+        )
+    return frame.fillna(MISSING_CATEGORY)
+
+
 class FeaturePreprocessor:
     """Simple preprocessor bundling OneHotEncoder for categoricals and StandardScaler for numerics.
 
     The class exposes fit and transform methods and keeps a deterministic feature order list after fit.
+
+    With sparse=True the encoder produces sparse one-hot blocks and transform() returns CSR matrices in
+    which every numeric value is stored and only the present categories are, so memory grows with the
+    number of columns rather than the number of categories. Unstored entries are missing to xgboost, so
+    dense output of a sparse preprocessor (transform(sparse=False), the compiled plan used for
+    single-row serving) has NaN rather than 0.0 in the one-hot slots; both score identically.
     """
 
-    def __init__(self):
+    # class default so preprocessors pickled before sparse mode load as dense
+    sparse: bool = False
+
+    def __init__(self, sparse: bool = False):
+        self.sparse = bool(sparse)
         self.categorical_cols: List[str] = []
         self.numeric_cols: List[str] = []
-        self.encoder: OneHotEncoder = None
-        self.scaler: StandardScaler = None
+        self.encoder: Optional["OneHotEncoder"] = None
+        self.scaler: Optional["StandardScaler"] = None
         self.feature_names: List[str] = []
+        self._plan: Optional[FeaturePlan] = None
+        # set by from_state() until the sklearn estimators are restored
+        self._state: Optional[Dict[str, Any]] = None
+
+    def __getstate__(self):
+        # the compiled plan is derived state; rebuild it after unpickling
+        state = self.__dict__.copy()
+        state.pop("_plan", None)
+        return state
+
+    def fit(self, df: "pd.DataFrame") -> List[str]:
+        from sklearn.preprocessing import OneHotEncoder, StandardScaler
 
-    def fit(self, df: pd.DataFrame) -> List[str]:
         df = df.copy()
         # Detect categorical vs numeric
-        self.categorical_cols = sorted([c for c in df.columns if df[c].dtype == object or df[c].dtype.name == "category"])
+        self.categorical_cols = sorted([c for c in df.columns if _is_categorical(df[c])])
         # numeric: include bool/int/float
         self.numeric_cols = [c for c in df.columns if c not in self.categorical_cols]
 
@@ -74,11 +325,11 @@ class FeaturePreprocessor:
         if self.categorical_cols:
             # use sparse_output for newer scikit-learn versions
             try:
-                self.encoder = OneHotEncoder(handle_unknown="ignore", sparse_output=False)
+                self.encoder = OneHotEncoder(handle_unknown="ignore", sparse_output=self.sparse)
             except TypeError:
                 # fallback for older versions
-                self.encoder = OneHotEncoder(handle_unknown="ignore", sparse=False)
-            self.encoder.fit(df[self.categorical_cols].fillna("__MISSING__"))
+                self.encoder = OneHotEncoder(handle_unknown="ignore", sparse=self.sparse)
+            self.encoder.fit(_categorical_frame(df, self.categorical_cols))
             cat_feature_names = list(self.encoder.get_feature_names_out(self.categorical_cols))
         else:
             cat_feature_names = []
@@ -90,9 +341,161 @@ class FeaturePreprocessor:
 
         # Deterministic feature order: numeric cols (sorted by original order), then derived numeric (if any), then categorical one-hot features
         self.feature_names = list(self.numeric_cols) + cat_feature_names
+        self._plan = None
+        self._state = None
         return self.feature_names
 
-    def transform(self, df: pd.DataFrame) -> np.ndarray:
+    @classmethod
+    def fit_chunks(cls, chunks: Iterable["pd.DataFrame"], sparse: bool = False) -> "FeaturePreprocessor":
+        """Fit on a stream of DataFrame chunks in one pass, holding only one chunk at a time.
+
+        Keeps a running count/mean/sum of squared deviations per numeric column (merged chunk by chunk
+        with Chan's parallel update) and the set of categories per categorical column, then builds the
+        fitted preprocessor through from_state(). Matches fit() on the concatenated chunks up to float
+        rounding; columns are typed by the first chunk.
+        """
+        numeric_cols: Optional[List[str]] = None
+        categorical_cols: List[str] = []
+        categories: Dict[str, set] = {}
+        n = 0
+        mean = m2 = None
+        for chunk in chunks:
+            if numeric_cols is None:
+                categorical_cols = sorted([c for c in chunk.columns if _is_categorical(chunk[c])])
+                numeric_cols = [c for c in chunk.columns if c not in categorical_cols]
+                categories = {c: set() for c in categorical_cols}
+                mean = np.zeros(len(numeric_cols))
+                m2 = np.zeros(len(numeric_cols))
+            if not len(chunk):
+                continue
+            x = chunk[numeric_cols].fillna(0).to_numpy(dtype=np.float64)
+            n_b = len(x)
+            mean_b = x.mean(axis=0)
+            m2_b = np.square(x - mean_b).sum(axis=0)
+            delta = mean_b - mean
+            total = n + n_b
+            mean = mean + delta * (n_b / total)
+            m2 = m2 + m2_b + np.square(delta) * (n * n_b / total)
+            n = total
+            if categorical_cols:
+                frame = _categorical_frame(chunk, categorical_cols)
+                for c in categorical_cols:
+                    categories[c].update(str(v) for v in frame[c].unique())
+        if numeric_cols is None or n == 0:
+            raise ValueError("fit_chunks() got no rows")
+
+        var = m2 / n
+        scale = np.sqrt(var)
+        # StandardScaler leaves constant columns unscaled
+        scale[scale < 10 * np.finfo(np.float64).eps] = 1.0
+        sorted_categories = [sorted(categories[c]) for c in categorical_cols]
+        feature_names = list(numeric_cols) + [f"{c}_{cat}" for c, cats in zip(categorical_cols, sorted_categories) for cat in cats]
+        return cls.from_state(
+            {
+                "numeric_cols": numeric_cols,
+                "categorical_cols": categorical_cols,
+                "feature_names": feature_names,
+                "categories": sorted_categories,
+                "mean": mean,
+                "scale": scale,
+                "var": var,
+                "n_samples_seen": n,
+                "sparse": bool(sparse),
+            }
+        )
+
+    def get_state(self) -> Dict[str, Any]:
+        """Plain-data state of a fitted preprocessor: columns, categories and effective scaler mean/scale.
+
+        Everything except the NumPy arrays is JSON-serializable; from_state() is the inverse.
+        """
+        if self.scaler is None and self.encoder is None and getattr(self, "_state", None) is not None:
+            return self._state
+        n_num = len(self.numeric_cols)
+        if n_num:
+            mean = self.scaler.mean_ if self.scaler.with_mean else np.zeros(n_num)
+            scale = self.scaler.scale_ if self.scaler.with_std else np.ones(n_num)
+            var = getattr(self.scaler, "var_", None)
+            n_samples = int(np.max(self.scaler.n_samples_seen_))
+        else:
+            mean = scale = np.empty(0)
+            var, n_samples = None, 0
+        return {
+            "numeric_cols": list(self.numeric_cols),
+            "categorical_cols": list(self.categorical_cols),
+            "feature_names": list(self.feature_names),
+            "categories": [c.tolist() for c in self.encoder.categories_] if self.categorical_cols else [],
+            "mean": np.asarray(mean, dtype=np.float64),
+            "scale": np.asarray(scale, dtype=np.float64),
+            "var": np.asarray(var if var is not None else np.square(scale), dtype=np.float64),
+            "n_samples_seen": n_samples,
+            "sparse": self.sparse,
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "FeaturePreprocessor":
+        """Rebuild a fitted preprocessor from get_state() output without importing scikit-learn.
+
+        The sklearn encoder/scaler used by transform() are recreated on first use.
+        """
+        pre = cls(sparse=state.get("sparse", False))
+        pre.numeric_cols = list(state["numeric_cols"])
+        pre.categorical_cols = list(state["categorical_cols"])
+        pre.feature_names = list(state["feature_names"])
+        pre._state = state
+        pre.compile_plan()
+        return pre
+
+    def _restore_estimators(self) -> None:
+        import pandas as pd
+        from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+        state = self._state
+        if self.categorical_cols and self.encoder is None:
+            categories = [np.asarray(c, dtype=object) for c in state["categories"]]
+            try:
+                encoder = OneHotEncoder(categories=categories, handle_unknown="ignore", sparse_output=self.sparse)
+            except TypeError:
+                encoder = OneHotEncoder(categories=categories, handle_unknown="ignore", sparse=self.sparse)
+            # categories are given explicitly; fitting only validates the column layout
+            encoder.fit(pd.DataFrame([[c[0] for c in categories]], columns=self.categorical_cols))
+            self.encoder = encoder
+        if self.numeric_cols and self.scaler is None:
+            scaler = StandardScaler()
+            scaler.mean_ = np.array(state["mean"], dtype=np.float64)
+            scaler.scale_ = np.array(state["scale"], dtype=np.float64)
+            scaler.var_ = np.array(state["var"], dtype=np.float64)
+            scaler.n_samples_seen_ = int(state["n_samples_seen"])
+            scaler.n_features_in_ = len(self.numeric_cols)
+            scaler.feature_names_in_ = np.asarray(self.numeric_cols, dtype=object)
+            self.scaler = scaler
+
+    def compile_plan(self) -> FeaturePlan:
+        """Compile (and cache) the pandas-free FeaturePlan for this fitted preprocessor."""
+        state = self.get_state()
+        n_num = len(self.numeric_cols)
+
+        category_index: Dict[Tuple[str, str], int] = {}
+        offset = n_num
+        for col, cats in zip(self.categorical_cols, state["categories"]):
+            for k, cat in enumerate(cats):
+                category_index[(col, cat)] = offset + k
+            offset += len(cats)
+
+        absent = np.nan if self.sparse else 0.0
+        self._plan = FeaturePlan(self.numeric_cols, self.categorical_cols, state["mean"], state["scale"], category_index, offset, absent)
+        return self._plan
+
+    @property
+    def plan(self) -> FeaturePlan:
+        plan = getattr(self, "_plan", None)
+        return plan if plan is not None else self.compile_plan()
+
+    def transform(self, df: "pd.DataFrame", sparse: Optional[bool] = None) -> Any:
+        """Feature matrix for df: a CSR matrix for sparse preprocessors (unless sparse=False), else an array."""
+        sparse = self.sparse if sparse is None else sparse
+        if (self.numeric_cols and self.scaler is None) or (self.categorical_cols and self.encoder is None):
+            self._restore_estimators()
         df = df.copy()
         # Ensure same columns exist
         # Transform numeric
@@ -103,9 +506,16 @@ class FeaturePreprocessor:
 
         # Transform categorical
         if self.categorical_cols:
-            X_cat = self.encoder.transform(df[self.categorical_cols].fillna("__MISSING__"))
+            X_cat = self.encoder.transform(_categorical_frame(df, self.categorical_cols))
         else:
             X_cat = np.empty((len(df), 0))
 
+        if self.sparse:
+            import scipy.sparse as sp
+
+            X_num = csr_from_dense(X_num)
+            X_cat = sp.csr_matrix(X_cat)
+            X = sp.hstack([X_num, X_cat], format="csr")
+            return X if sparse else dense_from_csr(X)
         X = np.hstack([X_num, X_cat]) if X_cat.size or X_num.size else np.empty((len(df), 0))
-        return X
+        return csr_from_dense(X) if sparse else X
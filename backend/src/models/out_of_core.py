@@ -0,0 +1,220 @@
+"""Out-of-core training for CSVs too large to load at once (see train_and_save for the in-memory path).
+
+The file is only ever read `chunksize` rows at a time, with explicit dtypes: integer columns as int32 and
+text columns as pandas categoricals, so a chunk costs a fraction of what default object columns would.
+Every chunk goes through derive_features/prepare_xy on its own and is split into training and holdout
+rows by a mask drawn from an RNG seeded with (random_state, chunk index), so every pass over the file
+sees the same split.
+
+- Pass 1 fits the preprocessor with FeaturePreprocessor.fit_chunks (running mean/variance per numeric
+  column, category sets per categorical column) on the training rows.
+- Pass 2 feeds the transformed chunks to xgboost through a DataIter. With external_memory the
+  ExtMemQuantileDMatrix keeps the quantized pages in a cache directory on disk, so peak memory is
+  bounded by the chunk size rather than the file size; without it they are held in a QuantileDMatrix.
+
+Boosting early-stops on the holdout, and the model is cut to its best iteration before it is saved with
+save_artifacts, exactly like a model from train_and_save.
+"""
+import os
+import tempfile
+from typing import TYPE_CHECKING, Any, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from . import training
+from .credit_risk_model import prepare_xy, save_artifacts
+from .feature_engineering import FeaturePreprocessor, derive_features
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+DEFAULT_CHUNKSIZE = 100_000
+
+# german_credit.csv schema; columns missing from a file are ignored
+INTEGER_COLUMNS = ("duration", "credit_amount", "installment_commitment", "residence_since", "age", "existing_credits", "num_dependents")
+TEXT_COLUMNS = (
+    "checking_status",
+    "credit_history",
+    "purpose",
+    "savings_status",
+    "employment",
+    "personal_status",
+    "other_parties",
+    "property_magnitude",
+    "other_payment_plans",
+    "housing",
+    "job",
+    "own_telephone",
+    "foreign_worker",
+)
+DTYPES: Dict[str, str] = {
+    **{c: "int32" for c in INTEGER_COLUMNS},
+    **{c: "category" for c in TEXT_COLUMNS},
+    # prepare_xy maps text labels, not categoricals
+    "target": "str",
+}
+
+
+def read_chunks(path: str, chunksize: int = DEFAULT_CHUNKSIZE) -> Iterator["pd.DataFrame"]:
+    """Raw chunks of the CSV at path with the DTYPES of the columns it has."""
+    import pandas as pd
+
+    header = pd.read_csv(path, nrows=0).columns
+    dtypes = {c: t for c, t in DTYPES.items() if c in header}
+    with pd.read_csv(path, chunksize=chunksize, dtype=dtypes) as reader:
+        yield from reader
+
+
+def holdout_mask(n: int, chunk_index: int, holdout_fraction: float, random_state: int) -> np.ndarray:
+    rng = np.random.default_rng([random_state, chunk_index])
+    return rng.random(n) < holdout_fraction
+
+
+def feature_chunks(
+    path: str, chunksize: int = DEFAULT_CHUNKSIZE, holdout_fraction: float = 0.1, random_state: int = 42
+) -> Iterator[Tuple["pd.DataFrame", np.ndarray, np.ndarray]]:
+    """(features, 0/1 labels, holdout mask) per chunk of the CSV."""
+    for i, chunk in enumerate(read_chunks(path, chunksize)):
+        X, y = prepare_xy(derive_features(chunk))
+        yield X, np.asarray(y, dtype=np.float32), holdout_mask(len(X), i, holdout_fraction, random_state)
+
+
+def make_iterator(
+    path: str, pre: FeaturePreprocessor, holdout: bool, cache_prefix: Optional[str] = None, **chunk_kwargs
+):
+    """xgboost DataIter over the transformed training (or holdout) rows of the CSV at path.
+
+    cache_prefix makes it an external-memory iterator whose pages are cached under that prefix.
+    """
+    import xgboost as xgb
+
+    class ChunkIterator(xgb.DataIter):
+        def __init__(self):
+            self._chunks = None
+            # on_host=False: pages go to files under cache_prefix, not host memory
+            super().__init__(cache_prefix=cache_prefix, on_host=False)
+
+        def reset(self) -> None:
+            self._chunks = None
+
+        def next(self, input_data) -> bool:
+            if self._chunks is None:
+                self._chunks = feature_chunks(path, **chunk_kwargs)
+            for X, y, mask in self._chunks:
+                rows = mask if holdout else ~mask
+                if rows.any():
+                    input_data(data=pre.transform(X[rows]).astype(np.float32), label=y[rows])
+                    return True
+            return False
+
+    return ChunkIterator()
+
+
+def train_out_of_core(
+    data_path: str,
+    output_dir: str = "models",
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    holdout_fraction: float = 0.1,
+    params: Optional[Dict[str, Any]] = None,
+    max_rounds: int = training.DEFAULT_MAX_ROUNDS,
+    early_stopping_rounds: Optional[int] = training.DEFAULT_EARLY_STOPPING_ROUNDS,
+    random_state: int = 42,
+    n_jobs: Optional[int] = None,
+    external_memory: bool = True,
+    cache_dir: Optional[str] = None,
+    sparse: bool = False,
+) -> Dict[str, Any]:
+    """Train on the CSV at data_path chunk by chunk and write the artifacts to output_dir.
+
+    - chunksize: rows read (and transformed) at a time
+    - holdout_fraction: share of rows held out for early stopping and the reported metrics
+    - external_memory: page the quantized training data to disk (cache_dir, default a temp dir that is
+      removed afterwards) instead of holding it in memory
+    - sparse: feed the chunks to xgboost as CSR matrices (see FeaturePreprocessor)
+
+    Returns row counts, holdout metrics, the boosting rounds kept and per-stage wall times next to the
+    save_artifacts paths.
+    """
+    import xgboost as xgb
+
+    os.makedirs(output_dir, exist_ok=True)
+    timer = training.StageTimer()
+    chunk_kwargs = {"chunksize": chunksize, "holdout_fraction": holdout_fraction, "random_state": random_state}
+    counts = {"rows": 0, "holdout_rows": 0, "chunks": 0}
+
+    def training_rows() -> Iterator["pd.DataFrame"]:
+        for X, _, mask in feature_chunks(data_path, **chunk_kwargs):
+            counts["rows"] += len(X)
+            counts["holdout_rows"] += int(mask.sum())
+            counts["chunks"] += 1
+            yield X[~mask]
+
+    with timer.stage("fit_preprocessor_ms"):
+        pre = FeaturePreprocessor.fit_chunks(training_rows(), sparse=sparse)
+    if not counts["holdout_rows"] or counts["holdout_rows"] == counts["rows"]:
+        raise ValueError(f"holdout_fraction={holdout_fraction} left no training or no holdout rows in {counts['rows']} rows")
+
+    threads = training.resolve_jobs(n_jobs)
+    with tempfile.TemporaryDirectory(dir=cache_dir) as tmp:
+        with timer.stage("build_matrix_ms"):
+            if external_memory:
+                train_it = make_iterator(data_path, pre, False, os.path.join(tmp, "train"), **chunk_kwargs)
+                holdout_it = make_iterator(data_path, pre, True, os.path.join(tmp, "holdout"), **chunk_kwargs)
+                dtrain = xgb.ExtMemQuantileDMatrix(train_it, nthread=threads)
+                dholdout = xgb.ExtMemQuantileDMatrix(holdout_it, ref=dtrain, nthread=threads)
+            else:
+                dtrain = xgb.QuantileDMatrix(make_iterator(data_path, pre, False, **chunk_kwargs), nthread=threads)
+                dholdout = xgb.QuantileDMatrix(make_iterator(data_path, pre, True, **chunk_kwargs), ref=dtrain, nthread=threads)
+
+        with timer.stage("train_ms"):
+            history: Dict[str, Dict[str, list]] = {}
+            booster = xgb.train(
+                training.booster_params(params, random_state, threads),
+                dtrain,
+                num_boost_round=max_rounds,
+                evals=[(dholdout, "holdout")],
+                early_stopping_rounds=early_stopping_rounds,
+                evals_result=history,
+                verbose_eval=False,
+            )
+            best = int(booster.best_iteration) if early_stopping_rounds else max_rounds - 1
+            booster = booster[: best + 1]
+        del dtrain, dholdout
+
+    # precision/recall at 0.5 from confusion counts accumulated over the holdout chunks
+    with timer.stage("evaluate_ms"):
+        tp = fp = fn = 0
+        for X, y, mask in feature_chunks(data_path, **chunk_kwargs):
+            if not mask.any():
+                continue
+            pred = booster.predict(xgb.DMatrix(pre.transform(X[mask]).astype(np.float32), nthread=threads)) >= 0.5
+            actual = y[mask] == 1
+            tp += int(np.sum(pred & actual))
+            fp += int(np.sum(pred & ~actual))
+            fn += int(np.sum(~pred & actual))
+        holdout_metrics = {
+            "roc_auc": float(history["holdout"]["auc"][best]),
+            "logloss": float(history["holdout"]["logloss"][best]),
+            "precision": tp / (tp + fp) if tp + fp else 0.0,
+            "recall": tp / (tp + fn) if tp + fn else 0.0,
+        }
+
+    with timer.stage("save_ms"):
+        training_info = {
+            "params": params or {},
+            "sparse": sparse,
+            "n_estimators": best + 1,
+            "out_of_core": {"rows": counts["rows"], "chunksize": chunksize, "external_memory": external_memory},
+            "holdout_metrics": holdout_metrics,
+        }
+        saved = save_artifacts(output_dir, training.classifier_from_booster(booster), pre, training_info=training_info)
+
+    return {
+        **counts,
+        "train_rows": counts["rows"] - counts["holdout_rows"],
+        "rounds": best + 1,
+        "holdout_metrics": holdout_metrics,
+        "timings": timer.report(),
+        "params": params or {},
+        **saved,
+    }
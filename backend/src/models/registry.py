@@ -0,0 +1,475 @@
+"""Resident model versions and atomic hot swaps.
+
+A ModelBundle groups everything one model version needs to serve (model, preprocessor, feature names,
+optional compiled engine, its own SHAP explainer and micro-batcher), so a request that took a bundle
+keeps a consistent set even if the active version changes mid-request. The ModelRegistry keeps a few
+bundles resident, loads and warms new ones off the request path and swaps the active pointer under a
+lock that is only held for the assignment, so scoring threads are never blocked by a load.
+
+Versions are read from the base artifact directory (models/) and from models/versions/<version>/,
+each holding an artifact bundle (see artifacts.py) or the legacy joblib files.
+
+Registries survive fork(): the child drops the loader pool, in-flight loads, locks and batchers it
+inherited, since the threads behind them only exist in the parent.
+"""
+import json
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from loguru import logger
+
+from .feature_engineering import dense_from_csr, is_sparse
+
+VERSIONS_DIRNAME = "versions"
+
+
+class ModelVersionNotFound(KeyError):
+    """Requested model version is neither resident nor available on disk."""
+
+
+def rss_bytes() -> int:
+    """Resident set size of this process (0 when it cannot be read)."""
+    try:
+        with open("/proc/self/statm", "r") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+
+        # peak, not current, RSS; the best available without /proc (kilobytes on Linux, bytes on macOS)
+        return int(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss) * 1024
+    except Exception:
+        return 0
+
+
+def versions_dir(base_dir: str) -> str:
+    return os.path.join(base_dir, VERSIONS_DIRNAME)
+
+
+def available_versions(base_dir: str) -> List[str]:
+    """Version directories under models/versions that contain loadable artifacts."""
+    root = versions_dir(base_dir)
+    if not os.path.isdir(root):
+        return []
+    from . import artifacts
+
+    found = []
+    for name in sorted(os.listdir(root)):
+        path = os.path.join(root, name)
+        if os.path.exists(os.path.join(path, artifacts.MANIFEST)) or os.path.exists(os.path.join(path, "xgboost_model.pkl")):
+            found.append(name)
+    return found
+
+
+class ModelBundle:
+    """Everything needed to score and explain with one model version."""
+
+    def __init__(
+        self,
+        version: str,
+        preprocessor: Any,
+        feature_names: Optional[List[str]] = None,
+        model: Any = None,
+        engine: Any = None,
+        model_loader: Optional[Callable[[], Any]] = None,
+        source: Optional[str] = None,
+    ):
+        self.version = version
+        self.preprocessor = preprocessor
+        self.feature_names = feature_names or list(getattr(preprocessor, "feature_names", []) or []) or None
+        self.model = model
+        self.engine = engine
+        self.source = source
+        self.loaded_at = datetime.utcnow()
+        self.load_ms: Optional[float] = None
+        self.warmup_ms: Optional[float] = None
+        self.rss_delta_bytes: Optional[int] = None
+        # loads the booster when it was deferred (SCORING_ENGINE=numpy only needs it for explanations)
+        self._model_loader = model_loader
+        self._explainer = None
+        self._coalescer = None
+        self._lock = threading.Lock()
+
+    # ---- loading ----
+
+    @classmethod
+    def from_dir(cls, path: str, use_engine: bool = False, verify: bool = False) -> "ModelBundle":
+        """Load the artifacts in `path`: the artifact bundle when present, else the legacy joblib files.
+
+        verify: check the bundle's files against the manifest checksums first (ValueError on a mismatch)
+        """
+        from . import artifacts
+
+        start = time.perf_counter()
+        rss_before = rss_bytes()
+        manifest = artifacts.read_manifest(artifacts.bundle_dir(path)) or artifacts.read_manifest(path)
+        if manifest is not None:
+            bundle = cls._from_artifact_bundle(path, manifest, use_engine, verify)
+        else:
+            bundle = cls._from_pickles(path, use_engine)
+        bundle.load_ms = (time.perf_counter() - start) * 1000.0
+        bundle.rss_delta_bytes = rss_bytes() - rss_before
+        return bundle
+
+    @classmethod
+    def _from_artifact_bundle(cls, path: str, manifest: Dict[str, Any], use_engine: bool, verify: bool = False) -> "ModelBundle":
+        from . import artifacts
+
+        bundle_path = path if os.path.exists(os.path.join(path, artifacts.MANIFEST)) else artifacts.bundle_dir(path)
+        if verify:
+            artifacts.verify_bundle(bundle_path)
+        preprocessor = artifacts.load_preprocessor(bundle_path)
+        engine = None
+        if use_engine:
+            try:
+                engine = artifacts.load_engine(bundle_path)
+            except Exception as e:
+                logger.warning("Compiled tree engine unavailable, using xgboost for scoring: {}", e)
+        loader = lambda: artifacts.load_model(bundle_path)  # noqa: E731
+        # the booster is only needed up front when it does the scoring; otherwise on the first explanation
+        model = loader() if engine is None else None
+        return cls(
+            version=manifest.get("version") or os.path.basename(os.path.normpath(path)),
+            preprocessor=preprocessor,
+            feature_names=manifest.get("feature_names"),
+            model=model,
+            engine=engine,
+            model_loader=loader,
+            source=path,
+        )
+
+    @classmethod
+    def _from_pickles(cls, path: str, use_engine: bool) -> "ModelBundle":
+        import joblib
+
+        model_path = os.path.join(path, "xgboost_model.pkl")
+        preproc_path = os.path.join(path, "preprocessor.pkl")
+        feature_names_path = os.path.join(path, "feature_names.json")
+        engine_path = os.path.join(path, "tree_ensemble.npz")
+        loader = lambda: joblib.load(model_path) if os.path.exists(model_path) else None  # noqa: E731
+
+        engine = None
+        if use_engine and os.path.exists(engine_path):
+            from .tree_engine import CompiledTreeEnsemble
+
+            try:
+                engine = CompiledTreeEnsemble.load(engine_path)
+            except Exception as e:
+                logger.warning("Compiled tree engine unavailable, using xgboost for scoring: {}", e)
+        # With a precompiled NumPy engine the xgboost model is only needed for explanations; defer it
+        model = loader() if engine is None else None
+        if use_engine and engine is None and model is not None:
+            from .tree_engine import CompiledTreeEnsemble
+
+            try:
+                engine = CompiledTreeEnsemble.from_model(model)
+            except Exception as e:
+                logger.warning("Compiled tree engine unavailable, using xgboost for scoring: {}", e)
+
+        preprocessor = joblib.load(preproc_path) if os.path.exists(preproc_path) else None
+        # compile the pandas-free feature plan once, up front
+        if preprocessor is not None and hasattr(preprocessor, "compile_plan"):
+            preprocessor.compile_plan()
+        feature_names = None
+        if os.path.exists(feature_names_path):
+            with open(feature_names_path, "r") as fh:
+                feature_names = json.load(fh)
+
+        # model_version: explicit version file, otherwise derived from the model file mtime
+        version = None
+        version_path = os.path.join(path, "model_version.json")
+        if os.path.exists(version_path):
+            with open(version_path, "r") as fh:
+                version = json.load(fh).get("version")
+        elif os.path.exists(model_path):
+            version = f"xgboost-{int(os.path.getmtime(model_path))}"
+        elif model is not None:
+            version = getattr(model, "version", model.__class__.__name__)
+        return cls(
+            version=version or "unknown",
+            preprocessor=preprocessor,
+            feature_names=feature_names,
+            model=model,
+            engine=engine,
+            model_loader=loader,
+            source=path,
+        )
+
+    # ---- scoring ----
+
+    def get_model(self) -> Any:
+        if self.model is None and self._model_loader is not None:
+            with self._lock:
+                if self.model is None:
+                    self.model = self._model_loader()
+        return self.model
+
+    def predict_proba(self, X_matrix: Any) -> np.ndarray:
+        """Probability of default (class 1) for every row of a preprocessed matrix, in one call."""
+        scorer = self.engine if self.engine is not None else self.get_model()
+        if scorer is None:
+            raise RuntimeError("Model artifact not loaded")
+        if is_sparse(X_matrix):
+            if X_matrix.shape[0] == 0:
+                return np.empty(0)
+            # xgboost takes CSR as is; the NumPy engine needs dense rows with NaN for unstored entries
+            return scorer.predict_proba(dense_from_csr(X_matrix) if scorer is self.engine else X_matrix.tocsr())[:, 1]
+        arr = np.asarray(X_matrix)
+        if arr.ndim == 1:
+            arr = arr.reshape(1, -1)
+        if arr.shape[0] == 0:
+            return np.empty(0)
+        return scorer.predict_proba(arr)[:, 1]
+
+    @property
+    def explainer(self) -> Any:
+        """This version's SHAP explainer, created on first use."""
+        if self._explainer is None:
+            from . import shap_explainer
+
+            model = self.get_model()
+            if model is None:
+                raise RuntimeError("Model artifact not loaded")
+            with self._lock:
+                if self._explainer is None:
+                    self._explainer = shap_explainer.create_explainer(model)
+        return self._explainer
+
+    def shap_values(self, X_matrix: Any) -> np.ndarray:
+        from . import shap_explainer
+
+        return shap_explainer.explain_vector(X_matrix if is_sparse(X_matrix) else np.asarray(X_matrix), explainer=self.explainer)
+
+    def get_coalescer(self, window_ms: float, max_batch: int, batch_shap: bool) -> Any:
+        """This version's PredictionCoalescer (vectors from different versions never share a batch)."""
+        if self._coalescer is None:
+            with self._lock:
+                if self._coalescer is None:
+                    from .coalescer import PredictionCoalescer
+
+                    self._coalescer = PredictionCoalescer(
+                        self.predict_proba,
+                        explain_fn=self.shap_values if batch_shap else None,
+                        window_ms=window_ms,
+                        max_batch=max_batch,
+                    )
+        return self._coalescer
+
+    @property
+    def coalescer(self) -> Any:
+        return self._coalescer
+
+    def warm_up(self, payload: Optional[dict] = None, explain: bool = True) -> Dict[str, float]:
+        """One prediction (and explanation) so the first real request after a swap pays no lazy-init cost."""
+        from ..utils.schema_adapter import build_feature_vector_from_payload
+
+        timings = {}
+        start = time.perf_counter()
+        X_vector = build_feature_vector_from_payload(payload if payload is not None else {}, self.preprocessor)
+        self.predict_proba(X_vector)
+        timings["predict_ms"] = (time.perf_counter() - start) * 1000.0
+        if explain:
+            start = time.perf_counter()
+            self.shap_values(X_vector)
+            timings["explain_ms"] = (time.perf_counter() - start) * 1000.0
+        self.warmup_ms = sum(timings.values())
+        return timings
+
+    def close(self) -> None:
+        with self._lock:
+            coalescer, self._coalescer = self._coalescer, None
+        if coalescer is not None:
+            coalescer.close()
+
+    def _reset_after_fork(self) -> None:
+        self._lock = threading.Lock()
+        # its batching thread stayed in the parent; the next request builds a new one
+        self._coalescer = None
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "source": self.source,
+            "loaded_at": self.loaded_at.isoformat(),
+            "load_ms": self.load_ms,
+            "warmup_ms": self.warmup_ms,
+            "rss_delta_bytes": self.rss_delta_bytes,
+            "engine": "numpy" if self.engine is not None else "xgboost",
+            "model_loaded": self.model is not None,
+            "explainer_ready": self._explainer is not None,
+            "n_features": len(self.feature_names) if self.feature_names else None,
+        }
+
+
+class ModelRegistry:
+    """Resident ModelBundles by version plus the active one.
+
+    - max_resident: bundles kept in memory; the least recently activated/loaded inactive one is
+      dropped when a new version is registered
+    - on_swap: optional callback(bundle) run after the active version changes
+    """
+
+    def __init__(self, max_resident: int = 3, on_swap: Optional[Callable[["ModelBundle"], None]] = None):
+        self.max_resident = max(1, int(max_resident))
+        self.on_swap = on_swap
+        self._bundles: "OrderedDict[str, ModelBundle]" = OrderedDict()
+        self._active: Optional[ModelBundle] = None
+        # guards the dict and the active pointer only; loading and warm-up happen outside it
+        self._lock = threading.Lock()
+        self._loader: Optional[ThreadPoolExecutor] = None
+        self._loading: Dict[str, Future] = {}
+        self.last_swap: Optional[Dict[str, Any]] = None
+        self.swaps = 0
+        _REGISTRIES.add(self)
+
+    def _reset_after_fork(self) -> None:
+        self._lock = threading.Lock()
+        self._loader = None
+        self._loading = {}
+        for bundle in self._bundles.values():
+            bundle._reset_after_fork()
+
+    @property
+    def active(self) -> Optional[ModelBundle]:
+        return self._active
+
+    def get(self, version: Optional[str] = None) -> ModelBundle:
+        """The bundle for `version` (the active one when None). Raises ModelVersionNotFound."""
+        if version is None:
+            bundle = self._active
+            if bundle is None:
+                raise ModelVersionNotFound("no active model")
+            return bundle
+        bundle = self._bundles.get(version)
+        if bundle is None:
+            raise ModelVersionNotFound(version)
+        return bundle
+
+    def versions(self) -> List[str]:
+        return list(self._bundles)
+
+    def register(self, bundle: ModelBundle, activate: bool = True) -> Optional[ModelBundle]:
+        """Make a loaded bundle resident (and active); returns the bundle it replaced as active, if any."""
+        start = time.perf_counter()
+        evicted = []
+        with self._lock:
+            replaced_same_version = self._bundles.get(bundle.version)
+            self._bundles[bundle.version] = bundle
+            self._bundles.move_to_end(bundle.version)
+            previous = self._active
+            if activate or previous is None:
+                self._active = bundle
+            while len(self._bundles) > self.max_resident:
+                victim = next((v for v in self._bundles if self._bundles[v] is not self._active), None)
+                if victim is None:
+                    break
+                evicted.append(self._bundles.pop(victim))
+            swapped = self._active is bundle and previous is not bundle
+            if swapped:
+                self.swaps += 1
+                self.last_swap = {
+                    "version": bundle.version,
+                    "previous_version": previous.version if previous is not None else None,
+                    "swapped_at": datetime.utcnow().isoformat(),
+                    "load_ms": bundle.load_ms,
+                    "warmup_ms": bundle.warmup_ms,
+                    "swap_ms": (time.perf_counter() - start) * 1000.0,
+                    "rss_delta_bytes": bundle.rss_delta_bytes,
+                    "rss_bytes": rss_bytes(),
+                }
+        if replaced_same_version is not None and replaced_same_version is not bundle:
+            evicted.append(replaced_same_version)
+        # in-flight requests holding an evicted bundle keep working; only its batcher thread stops
+        for old in evicted:
+            if old is not self._active:
+                old.close()
+        if swapped and self.on_swap is not None:
+            self.on_swap(bundle)
+        return previous if swapped else None
+
+    def load(self, path: str, activate: bool = True, use_engine: bool = False, warm_up: bool = True, verify: bool = False) -> ModelBundle:
+        """Load a version from disk, warm it up and register it (blocking the caller, not scoring threads)."""
+        bundle = ModelBundle.from_dir(path, use_engine=use_engine, verify=verify)
+        if warm_up:
+            bundle.warm_up()
+        self.register(bundle, activate=activate)
+        return bundle
+
+    def load_async(self, path: str, activate: bool = True, use_engine: bool = False, warm_up: bool = True, verify: bool = False) -> Future:
+        """Same as load() on a single background loader thread; concurrent requests for one path share a future."""
+        with self._lock:
+            future = self._loading.get(path)
+            if future is not None and not future.done():
+                return future
+            if self._loader is None:
+                self._loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-loader")
+            future = self._loader.submit(self.load, path, activate, use_engine, warm_up, verify)
+            self._loading[path] = future
+        return future
+
+    def activate(self, version: str) -> ModelBundle:
+        bundle = self.get(version)
+        self.register(bundle, activate=True)
+        return bundle
+
+    def unload(self, version: str) -> None:
+        """Drop a resident, inactive version."""
+        with self._lock:
+            bundle = self._bundles.get(version)
+            if bundle is None:
+                raise ModelVersionNotFound(version)
+            if bundle is self._active:
+                raise ValueError("Cannot unload the active model version")
+            del self._bundles[version]
+        bundle.close()
+
+    def clear(self) -> None:
+        with self._lock:
+            bundles = list(self._bundles.values())
+            self._bundles.clear()
+            self._active = None
+        for bundle in bundles:
+            bundle.close()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            loader, self._loader = self._loader, None
+        if loader is not None:
+            loader.shutdown(wait=False)
+        for bundle in list(self._bundles.values()):
+            bundle.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            bundles = list(self._bundles.values())
+            active = self._active
+            loading = [p for p, f in self._loading.items() if not f.done()]
+        return {
+            "active_version": active.version if active is not None else None,
+            "resident": [b.info() for b in bundles],
+            "max_resident": self.max_resident,
+            "loading": loading,
+            "swaps": self.swaps,
+            "last_swap": self.last_swap,
+            "rss_bytes": rss_bytes(),
+        }
+
+
+_REGISTRIES: "weakref.WeakSet[ModelRegistry]" = weakref.WeakSet()
+
+
+def _after_fork_in_child() -> None:
+    for registry in list(_REGISTRIES):
+        registry._reset_after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -1,15 +1,68 @@
+import os
 from typing import Any, List, Dict, Optional
 import numpy as np
-import shap
+
+from .feature_engineering import dense_from_csr, is_sparse
 
 # Cached explainer to avoid reinitialization per request
-_EXPLAINER: Optional[shap.Explainer] = None
+_EXPLAINER: Any = None
 _MODEL_REF: Any = None
 _FEATURE_NAMES: Optional[List[str]] = None
 
 
+class NativeTreeExplainer:
+    """Exact TreeSHAP contributions from XGBoost's own pred_contribs output, without importing shap.
+
+    Exposes the same shap_values(X) interface as shap.TreeExplainer (path-dependent, no background data),
+    returning an (n_rows, n_features) array with the bias column dropped.
+    """
+
+    def __init__(self, model: Any):
+        self.booster = model.get_booster() if hasattr(model, "get_booster") else model
+        best_iteration = self.booster.attr("best_iteration")
+        # (0, 0) means all trees; match predict_proba when the model was trained with early stopping
+        self.iteration_range = (0, int(best_iteration) + 1) if best_iteration is not None else (0, 0)
+
+    def shap_values(self, X: Any) -> np.ndarray:
+        import xgboost as xgb
+
+        contribs = self.booster.predict(xgb.DMatrix(X), pred_contribs=True, iteration_range=self.iteration_range)
+        return contribs[:, :-1]
+
+
+def create_explainer(model: Any, background_data: Optional[np.ndarray] = None):
+    """Build a SHAP explainer for a trained model without touching the module-level cache.
+
+    XGBoost models use NativeTreeExplainer unless SHAP_BACKEND=shap or background data is given; the
+    shap package is only imported for the fallback explainers.
+    """
+    if model is None:
+        raise ValueError("model must be provided to create_explainer")
+
+    explainer = None
+    if os.getenv("SHAP_BACKEND", "native").lower() == "native" and background_data is None and hasattr(model, "get_booster"):
+        try:
+            explainer = NativeTreeExplainer(model)
+        except Exception:
+            explainer = None
+
+    if explainer is None:
+        import shap
+
+        # Prefer TreeExplainer for tree models (fast)
+        try:
+            if background_data is not None:
+                explainer = shap.TreeExplainer(model, data=background_data)
+            else:
+                explainer = shap.TreeExplainer(model)
+        except Exception:
+            # Fallback to general Explainer
+            explainer = shap.Explainer(model, background_data)
+    return explainer
+
+
 def init_explainer(model: Any, background_data: Optional[np.ndarray] = None, feature_names: Optional[List[str]] = None):
-    """Initialize and cache a SHAP explainer for a trained model.
+    """Initialize and cache a SHAP explainer for a trained model (see create_explainer).
 
     Params:
     - model: trained model (XGBoost or similar)
@@ -22,38 +75,37 @@ def init_explainer(model: Any, background_data: Optional[np.ndarray] = None, fea
     if _MODEL_REF is model and _EXPLAINER is not None:
         return _EXPLAINER
 
-    # Prefer TreeExplainer for tree models (fast)
-    try:
-        if background_data is not None:
-            _EXPLAINER = shap.TreeExplainer(model, data=background_data)
-        else:
-            _EXPLAINER = shap.TreeExplainer(model)
-    except Exception:
-        # Fallback to general Explainer
-        _EXPLAINER = shap.Explainer(model, background_data)
-
+    _EXPLAINER = create_explainer(model, background_data)
     _MODEL_REF = model
     _FEATURE_NAMES = feature_names
     return _EXPLAINER
 
 
-def explain_vector(X_vector: np.ndarray) -> np.ndarray:
-    """Return raw SHAP values for the provided preprocessed vector (1D or 2D numpy array)."""
-    if _EXPLAINER is None:
+def explain_vector(X_vector: np.ndarray, explainer: Any = None) -> np.ndarray:
+    """Return raw SHAP values for the provided preprocessed vector (1D) or matrix (2D), one row per input row.
+
+    Uses `explainer` when given, else the one cached by init_explainer.
+    """
+    explainer = explainer if explainer is not None else _EXPLAINER
+    if explainer is None:
         raise RuntimeError("SHAP explainer not initialized")
     arr = X_vector
-    if arr.ndim == 1:
+    if is_sparse(arr):
+        # pred_contribs takes CSR directly; the shap package explainers get NaN-filled dense rows
+        if not isinstance(explainer, NativeTreeExplainer):
+            arr = dense_from_csr(arr)
+    elif arr.ndim == 1:
         arr = arr.reshape(1, -1)
 
     # Support older and newer SHAP APIs
     try:
-        vals = _EXPLAINER.shap_values(arr)
+        vals = explainer.shap_values(arr)
         # shap_values may return list (multiclass) or array
         if isinstance(vals, list):
             # choose the explanation for positive class (if present)
             vals = vals[1] if len(vals) > 1 else vals[0]
     except Exception:
-        exp = _EXPLAINER(arr)
+        exp = explainer(arr)
         # exp.values may be (n_samples, n_features) or (n_samples, n_classes, n_features)
         vals = exp.values
         if vals.ndim == 3:
@@ -63,6 +115,61 @@ def explain_vector(X_vector: np.ndarray) -> np.ndarray:
     return np.array(vals)
 
 
+def _resolve_names(preprocessor, n: int, feature_names: Optional[List[str]] = None) -> List[str]:
+    names = feature_names if feature_names is not None else _FEATURE_NAMES
+    if names is None:
+        names = getattr(preprocessor, "feature_names", None)
+    if names is None:
+        # fallback to generic indices
+        names = [f"f{i}" for i in range(n)]
+    return list(names)
+
+
+def top_k_contributions(values: np.ndarray, names: List[str], top_k: Optional[int] = None) -> List[List[Dict[str, float]]]:
+    """Vectorized top-k selection over a 2D array of SHAP values.
+
+    Uses argpartition to pick the k largest |impact| per row, then orders only those k. Returns one list of
+    {feature, impact} per row, sorted by absolute impact descending (ties keep feature order).
+    """
+    values = np.asarray(values)
+    n = min(len(names), values.shape[1])
+    values = values[:, :n]
+    magnitude = np.abs(values)
+    if top_k is not None and top_k < n:
+        if top_k <= 0:
+            return [[] for _ in range(values.shape[0])]
+        idx = np.sort(np.argpartition(-magnitude, top_k - 1, axis=1)[:, :top_k], axis=1)
+    else:
+        idx = np.broadcast_to(np.arange(n), values.shape)
+    order = np.argsort(-np.take_along_axis(magnitude, idx, axis=1), axis=1, kind="stable")
+    idx = np.take_along_axis(idx, order, axis=1)
+    picked = np.take_along_axis(values, idx, axis=1)
+    return [
+        [{"feature": names[j], "impact": float(v)} for j, v in zip(row_idx.tolist(), row_vals.tolist())]
+        for row_idx, row_vals in zip(idx, picked)
+    ]
+
+
+def explanation_from_row(
+    row: np.ndarray, preprocessor=None, top_k: Optional[int] = None, feature_names: Optional[List[str]] = None
+) -> List[Dict[str, float]]:
+    """Turn one row of SHAP values into a list of {feature, impact} sorted by absolute impact descending."""
+    row = np.asarray(row).reshape(1, -1)
+    return top_k_contributions(row, _resolve_names(preprocessor, row.shape[1], feature_names), top_k)[0]
+
+
+def explain_matrix(
+    X_matrix: np.ndarray,
+    preprocessor=None,
+    top_k: Optional[int] = None,
+    explainer: Any = None,
+    feature_names: Optional[List[str]] = None,
+) -> List[List[Dict[str, float]]]:
+    """Explain every row of a preprocessed matrix with a single explainer call."""
+    vals = explain_vector(X_matrix, explainer=explainer)
+    return top_k_contributions(vals, _resolve_names(preprocessor, vals.shape[1], feature_names), top_k)
+
+
 def explain_payload(payload: dict, preprocessor, top_k: Optional[int] = None) -> List[Dict[str, float]]:
     """Explain a single frontend payload.
 
@@ -73,21 +180,4 @@ def explain_payload(payload: dict, preprocessor, top_k: Optional[int] = None) ->
 
     X_vector = build_feature_vector_from_payload(payload, preprocessor)
     shap_vals = explain_vector(X_vector)  # shape (1, n_features)
-    row = shap_vals[0]
-
-    names = _FEATURE_NAMES if _FEATURE_NAMES is not None else getattr(preprocessor, "feature_names", None)
-    if names is None:
-        # fallback to generic indices
-        names = [f"f{i}" for i in range(len(row))]
-
-    feats = [
-        {"feature": names[i], "impact": float(row[i])}
-        for i in range(min(len(names), len(row)))
-    ]
-
-    # sort by absolute impact
-    feats = sorted(feats, key=lambda x: abs(x["impact"]), reverse=True)
-    if top_k is not None:
-        feats = feats[:top_k]
-    return feats
-
+    return explanation_from_row(shap_vals[0], preprocessor, top_k=top_k)
@@ -0,0 +1,113 @@
+"""Synthetic credit data in the german_credit.csv schema, at any size, for exercising the training pipelines.
+
+Column distributions are taken from the reference CSV: category frequencies for text columns and the
+empirical values (with a little jitter for the continuous ones) for numeric columns. Labels follow a
+logistic model built from the reference's per-category bad rates and numeric effects, so the data has
+a learnable signal with a similar bad rate. Rows are produced chunk by chunk and never held in memory
+all at once.
+
+`wide_columns` adds that many high-cardinality text columns (segment_0, segment_1, ...) with
+`cardinality` categories each, drawn from a Zipf-like distribution and carrying small label effects, to
+produce the wide, mostly-zero one-hot matrices sparse mode is meant for.
+"""
+import os
+from typing import Any, Dict, Iterator
+
+import numpy as np
+
+REFERENCE_PATH = "data/raw/german_credit.csv"
+# numeric columns whose sampled values get jitter (the others are small integer codes)
+_CONTINUOUS = ("credit_amount", "duration", "age")
+
+
+class SyntheticCreditData:
+    """Sampler fitted to a reference dataset (german_credit.csv by default)."""
+
+    def __init__(self, reference_path: str = REFERENCE_PATH, signal: float = 0.8, wide_columns: int = 0, cardinality: int = 1000):
+        import pandas as pd
+
+        from .credit_risk_model import prepare_xy
+
+        X, y = prepare_xy(pd.read_csv(reference_path))
+        y = np.asarray(y, dtype=np.float64)
+        self.columns = list(X.columns)
+        self.target_labels = ("good", "bad")
+        base_rate = y.mean()
+        base_logit = np.log(base_rate / (1 - base_rate))
+        self.categorical: Dict[str, Dict[str, Any]] = {}
+        self.numeric: Dict[str, Dict[str, Any]] = {}
+        for c in self.columns:
+            col = X[c]
+            if col.dtype.kind in "iuf":
+                values = col.to_numpy(dtype=np.float64)
+                std = values.std() or 1.0
+                # standardized difference of the bad and good means as a logit slope
+                slope = (values[y == 1].mean() - values[y == 0].mean()) / std
+                self.numeric[c] = {"values": np.sort(values), "mean": values.mean(), "std": std, "slope": slope, "integer": col.dtype.kind in "iu"}
+            else:
+                counts = col.astype(str).value_counts()
+                cats = counts.index.to_numpy(dtype=object)
+                # smoothed log-odds of a bad outcome per category, relative to the overall rate
+                bad = np.array([y[(col.astype(str) == cat).to_numpy()].sum() for cat in cats])
+                rate = (bad + base_rate * 10) / (counts.to_numpy() + 10)
+                self.categorical[c] = {"categories": cats, "p": counts.to_numpy() / counts.sum(), "effect": np.log(rate / (1 - rate)) - base_logit}
+        effects = np.random.default_rng(len(self.columns))
+        for k in range(wide_columns):
+            c = f"segment_{k}"
+            p = 1.0 / np.arange(1, cardinality + 1) ** 1.1
+            self.categorical[c] = {
+                "categories": np.array([f"s{k}_{j}" for j in range(cardinality)], dtype=object),
+                "p": p / p.sum(),
+                "effect": effects.normal(0.0, 0.3, size=cardinality),
+            }
+            self.columns.append(c)
+        self.signal = signal
+        self.intercept = base_logit
+
+    def sample(self, n: int, rng: np.random.Generator) -> "Any":
+        """DataFrame of n rows with a "target" column of good/bad labels."""
+        import pandas as pd
+
+        data: Dict[str, Any] = {}
+        logit = np.full(n, self.intercept)
+        for c in self.columns:
+            if c in self.numeric:
+                spec = self.numeric[c]
+                values = rng.choice(spec["values"], size=n)
+                if c in _CONTINUOUS:
+                    values = np.clip(values * rng.normal(1.0, 0.05, size=n), spec["values"][0], spec["values"][-1])
+                    if spec["integer"]:
+                        values = np.rint(values)
+                data[c] = values.astype(np.int64) if spec["integer"] else values
+                logit += self.signal * spec["slope"] * (values - spec["mean"]) / spec["std"]
+            else:
+                spec = self.categorical[c]
+                idx = rng.choice(len(spec["categories"]), size=n, p=spec["p"])
+                data[c] = spec["categories"][idx]
+                logit += self.signal * spec["effect"][idx]
+        bad = rng.random(n) < 1.0 / (1.0 + np.exp(-logit))
+        data["target"] = np.where(bad, self.target_labels[1], self.target_labels[0])
+        return pd.DataFrame(data)
+
+    def chunks(self, n_rows: int, chunk_size: int = 100_000, seed: int = 0) -> Iterator["Any"]:
+        rng = np.random.default_rng(seed)
+        for start in range(0, n_rows, chunk_size):
+            yield self.sample(min(chunk_size, n_rows - start), rng)
+
+
+def write_csv(
+    path: str,
+    n_rows: int,
+    chunk_size: int = 100_000,
+    seed: int = 0,
+    reference_path: str = REFERENCE_PATH,
+    wide_columns: int = 0,
+    cardinality: int = 1000,
+) -> int:
+    """Write n_rows synthetic rows to path chunk by chunk; returns the file size in bytes."""
+    generator = SyntheticCreditData(reference_path, wide_columns=wide_columns, cardinality=cardinality)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", newline="") as fh:
+        for i, chunk in enumerate(generator.chunks(n_rows, chunk_size, seed)):
+            chunk.to_csv(fh, header=i == 0, index=False)
+    return os.path.getsize(path)
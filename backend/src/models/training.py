@@ -0,0 +1,199 @@
+"""Cross-validation and stage timing for train_and_save.
+
+Folds are independent, so in parallel mode they run in a process pool: the cores are split between
+concurrent folds and XGBoost threads per fold (e.g. 8 cores, 5 folds -> 5 workers x 1 thread, 2 folds
+-> 2 workers x 4 threads), instead of one fold at a time leaving most cores idle. Each fold trains up
+to `max_rounds` boosting rounds and early-stops on its own validation split; the fold's best round
+count is reported and their median sizes the final model.
+
+Workers are started with the "spawn" method: forking a process whose OpenMP runtime (xgboost) already
+has threads can deadlock.
+"""
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_MAX_ROUNDS = 1000
+DEFAULT_EARLY_STOPPING_ROUNDS = 50
+
+
+class StageTimer:
+    """Wall time per named stage, in milliseconds and in the order the stages ran."""
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + (time.perf_counter() - start) * 1000.0
+
+    def report(self) -> Dict[str, float]:
+        return {**self.timings, "total_ms": (time.perf_counter() - self._started) * 1000.0}
+
+
+def resolve_jobs(n_jobs: Optional[int]) -> int:
+    """Cores to use: n_jobs <= 0 or None means all of them."""
+    cores = os.cpu_count() or 1
+    if n_jobs is None or n_jobs <= 0:
+        return cores
+    return min(int(n_jobs), cores)
+
+
+def split_cores(n_jobs: int, n_tasks: int, workers: Optional[int] = None) -> Tuple[int, int]:
+    """(concurrent workers, xgboost threads per worker) sharing n_jobs cores between n_tasks tasks.
+
+    `workers` caps the concurrent tasks (None or <= 0: as many as the cores allow).
+    """
+    limit = n_jobs if workers is None or workers <= 0 else min(int(workers), n_jobs)
+    workers = max(1, min(limit, n_tasks))
+    return workers, max(1, n_jobs // workers)
+
+
+def make_classifier(params: Optional[Dict[str, Any]] = None, random_state: int = 42, n_jobs: int = 1, **kwargs):
+    import xgboost as xgb
+
+    return xgb.XGBClassifier(eval_metric="logloss", random_state=random_state, n_jobs=n_jobs, **{**(params or {}), **kwargs})
+
+
+def booster_params(params: Optional[Dict[str, Any]] = None, random_state: int = 42, threads: int = 1) -> Dict[str, Any]:
+    """xgb.train parameters equivalent to make_classifier(params) (n_estimators is a train() argument)."""
+    return {
+        "objective": "binary:logistic",
+        "eval_metric": ["logloss", "auc"],
+        "tree_method": "hist",
+        "seed": random_state,
+        "nthread": threads,
+        **{k: v for k, v in (params or {}).items() if k != "n_estimators"},
+    }
+
+
+def classifier_from_booster(booster):
+    """XGBClassifier around a Booster trained with xgb.train, so it can be saved and served like the others."""
+    import xgboost as xgb
+
+    clf = xgb.XGBClassifier()
+    clf.load_model(bytearray(booster.save_raw("ubj")))
+    return clf
+
+
+def fit_fold(
+    fold: int,
+    X_tr,
+    y_tr,
+    X_val,
+    y_val,
+    params: Optional[Dict[str, Any]] = None,
+    random_state: int = 42,
+    threads: int = 1,
+    max_rounds: int = DEFAULT_MAX_ROUNDS,
+    early_stopping_rounds: Optional[int] = DEFAULT_EARLY_STOPPING_ROUNDS,
+) -> Dict[str, Any]:
+    """Train one fold (early-stopping on its validation split) and score it; runs in a pool worker."""
+    from sklearn.metrics import precision_score, recall_score, roc_auc_score
+
+    start = time.perf_counter()
+    if early_stopping_rounds:
+        clf = make_classifier(params, random_state, threads, n_estimators=max_rounds, early_stopping_rounds=early_stopping_rounds)
+        clf.fit(X_tr, y_tr, eval_set=[(X_val, y_val)], verbose=False)
+        rounds = int(clf.best_iteration) + 1
+    else:
+        clf = make_classifier(params, random_state, threads)
+        clf.fit(X_tr, y_tr)
+        rounds = int(clf.get_params()["n_estimators"] or 100)
+    fit_ms = (time.perf_counter() - start) * 1000.0
+
+    # predictions use the best iteration when early stopping kicked in
+    y_score = clf.predict_proba(X_val)[:, 1]
+    y_pred = (y_score >= 0.5).astype(int)
+    return {
+        "fold": fold,
+        "roc_auc": float(roc_auc_score(y_val, y_score)),
+        "precision": float(precision_score(y_val, y_pred, zero_division=0)),
+        "recall": float(recall_score(y_val, y_pred, zero_division=0)),
+        "rounds": rounds,
+        "fit_ms": fit_ms,
+        "score_ms": (time.perf_counter() - start) * 1000.0 - fit_ms,
+        "pid": os.getpid(),
+    }
+
+
+def _fit_fold_task(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    return fit_fold(**kwargs)
+
+
+def cross_validate(
+    X,
+    y,
+    n_splits: int = 5,
+    random_state: int = 42,
+    n_jobs: Optional[int] = None,
+    workers: Optional[int] = 1,
+    params: Optional[Dict[str, Any]] = None,
+    max_rounds: int = DEFAULT_MAX_ROUNDS,
+    early_stopping_rounds: Optional[int] = DEFAULT_EARLY_STOPPING_ROUNDS,
+) -> Dict[str, Any]:
+    """Stratified k-fold CV of an XGBClassifier on n_jobs cores (None: all).
+
+    workers > 1 (or None: as many as the cores allow) runs that many folds at once in a process pool;
+    with 1 the folds run one after another in this process, each using all n_jobs threads.
+
+    Returns the fold means/stds, per-fold results (metrics, rounds, fit time) and the core split used.
+    """
+    from sklearn.model_selection import StratifiedKFold
+
+    y = np.asarray(y)
+    jobs = resolve_jobs(n_jobs)
+    workers, threads = split_cores(jobs, n_splits, workers)
+    skf = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+    tasks = [
+        {
+            "fold": fold,
+            "X_tr": X[train_idx],
+            "y_tr": y[train_idx],
+            "X_val": X[val_idx],
+            "y_val": y[val_idx],
+            "params": params,
+            "random_state": random_state,
+            "threads": threads,
+            "max_rounds": max_rounds,
+            "early_stopping_rounds": early_stopping_rounds,
+        }
+        for fold, (train_idx, val_idx) in enumerate(skf.split(X, y))
+    ]
+
+    start = time.perf_counter()
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            folds: List[Dict[str, Any]] = list(pool.map(_fit_fold_task, tasks))
+    else:
+        folds = [fit_fold(**task) for task in tasks]
+    wall_ms = (time.perf_counter() - start) * 1000.0
+
+    results: Dict[str, Any] = {}
+    for metric in ("roc_auc", "precision", "recall"):
+        values = [f[metric] for f in folds]
+        results[f"{metric}_mean"] = float(np.mean(values))
+        results[f"{metric}_std"] = float(np.std(values))
+    rounds = [f["rounds"] for f in folds]
+    results.update(
+        {
+            "rounds_median": int(np.median(rounds)),
+            "folds": folds,
+            "workers": workers,
+            "threads_per_fold": threads,
+            "wall_ms": wall_ms,
+            # sum of fold fit times over wall time: how much the pool overlapped the folds
+            "parallel_speedup": sum(f["fit_ms"] + f["score_ms"] for f in folds) / wall_ms if wall_ms else 1.0,
+        }
+    )
+    return results
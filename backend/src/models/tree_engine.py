@@ -0,0 +1,215 @@
+"""Pure-NumPy evaluator for trained XGBoost tree ensembles.
+
+The booster is compiled into flat node arrays (feature index, threshold, left/right child, default
+direction, leaf value) that are scored with a vectorized level-by-level traversal: every (row, tree)
+pair advances one level per step until all of them sit on a leaf. Scoring needs only NumPy, so serving
+workers do not have to import xgboost to predict.
+"""
+import json
+import math
+import os
+import sys
+from typing import Any, Dict, Mapping, Optional
+
+import numpy as np
+
+# Rows scored per traversal pass; keeps the (trees x rows) index matrices cache sized
+_ROW_BLOCK = 512
+
+_SUPPORTED_OBJECTIVES = {"binary:logistic", "reg:logistic"}
+
+
+def _parse_base_score(raw: Any) -> float:
+    # stored as "5E-1" by older xgboost and as "[5E-1]" by xgboost>=3
+    if isinstance(raw, str):
+        raw = raw.strip("[]").split(",")[0]
+    return float(raw)
+
+
+class CompiledTreeEnsemble:
+    """Flat-array form of a binary:logistic gbtree booster."""
+
+    def __init__(
+        self,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        left: np.ndarray,
+        right: np.ndarray,
+        default_left: np.ndarray,
+        value: np.ndarray,
+        roots: np.ndarray,
+        base_margin: float,
+        max_depth: int,
+        n_features: int,
+    ):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.default_left = default_left
+        self.value = value
+        self.roots = roots
+        self.base_margin = float(base_margin)
+        self.max_depth = int(max_depth)
+        self.n_features = int(n_features)
+        # interleaved (left, right) children: child of node i is _children[2 * i + go_right]
+        self._children = np.stack([left, right], axis=1).ravel().astype(np.int64)
+
+    @property
+    def n_trees(self) -> int:
+        return int(self.roots.shape[0])
+
+    @classmethod
+    def from_model(cls, model: Any) -> "CompiledTreeEnsemble":
+        """Compile an XGBClassifier (or a raw xgboost Booster).
+
+        Honors best_iteration when the model was trained with early stopping, like predict_proba does.
+        """
+        booster = model.get_booster() if hasattr(model, "get_booster") else model
+        return cls.from_json(json.loads(booster.save_raw("json")), best_iteration=booster.attr("best_iteration"))
+
+    @classmethod
+    def from_json(cls, model_json: dict, best_iteration: Optional[Any] = None) -> "CompiledTreeEnsemble":
+        """Compile the JSON document produced by Booster.save_raw("json") / save_model("*.json")."""
+        learner = model_json["learner"]
+        objective = learner["objective"]["name"]
+        if objective not in _SUPPORTED_OBJECTIVES:
+            raise ValueError(f"Unsupported objective for compiled scoring: {objective}")
+        booster = learner["gradient_booster"]
+        if booster["name"] != "gbtree":
+            raise ValueError(f"Unsupported booster for compiled scoring: {booster['name']}")
+        gbtree = booster["model"]
+        trees = gbtree["trees"]
+
+        if best_iteration is not None and gbtree.get("iteration_indptr"):
+            trees = trees[: int(gbtree["iteration_indptr"][int(best_iteration) + 1])]
+
+        base_score = _parse_base_score(learner["learner_model_param"]["base_score"])
+        base_margin = math.log(base_score / (1.0 - base_score))
+
+        feature, threshold, left, right, default_left, value, roots = [], [], [], [], [], [], []
+        max_depth = 0
+        offset = 0
+        for tree in trees:
+            if any(int(t) != 0 for t in tree.get("split_type", [])):
+                raise ValueError("Categorical splits are not supported by the compiled scorer")
+            lc = np.asarray(tree["left_children"], dtype=np.int64)
+            rc = np.asarray(tree["right_children"], dtype=np.int64)
+            n = lc.shape[0]
+            is_leaf = lc == -1
+            idx = np.arange(n, dtype=np.int64)
+
+            feature.append(np.where(is_leaf, 0, np.asarray(tree["split_indices"], dtype=np.int64)))
+            cond = np.asarray(tree["split_conditions"], dtype=np.float32)
+            threshold.append(np.where(is_leaf, np.float32(0), cond))
+            # leaves point at themselves so extra traversal steps are no-ops
+            left.append(np.where(is_leaf, idx, lc) + offset)
+            right.append(np.where(is_leaf, idx, rc) + offset)
+            default_left.append(np.asarray(tree["default_left"], dtype=bool))
+            value.append(np.where(is_leaf, cond, np.float32(0)))
+            roots.append(offset)
+
+            depth = np.zeros(n, dtype=np.int64)
+            for node in range(n):
+                if not is_leaf[node]:
+                    depth[lc[node]] = depth[rc[node]] = depth[node] + 1
+            max_depth = max(max_depth, int(depth.max()) if n else 0)
+            offset += n
+
+        num_feature = int(learner["learner_model_param"]["num_feature"])
+        return cls(
+            feature=np.concatenate(feature).astype(np.int32) if feature else np.empty(0, dtype=np.int32),
+            threshold=np.concatenate(threshold).astype(np.float32) if threshold else np.empty(0, dtype=np.float32),
+            left=np.concatenate(left).astype(np.int32) if left else np.empty(0, dtype=np.int32),
+            right=np.concatenate(right).astype(np.int32) if right else np.empty(0, dtype=np.int32),
+            default_left=np.concatenate(default_left) if default_left else np.empty(0, dtype=bool),
+            value=np.concatenate(value).astype(np.float32) if value else np.empty(0, dtype=np.float32),
+            roots=np.asarray(roots, dtype=np.int32),
+            base_margin=base_margin,
+            max_depth=max_depth,
+            n_features=num_feature,
+        )
+
+    def _margin_block(self, X: np.ndarray) -> np.ndarray:
+        # (trees x rows) layout over a feature-major copy of X keeps each level's gathers cache friendly
+        n_rows = X.shape[0]
+        XT = np.ascontiguousarray(X.T).ravel()
+        row_offset = np.arange(n_rows, dtype=np.int64)[None, :]
+        feature_offset = self.feature.astype(np.int64) * n_rows
+        has_nan = bool(np.isnan(XT).any())
+
+        node = np.repeat(self.roots.astype(np.int64)[:, None], n_rows, axis=1)
+        for _ in range(self.max_depth):
+            x = XT.take(feature_offset.take(node) + row_offset)
+            go_right = ~(x < self.threshold.take(node))
+            if has_nan:
+                go_right = np.where(np.isnan(x), ~self.default_left.take(node), go_right)
+            node = self._children.take(node * 2 + go_right)
+        return self.value.take(node).sum(axis=0, dtype=np.float64) + self.base_margin
+
+    def predict_margin(self, X: Any) -> np.ndarray:
+        """Raw log-odds for each row of X (2D array-like, features in training order)."""
+        # xgboost compares split values in float32
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] < self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got {X.shape[1]}")
+        if X.shape[0] <= _ROW_BLOCK:
+            return self._margin_block(X)
+        return np.concatenate([self._margin_block(X[i:i + _ROW_BLOCK]) for i in range(0, X.shape[0], _ROW_BLOCK)])
+
+    def predict_proba(self, X: Any) -> np.ndarray:
+        """Class probabilities with the same (n_rows, 2) layout as XGBClassifier.predict_proba."""
+        p1 = 1.0 / (1.0 + np.exp(-self.predict_margin(X)))
+        return np.column_stack([1.0 - p1, p1])
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """All state as named arrays (scalars packed into "meta")."""
+        return {
+            "feature": self.feature,
+            "threshold": self.threshold,
+            "left": self.left,
+            "right": self.right,
+            "default_left": self.default_left,
+            "value": self.value,
+            "roots": self.roots,
+            "meta": np.asarray([self.base_margin, self.max_depth, self.n_features], dtype=np.float64),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: Mapping[str, np.ndarray]) -> "CompiledTreeEnsemble":
+        """Inverse of to_arrays; arrays may be memory-mapped."""
+        base_margin, max_depth, n_features = np.asarray(arrays["meta"]).tolist()
+        return cls(
+            feature=arrays["feature"],
+            threshold=arrays["threshold"],
+            left=arrays["left"],
+            right=arrays["right"],
+            default_left=arrays["default_left"],
+            value=arrays["value"],
+            roots=arrays["roots"],
+            base_margin=base_margin,
+            max_depth=int(max_depth),
+            n_features=int(n_features),
+        )
+
+    def save(self, path: str) -> str:
+        """Persist the compiled arrays as an uncompressed .npz (loadable without xgboost)."""
+        np.savez(path, **self.to_arrays())
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> "CompiledTreeEnsemble":
+        with np.load(path) as data:
+            return cls.from_arrays({k: data[k] for k in data.files})
+
+
+if __name__ == "__main__":
+    # Compile an existing joblib artifact: python -m src.models.tree_engine [models_dir]
+    import joblib
+
+    base_dir = sys.argv[1] if len(sys.argv) > 1 else "models"
+    engine = CompiledTreeEnsemble.from_model(joblib.load(os.path.join(base_dir, "xgboost_model.pkl")))
+    out = engine.save(os.path.join(base_dir, "tree_ensemble.npz"))
+    print(f"Compiled {engine.n_trees} trees (max depth {engine.max_depth}) to {out}")
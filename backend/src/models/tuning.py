@@ -0,0 +1,280 @@
+"""Offline hyperparameter search with successive halving.
+
+`n_trials` configurations are sampled from SEARCH_SPACE (tree depth, learning rate, row/column
+subsampling, regularization). Every configuration is scored by k-fold CV at a small boosting budget;
+the best 1/eta of them move up to a rung with eta times the rounds, and so on until the last rung
+trains at `max_rounds` (a lone survivor skips straight to it). Most configurations are therefore
+discarded after a few cheap rounds, and the full budget is only spent on the promising ones. Within a
+trial, folds early-stop on their validation split, so a rung's budget is an upper bound.
+
+Each worker builds the fold matrices (QuantileDMatrix for training, DMatrix for validation) once and
+reuses them for every trial it runs. Trials run in a spawn-based process pool, with the cores split
+between workers and xgboost threads as in training.py. Every finished evaluation is appended to a JSON
+checkpoint. A search restarted with the same checkpoint, settings and data (checked by a content hash)
+skips what is already done, so no tracking service is needed to resume.
+"""
+import hashlib
+import json
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from . import training
+
+# name -> (kind, low, high); "log" samples uniformly in log space
+SEARCH_SPACE: Dict[str, Tuple[str, float, float]] = {
+    "max_depth": ("int", 2, 8),
+    "learning_rate": ("log", 0.01, 0.3),
+    "subsample": ("float", 0.5, 1.0),
+    "colsample_bytree": ("float", 0.4, 1.0),
+    "min_child_weight": ("log", 0.5, 20.0),
+    "reg_lambda": ("log", 1e-3, 20.0),
+    "reg_alpha": ("log", 1e-3, 5.0),
+    "gamma": ("float", 0.0, 2.0),
+}
+
+CHECKPOINT_FORMAT = 1
+
+
+def sample_params(rng: np.random.RandomState, space: Dict[str, Tuple[str, float, float]] = SEARCH_SPACE) -> Dict[str, Any]:
+    params: Dict[str, Any] = {}
+    for name, (kind, low, high) in space.items():
+        if kind == "int":
+            params[name] = int(rng.randint(int(low), int(high) + 1))
+        elif kind == "log":
+            params[name] = float(math.exp(rng.uniform(math.log(low), math.log(high))))
+        else:
+            params[name] = float(rng.uniform(low, high))
+    return params
+
+
+def rung_budgets(min_rounds: int, max_rounds: int, eta: int) -> List[int]:
+    """Boosting rounds per rung: min_rounds, min_rounds * eta, ... up to and including max_rounds."""
+    budgets = [min_rounds]
+    while budgets[-1] * eta < max_rounds:
+        budgets.append(budgets[-1] * eta)
+    if budgets[-1] < max_rounds:
+        budgets.append(max_rounds)
+    return budgets
+
+
+# Per-process fold matrices, built once by _init_worker and shared by all trials the process runs
+_FOLDS: List[Tuple[Any, Any]] = []
+_THREADS = 1
+
+
+def _init_worker(folds: List[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]], threads: int) -> None:
+    import xgboost as xgb
+
+    global _FOLDS, _THREADS
+    _THREADS = threads
+    _FOLDS = []
+    for X_tr, y_tr, X_val, y_val in folds:
+        dtrain = xgb.QuantileDMatrix(X_tr, label=y_tr, nthread=threads)
+        _FOLDS.append((dtrain, xgb.DMatrix(X_val, label=y_val, nthread=threads)))
+
+
+def evaluate(trial: int, params: Dict[str, Any], rounds: int, random_state: int = 42, early_stopping_rounds: Optional[int] = None) -> Dict[str, Any]:
+    """CV of one configuration at a boosting budget on this process's fold matrices."""
+    import xgboost as xgb
+
+    start = time.perf_counter()
+    aucs, losses, best_rounds = [], [], []
+    booster_params = training.booster_params(params, random_state, _THREADS)
+    for dtrain, dval in _FOLDS:
+        history: Dict[str, Dict[str, List[float]]] = {}
+        booster = xgb.train(
+            booster_params,
+            dtrain,
+            num_boost_round=rounds,
+            evals=[(dval, "val")],
+            early_stopping_rounds=early_stopping_rounds,
+            evals_result=history,
+            verbose_eval=False,
+        )
+        best = int(getattr(booster, "best_iteration", rounds - 1)) if early_stopping_rounds else rounds - 1
+        aucs.append(history["val"]["auc"][best])
+        losses.append(history["val"]["logloss"][best])
+        best_rounds.append(best + 1)
+    return {
+        "trial": trial,
+        "rounds": rounds,
+        "roc_auc": float(np.mean(aucs)),
+        "roc_auc_std": float(np.std(aucs)),
+        "logloss": float(np.mean(losses)),
+        "best_rounds": int(np.median(best_rounds)),
+        "fit_ms": (time.perf_counter() - start) * 1000.0,
+    }
+
+
+def _evaluate_task(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    return evaluate(**kwargs)
+
+
+class Checkpoint:
+    """JSON file of the search settings, the sampled trials and every finished (trial, rounds) result."""
+
+    def __init__(self, path: Optional[str], settings: Dict[str, Any]):
+        self.path = path
+        self.settings = settings
+        self.trials: List[Dict[str, Any]] = []
+        self.results: List[Dict[str, Any]] = []
+        if path and os.path.exists(path):
+            with open(path, "r") as fh:
+                saved = json.load(fh)
+            if saved.get("format") != CHECKPOINT_FORMAT or saved.get("settings") != settings:
+                raise ValueError(f"Checkpoint {path} was written by a different search; remove it or pass another path")
+            self.trials = saved["trials"]
+            self.results = saved["results"]
+
+    def done(self, trial: int, rounds: int) -> Optional[Dict[str, Any]]:
+        return next((r for r in self.results if r["trial"] == trial and r["rounds"] == rounds), None)
+
+    def add(self, result: Dict[str, Any]) -> None:
+        self.results.append(result)
+        self.save()
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as fh:
+            json.dump({"format": CHECKPOINT_FORMAT, "settings": self.settings, "trials": self.trials, "results": self.results}, fh, indent=1)
+        os.replace(tmp, self.path)
+
+
+def _data_digest(X, y) -> str:
+    """Content hash of the training matrix (dense or CSR) and labels, recorded in the checkpoint settings."""
+    digest = hashlib.blake2b(digest_size=16)
+    parts = (X.data, X.indices, X.indptr) if hasattr(X, "indptr") else (X,)
+    for part in (*parts, y):
+        digest.update(np.ascontiguousarray(np.asarray(part, dtype=np.float64)).tobytes())
+    return digest.hexdigest()
+
+
+def _fold_arrays(X, y, n_splits: int, random_state: int) -> List[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+    from sklearn.model_selection import StratifiedKFold
+
+    y = np.asarray(y)
+    skf = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+    return [(X[tr], y[tr], X[val], y[val]) for tr, val in skf.split(X, y)]
+
+
+def successive_halving(
+    X,
+    y,
+    n_trials: int = 27,
+    eta: int = 3,
+    min_rounds: int = 25,
+    max_rounds: int = training.DEFAULT_MAX_ROUNDS,
+    n_splits: int = 3,
+    random_state: int = 42,
+    n_jobs: Optional[int] = None,
+    workers: Optional[int] = None,
+    early_stopping_rounds: Optional[int] = training.DEFAULT_EARLY_STOPPING_ROUNDS,
+    checkpoint_path: Optional[str] = None,
+    space: Optional[Dict[str, Tuple[str, float, float]]] = None,
+) -> Dict[str, Any]:
+    """Search SEARCH_SPACE (or `space`) for the configuration with the best CV ROC AUC.
+
+    Returns best_params (XGBClassifier keyword arguments), best_rounds (median early-stopped round count
+    of the winner's folds), the per-rung survivors and the leaderboard of the last rung each trial reached.
+    """
+    space = space or SEARCH_SPACE
+    if eta < 2:
+        raise ValueError("eta must be at least 2")
+    budgets = rung_budgets(min_rounds, max_rounds, eta)
+    settings = {
+        "n_trials": n_trials,
+        "eta": eta,
+        "budgets": budgets,
+        "n_splits": n_splits,
+        "random_state": random_state,
+        "early_stopping_rounds": early_stopping_rounds,
+        "space": {k: list(v) for k, v in space.items()},
+        "data_shape": list(np.shape(X)),
+        "data_digest": _data_digest(X, y),
+    }
+    checkpoint = Checkpoint(checkpoint_path, settings)
+    if not checkpoint.trials:
+        rng = np.random.RandomState(random_state)
+        checkpoint.trials = [{"trial": i, "params": sample_params(rng, space)} for i in range(n_trials)]
+        checkpoint.save()
+    params_by_trial = {t["trial"]: t["params"] for t in checkpoint.trials}
+
+    jobs = training.resolve_jobs(n_jobs)
+    n_workers, threads = training.split_cores(jobs, n_trials, workers)
+    folds = _fold_arrays(X, y, n_splits, random_state)
+    start = time.perf_counter()
+    pool = None
+    if n_workers > 1:
+        pool = ProcessPoolExecutor(
+            max_workers=n_workers, mp_context=multiprocessing.get_context("spawn"), initializer=_init_worker, initargs=(folds, threads)
+        )
+    else:
+        _init_worker(folds, threads)
+
+    survivors = sorted(params_by_trial)
+    rungs = []
+    resumed = 0
+    try:
+        rung = 0
+        while rung < len(budgets):
+            rounds = budgets[rung]
+            results = {}
+            pending = []
+            for trial in survivors:
+                done = checkpoint.done(trial, rounds)
+                if done is not None:
+                    results[trial] = done
+                    resumed += 1
+                else:
+                    pending.append(
+                        {
+                            "trial": trial,
+                            "params": params_by_trial[trial],
+                            "rounds": rounds,
+                            "random_state": random_state,
+                            "early_stopping_rounds": early_stopping_rounds,
+                        }
+                    )
+            outcomes = pool.map(_evaluate_task, pending) if pool is not None else map(_evaluate_task, pending)
+            for result in outcomes:
+                checkpoint.add(result)
+                results[result["trial"]] = result
+            ranked = sorted(survivors, key=lambda t: (-results[t]["roc_auc"], results[t]["logloss"]))
+            keep = ranked if rung == len(budgets) - 1 else ranked[: max(1, len(ranked) // eta)]
+            rungs.append({"rounds": rounds, "trials": len(survivors), "kept": keep, "best_roc_auc": results[ranked[0]]["roc_auc"]})
+            survivors = keep
+            # nothing left to prune: train the winner at the full budget only
+            rung = len(budgets) - 1 if len(keep) == 1 and rung < len(budgets) - 1 else rung + 1
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    # leaderboard: each trial at the highest budget it reached; the last rung is ranked already
+    last: Dict[int, Dict[str, Any]] = {}
+    for result in checkpoint.results:
+        if result["rounds"] in budgets and result["rounds"] >= last.get(result["trial"], {}).get("rounds", 0):
+            last[result["trial"]] = result
+    leaderboard = sorted(last.values(), key=lambda r: (-r["rounds"], -r["roc_auc"], r["logloss"]))
+    best = last[rungs[-1]["kept"][0]]
+    return {
+        "best_params": params_by_trial[best["trial"]],
+        "best_rounds": best["best_rounds"],
+        "best_roc_auc": best["roc_auc"],
+        "best_trial": best["trial"],
+        "rungs": rungs,
+        "leaderboard": [{**r, "params": params_by_trial[r["trial"]]} for r in leaderboard],
+        "evaluations": sum(r["trials"] for r in rungs),
+        "resumed_evaluations": resumed,
+        "workers": n_workers,
+        "threads_per_worker": threads,
+        "wall_ms": (time.perf_counter() - start) * 1000.0,
+    }
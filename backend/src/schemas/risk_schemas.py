@@ -1,6 +1,6 @@
-from typing import Optional, List
+from typing import Any, Literal, Optional, List
 from decimal import Decimal
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from typing import Annotated
 from datetime import datetime
 
@@ -51,7 +51,10 @@ class RiskAssessmentBase(BaseModel):
 
 class RiskAssessmentCreate(RiskAssessmentBase):
     # Score intentionally omitted from create (produced by ML/service)
-    pass
+    # Pin a resident model version (see /api/models); the active version is used when omitted
+    model_version: Optional[str] = Field(None, examples=["xgboost-1772647680"])
+
+    model_config = {"protected_namespaces": ()}
 
 
 class RiskAssessmentRead(RiskAssessmentBase):
@@ -63,6 +66,22 @@ class RiskAssessmentRead(RiskAssessmentBase):
     model_config = {"from_attributes": True}
 
 
+class BatchRiskAssessmentCreate(BaseModel):
+    # Existing applications to score and persist
+    application_ids: List[int] = Field(default_factory=list, examples=[[1, 2, 3]])
+    # Ad-hoc application payloads to score without persisting
+    payloads: List[dict] = Field(default_factory=list)
+    evaluator: Optional[str] = Field(None, examples=["automated-batch"])
+    notes: Optional[str] = None
+    # Compute (and persist, for application ids) top-k SHAP explanations in one batched call
+    explain: bool = False
+    top_k: int = Field(20, ge=1, le=500)
+    # Pin a resident model version (see /api/models); the active version is used when omitted
+    model_version: Optional[str] = None
+
+    model_config = {"protected_namespaces": ()}
+
+
 class FeatureContribution(BaseModel):
     feature: str
     impact: float
@@ -78,9 +97,100 @@ class SimulationRequest(BaseModel):
     scenario: Optional[dict] = Field(default_factory=dict)
 
 
+class SweepAxis(BaseModel):
+    # Application field to vary, e.g. "requested_amount"
+    field: str = Field(..., examples=["requested_amount"])
+    # Either explicit values...
+    values: Optional[List[Any]] = Field(None, examples=[[5000, 10000, 20000]])
+    # ...or an evenly spaced numeric range
+    start: Optional[float] = None
+    stop: Optional[float] = None
+    steps: Optional[int] = Field(None, ge=2, le=500)
+
+    @model_validator(mode="after")
+    def check_range(self):
+        if self.values is None and (self.start is None or self.stop is None or self.steps is None):
+            raise ValueError("axis needs either values or start/stop/steps")
+        if self.values is not None and not self.values:
+            raise ValueError("axis values must not be empty")
+        return self
+
+
+class SimulationSweepRequest(BaseModel):
+    application_id: int
+    # Fixed overrides applied to every grid point
+    scenario: Optional[dict] = Field(default_factory=dict)
+    axes: List[SweepAxis] = Field(..., min_length=1, max_length=2)
+
+
 class SimulationResponse(BaseModel):
     status: str
     message: Optional[str] = None
     simulated_scores: Optional[List[RiskAssessmentRead]] = None
 
     model_config = {"from_attributes": True}
+
+
+class ModelLoadRequest(BaseModel):
+    # Directory name under models/versions; omit to reload the base artifact directory
+    version: Optional[str] = Field(None, examples=["xgboost-1772647680"])
+    # Swap the loaded version in as the active one once it is warm
+    activate: bool = True
+    # Wait for load + warm-up instead of returning 202 right away
+    wait: bool = False
+
+
+class IngestRowError(BaseModel):
+    # 1-based record number in the upload (header line not counted for CSV)
+    row: int
+    error: str
+
+
+class IngestReport(BaseModel):
+    received: int
+    inserted: int
+    failed: int
+    # Risk assessments persisted at ingest time (score=true)
+    scored: int = 0
+    chunks: int
+    elapsed_ms: float
+    errors: List[IngestRowError] = Field(default_factory=list)
+    # More rows failed than are listed in `errors`
+    errors_truncated: bool = False
+
+
+class AnalyticsDimension(BaseModel):
+    # status, purpose, tier, month (of the application's created_at) or a numeric field binned by `width`
+    field: str = Field(..., examples=["tier"])
+    # Bin width for numeric fields, e.g. 0.05 for a PD histogram or 50 for credit-score bands
+    width: Optional[float] = Field(None, gt=0, examples=[0.05])
+
+
+class AnalyticsMetric(BaseModel):
+    op: Literal["count", "sum", "avg", "min", "max", "share"] = "count"
+    # Numeric field for sum/avg/min/max; status, purpose or tier for share
+    field: Optional[str] = Field(None, examples=["pd"])
+    # share: fraction of the group's applications whose `field` equals this value
+    value: Optional[str] = Field(None, examples=["approved"])
+    # Key in the result rows; defaults to e.g. "avg_pd" or "share_status_approved"
+    name: Optional[str] = None
+
+
+class AnalyticsFilters(BaseModel):
+    status: Optional[List[str]] = None
+    purpose: Optional[List[str]] = None
+    tier: Optional[List[str]] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+    min_amount: Optional[Decimal] = None
+    max_amount: Optional[Decimal] = None
+
+
+class AnalyticsQuery(BaseModel):
+    group_by: List[AnalyticsDimension] = Field(default_factory=list, max_length=4)
+    metrics: List[AnalyticsMetric] = Field(default_factory=lambda: [AnalyticsMetric()], min_length=1, max_length=16)
+    filters: AnalyticsFilters = Field(default_factory=AnalyticsFilters)
+    # Only applications with a scored assessment (tier/pd are null for the others when false)
+    scored_only: bool = True
+    # Maximum number of groups returned
+    limit: int = Field(1000, ge=1, le=10000)
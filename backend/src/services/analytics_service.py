@@ -0,0 +1,236 @@
+"""Ad-hoc portfolio analytics compiled to one grouped SQL aggregation.
+
+A query spec (schemas.AnalyticsQuery) names dimensions to group by, metrics to compute and filters.
+It becomes a single SELECT ... GROUP BY over applications joined with each application's latest scored
+risk assessment, so the database does the aggregation and only the group rows come back. The latest
+assessment is found per application through ix_risk_assessments_app_created (a correlated LIMIT 1
+subquery), the same way the assessment listing finds the latest explanation.
+
+Results are cached in-process by the spec's hash and the "applications" data version, which every write
+to applications or assessments bumps, so a cached result is never stale and needs no TTL.
+"""
+import hashlib
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import Float, String, and_, case, cast, func, literal, select
+from sqlalchemy.exc import CompileError
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.sql.functions import FunctionElement
+
+from ..db import models
+from . import portfolio_service
+
+App = models.Application
+RA = models.RiskAssessment
+
+
+class month_of(FunctionElement):
+    """'YYYY-MM' of a datetime column, compiled per dialect."""
+
+    type = String()
+    name = "month_of"
+    inherit_cache = True
+
+
+@compiles(month_of)
+def _month_of_default(element, compiler, **kw):
+    raise CompileError(f"month grouping is not supported on {compiler.dialect.name}")
+
+
+@compiles(month_of, "sqlite")
+def _month_of_sqlite(element, compiler, **kw):
+    return "strftime('%%Y-%%m', %s)" % compiler.process(element.clauses, **kw)
+
+
+@compiles(month_of, "postgresql")
+def _month_of_postgresql(element, compiler, **kw):
+    return "to_char(%s, 'YYYY-MM')" % compiler.process(element.clauses, **kw)
+
+
+@compiles(month_of, "mysql")
+def _month_of_mysql(element, compiler, **kw):
+    return "DATE_FORMAT(%s, '%%Y-%%m')" % compiler.process(element.clauses, **kw)
+
+
+class floor_of(FunctionElement):
+    """FLOOR() of a numeric expression; SQLite builds without the math functions lack it."""
+
+    type = Float()
+    name = "floor_of"
+    inherit_cache = True
+
+
+@compiles(floor_of)
+def _floor_of_default(element, compiler, **kw):
+    return "FLOOR(%s)" % compiler.process(element.clauses, **kw)
+
+
+@compiles(floor_of, "sqlite")
+def _floor_of_sqlite(element, compiler, **kw):
+    # CAST truncates toward zero; subtract one for negative non-integers
+    x = compiler.process(element.clauses, **kw)
+    return f"(CAST({x} AS INTEGER) - ({x} < CAST({x} AS INTEGER)))"
+
+
+def _columns(ra) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """(categorical, numeric) field name -> SQL expression for the application joined with `ra`."""
+    # PDs at the persisted precision of RiskAssessment.score, as in the portfolio aggregates
+    pd_rounded = func.round(ra.score, 2)
+    pd = cast(pd_rounded, Float)
+    amount = cast(App.requested_amount, Float)
+    categorical = {
+        "status": App.status,
+        "purpose": App.purpose,
+        "tier": case((ra.score.is_(None), None), else_=portfolio_service.tier_expression(pd_rounded)),
+        "month": month_of(App.created_at),
+    }
+    numeric = {
+        "pd": pd,
+        "risk_score": func.round((1 - pd) * 1000),
+        "expected_loss": pd * amount,
+        "requested_amount": amount,
+        "credit_score": cast(App.credit_score, Float),
+        "credit_utilization": cast(App.credit_utilization, Float),
+        "payment_history_percent": cast(App.payment_history_percent, Float),
+        "annual_income": cast(App.annual_income, Float),
+        "debt_to_income": cast(App.debt_to_income, Float),
+        "employment_length_months": cast(App.employment_length_months, Float),
+        "derogatory_marks": cast(App.derogatory_marks, Float),
+    }
+    return categorical, numeric
+
+
+def _dimension(dim, categorical, numeric) -> Any:
+    if dim.field in categorical:
+        if dim.width is not None:
+            raise ValueError(f"'{dim.field}' is categorical and takes no width")
+        return categorical[dim.field]
+    if dim.field in numeric:
+        if dim.width is None:
+            raise ValueError(f"numeric field '{dim.field}' needs a bin width")
+        width = literal(dim.width, Float)
+        # bins are labelled by their lower bound
+        return floor_of(numeric[dim.field] / width) * width
+    raise ValueError(f"unknown group_by field '{dim.field}' (expected one of {', '.join([*categorical, *numeric])})")
+
+
+def _metric(metric, categorical, numeric) -> Tuple[str, Any]:
+    if metric.op == "count":
+        return metric.name or "count", func.count()
+    if metric.op == "share":
+        if metric.field not in categorical or metric.value is None:
+            raise ValueError(f"share needs a field ({', '.join(categorical)}) and a value")
+        hit = case((categorical[metric.field] == metric.value, 1.0), else_=0.0)
+        return metric.name or f"share_{metric.field}_{metric.value}", func.avg(hit)
+    if metric.field not in numeric:
+        raise ValueError(f"{metric.op} needs a numeric field (one of {', '.join(numeric)})")
+    return metric.name or f"{metric.op}_{metric.field}", getattr(func, metric.op)(numeric[metric.field])
+
+
+def build_query(spec) -> Tuple[Any, List[str], List[str]]:
+    """(SELECT statement, dimension keys, metric keys) for an AnalyticsQuery; ValueError for a bad spec."""
+    latest = aliased(RA, name="latest")
+    newer = aliased(RA, name="newer")
+    latest_id = (
+        select(newer.id)
+        .where(newer.application_id == App.id, newer.score.is_not(None))
+        .order_by(newer.created_at.desc(), newer.id.desc())
+        .limit(1)
+        .correlate(App)
+        .scalar_subquery()
+    )
+    categorical, numeric = _columns(latest)
+
+    dims = [_dimension(d, categorical, numeric) for d in spec.group_by]
+    dim_keys = [d.field for d in spec.group_by]
+    if len(set(dim_keys)) != len(dim_keys):
+        raise ValueError("each group_by field may appear once")
+    metrics = [_metric(m, categorical, numeric) for m in spec.metrics]
+    metric_keys = [key for key, _ in metrics]
+    if len(set(metric_keys + dim_keys)) != len(metric_keys) + len(dim_keys):
+        raise ValueError("metric names must be unique and differ from the group_by fields")
+
+    f = spec.filters
+    conditions = []
+    if f.status:
+        conditions.append(App.status.in_(f.status))
+    if f.purpose:
+        conditions.append(App.purpose.in_(f.purpose))
+    if f.tier:
+        conditions.append(categorical["tier"].in_(f.tier))
+    if f.created_from is not None:
+        conditions.append(App.created_at >= f.created_from)
+    if f.created_to is not None:
+        conditions.append(App.created_at < f.created_to)
+    if f.min_amount is not None:
+        conditions.append(App.requested_amount >= f.min_amount)
+    if f.max_amount is not None:
+        conditions.append(App.requested_amount <= f.max_amount)
+
+    join = latest.id == latest_id
+    dims = [d.label(f"d{i}") for i, d in enumerate(dims)]
+    stmt = select(*dims, *[m.label(f"m{i}") for i, (_, m) in enumerate(metrics)])
+    stmt = stmt.select_from(App).join(latest, join) if spec.scored_only else stmt.select_from(App).outerjoin(latest, join)
+    if conditions:
+        stmt = stmt.where(and_(*conditions))
+    if dims:
+        stmt = stmt.group_by(*dims).order_by(*dims)
+    # one extra row tells whether the result was truncated
+    return stmt.limit(spec.limit + 1), dim_keys, metric_keys
+
+
+_CACHE = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_cache():
+    """Result cache keyed by (spec hash, data version); ANALYTICS_CACHE_SIZE entries (0 disables)."""
+    global _CACHE
+    max_size = int(os.getenv("ANALYTICS_CACHE_SIZE", "256") or 0)
+    if max_size <= 0:
+        return None
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                from ..utils.lru_cache import LRUCache
+
+                _CACHE = LRUCache(max_size=max_size)
+    return _CACHE
+
+
+def cache_metrics() -> Dict[str, Any]:
+    cache = _CACHE
+    return cache.stats() if cache is not None else {"enabled": int(os.getenv("ANALYTICS_CACHE_SIZE", "256") or 0) > 0}
+
+
+def spec_hash(spec) -> str:
+    return hashlib.sha256(spec.model_dump_json().encode()).hexdigest()
+
+
+def run_query(db: Session, spec) -> Dict[str, Any]:
+    """Group rows for an AnalyticsQuery, from the cache when the data has not changed since."""
+    start = time.perf_counter()
+    # read the version before the data: a write in between only caches newer rows under the older key
+    version = portfolio_service.get_data_version(db)
+    key = (spec_hash(spec), version)
+    cache = get_cache()
+    result: Optional[Dict[str, Any]] = cache.get(key) if cache is not None else None
+    cached = result is not None
+    if result is None:
+        stmt, dim_keys, metric_keys = build_query(spec)
+        rows = db.execute(stmt).all()
+        keys = dim_keys + metric_keys
+        result = {
+            "dimensions": dim_keys,
+            "metrics": metric_keys,
+            "rows": [dict(zip(keys, row)) for row in rows[: spec.limit]],
+            "truncated": len(rows) > spec.limit,
+            "data_version": version,
+        }
+        if cache is not None:
+            cache.set(key, result)
+    return {**result, "cached": cached, "elapsed_ms": (time.perf_counter() - start) * 1000.0}
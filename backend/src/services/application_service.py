@@ -1,13 +1,21 @@
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
+from decimal import Decimal
 
 from ..db import models
+from ..db.group_commit import persist
+from . import portfolio_service  # noqa: F401  (registers the aggregate-maintenance flush listener)
 from ..schemas.risk_schemas import ApplicationCreate
 
 
 def create_application(db: Session, payload: ApplicationCreate) -> models.Application:
-    app = models.Application(
+    return persist(db, new_application(payload))
+
+
+def new_application(payload: ApplicationCreate) -> models.Application:
+    """Unsaved Application row for a validated payload (shared by the sync and async services)."""
+    return models.Application(
         applicant_name=payload.applicant_name,
         applicant_email=payload.applicant_email,
         requested_amount=payload.requested_amount,
@@ -27,18 +35,76 @@ def create_application(db: Session, payload: ApplicationCreate) -> models.Applic
         debt_to_income=payload.debt_to_income,
         monthly_debt_payments=payload.monthly_debt_payments,
     )
-    db.add(app)
-    db.commit()
-    db.refresh(app)
-    return app
 
 
 def get_application(db: Session, application_id: int) -> models.Application:
     return db.query(models.Application).filter(models.Application.id == application_id).first()
 
 
+def get_applications_by_ids(db: Session, application_ids: List[int], chunk_size: int = 500) -> Dict[int, models.Application]:
+    """Fetch many applications with one IN query per chunk of ids. Returns a dict keyed by application id."""
+    ids = list(dict.fromkeys(int(i) for i in application_ids))
+    found: Dict[int, models.Application] = {}
+    for start in range(0, len(ids), chunk_size):
+        chunk = ids[start:start + chunk_size]
+        for app in db.query(models.Application).filter(models.Application.id.in_(chunk)).all():
+            found[app.id] = app
+    return found
+
+
 def list_applications(db: Session, limit: int = 50, offset: int = 0) -> List[models.Application]:
-    return db.query(models.Application).order_by(models.Application.created_at.desc()).offset(offset).limit(limit).all()
+    return list_applications_page(db, limit=limit, offset=offset)[0]
+
+
+def list_applications_page(
+    db: Session,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    min_amount: Optional[Decimal] = None,
+    max_amount: Optional[Decimal] = None,
+    offset: int = 0,
+) -> Tuple[List[models.Application], Optional[str]]:
+    """One page of applications, newest first, and the cursor of the next page (None on the last page).
+
+    Pages are keyset-paginated over (created_at, id): the cursor seeks past the previous page through
+    the composite indexes instead of scanning OFFSET rows. `offset` is kept for existing callers and is
+    only applied when no cursor is given. Raises InvalidCursor for a malformed cursor.
+    """
+    from ..utils.pagination import next_cursor
+
+    apps = list(db.scalars(applications_page_query(limit, cursor, status, min_amount, max_amount, offset)))
+    return apps, next_cursor(apps, limit)
+
+
+def applications_page_query(
+    limit: int,
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    min_amount: Optional[Decimal] = None,
+    max_amount: Optional[Decimal] = None,
+    offset: int = 0,
+):
+    """SELECT for one listing page (limit + 1 rows, see list_applications_page); shared with the async service."""
+    from sqlalchemy import select
+
+    from ..utils.pagination import after_cursor
+
+    App = models.Application
+    query = select(App)
+    if status is not None:
+        query = query.where(App.status == status)
+    if min_amount is not None:
+        query = query.where(App.requested_amount >= min_amount)
+    if max_amount is not None:
+        query = query.where(App.requested_amount <= max_amount)
+    after = after_cursor(App.created_at, App.id, cursor)
+    if after is not None:
+        query = query.where(after)
+    query = query.order_by(App.created_at.desc(), App.id.desc())
+    if after is None and offset:
+        query = query.offset(offset)
+    return query.limit(limit + 1)
 
 
 def update_application_status(db: Session, application_id: int, status: str) -> models.Application:
@@ -0,0 +1,47 @@
+"""AsyncSession counterparts of application_service (DB_MODE=async); queries are shared with the sync module."""
+from decimal import Decimal
+from typing import List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..db import models
+from ..schemas.risk_schemas import ApplicationCreate
+from ..utils.pagination import next_cursor
+from .application_service import applications_page_query, new_application
+
+
+async def create_application(db: AsyncSession, payload: ApplicationCreate) -> models.Application:
+    app = new_application(payload)
+    db.add(app)
+    await db.commit()
+    await db.refresh(app)
+    return app
+
+
+async def get_application(db: AsyncSession, application_id: int) -> Optional[models.Application]:
+    return await db.get(models.Application, application_id)
+
+
+async def list_applications_page(
+    db: AsyncSession,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    min_amount: Optional[Decimal] = None,
+    max_amount: Optional[Decimal] = None,
+    offset: int = 0,
+) -> Tuple[List[models.Application], Optional[str]]:
+    """See application_service.list_applications_page."""
+    apps = list(await db.scalars(applications_page_query(limit, cursor, status, min_amount, max_amount, offset)))
+    return apps, next_cursor(apps, limit)
+
+
+async def update_application_status(db: AsyncSession, application_id: int, status: str) -> Optional[models.Application]:
+    app = await db.scalar(select(models.Application).where(models.Application.id == application_id))
+    if not app:
+        return None
+    app.status = status
+    await db.commit()
+    await db.refresh(app)
+    return app
@@ -0,0 +1,83 @@
+"""AsyncSession counterparts of the risk_service persistence helpers (DB_MODE=async)."""
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..db import models
+from ..utils.pagination import next_cursor
+from . import shap_storage
+from .risk_service import get_shap_cache, latest_shap_query, remember_shap, risks_with_latest_shap_query
+
+
+async def create_risk_assessment_with_score(db: AsyncSession, application_id: int, evaluator: str, notes: str, score: float) -> models.RiskAssessment:
+    ra = models.RiskAssessment(
+        application_id=application_id,
+        evaluator=evaluator,
+        notes=notes,
+        score=score,
+        created_at=datetime.utcnow(),
+    )
+    db.add(ra)
+    await db.commit()
+    await db.refresh(ra)
+    return ra
+
+
+async def cache_shap_for_application(
+    db: AsyncSession, application_id: int, shap_list: list, model_version: Optional[str] = None
+) -> models.ShapExplanation:
+    try:
+        columns = await db.run_sync(shap_storage.compact_columns, shap_list, model_version)
+        se = models.ShapExplanation(application_id=int(application_id), created_at=datetime.utcnow(), **columns)
+        db.add(se)
+        prune = shap_storage.pruner([application_id])
+        if prune is not None:
+            await db.flush()
+            await db.run_sync(prune)
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    remember_shap(application_id, shap_storage.decode_columns(columns))
+    return se
+
+
+async def _explanation_from_row(db: AsyncSession, row) -> Optional[list]:
+    if row is None:
+        return None
+    shap_json, feature_set_id, feature_idx, impacts = row
+    names = None
+    if feature_set_id is not None:
+        names = shap_storage.cached_feature_names(feature_set_id)
+        if names is None:
+            names = json.loads(await db.scalar(shap_storage.feature_names_query(feature_set_id)))
+            shap_storage.remember_feature_set(feature_set_id, names)
+    return shap_storage.explanation_from_columns(names, shap_json, feature_set_id, feature_idx, impacts)
+
+
+async def get_cached_shap(db: AsyncSession, application_id: int) -> Optional[list]:
+    cache = get_shap_cache()
+    if cache is not None:
+        shap_list = cache.get(int(application_id))
+        if shap_list is not None:
+            return shap_list
+    shap_list = await _explanation_from_row(db, (await db.execute(latest_shap_query(application_id))).first())
+    remember_shap(application_id, shap_list, fill=True)
+    return shap_list
+
+
+async def get_risk_assessment(db: AsyncSession, risk_id: int) -> Optional[models.RiskAssessment]:
+    return await db.get(models.RiskAssessment, risk_id)
+
+
+async def list_risks_with_latest_shap(
+    db: AsyncSession, application_id: int, limit: Optional[int] = None, cursor: Optional[str] = None
+) -> Tuple[List[models.RiskAssessment], Optional[list], Optional[str]]:
+    """See risk_service.list_risks_with_latest_shap."""
+    rows = (await db.execute(risks_with_latest_shap_query(application_id, limit, cursor))).all()
+    risks = [row[0] for row in rows]
+    shap_list = await _explanation_from_row(db, rows[0][1:]) if rows else None
+    remember_shap(application_id, shap_list, fill=True)
+    return risks, shap_list, next_cursor(risks, limit)
@@ -0,0 +1,177 @@
+"""Background computation of SHAP explanations (SHAP_MODE=background).
+
+/calculate persists the assessment and returns right away; the explanation is computed on a bounded
+thread or process pool and persisted as a ShapExplanation when it finishes. Job state is tracked in
+process so the explainability endpoint can report pending/failed while the result is not in the DB yet.
+No external broker is needed; persistence uses the regular SQLAlchemy session factory.
+
+Worker processes are started with the "spawn" method and load their own model registry: forking the
+server would copy xgboost's OpenMP state and locks held by its threads (model loader, batchers,
+group-commit writer) into a child where those threads do not exist.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+PENDING = "pending"
+READY = "ready"
+FAILED = "failed"
+
+
+def _compute_explanation(payload: dict, top_k: Optional[int], model_version: Optional[str] = None) -> List[Dict[str, float]]:
+    # module-level so it can run in a worker process; artifacts load lazily there
+    from ..models import credit_risk_model
+
+    return credit_risk_model.explain_payload(payload, top_k=top_k, model_version=model_version)
+
+
+def _init_process(artifact_dir: str) -> None:
+    from ..models import credit_risk_model
+
+    credit_risk_model.load_artifacts(artifact_dir)
+
+
+class ExplanationWorker:
+    """Bounded pool that computes and persists SHAP explanations off the request path."""
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 256, use_processes: bool = False, artifact_dir: str = "models"):
+        self.max_pending = max(1, int(max_pending))
+        self._executor: Executor = (
+            ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_process,
+                initargs=(artifact_dir,),
+            )
+            if use_processes
+            else ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="shap-worker")
+        )
+        self._lock = threading.Lock()
+        # makes "does this job still own its application" and the DB write one step, so a superseded job
+        # cannot insert after (and, through retention pruning, in place of) a newer explanation
+        self._persist_lock = threading.Lock()
+        self._pending = 0
+        # application_id -> {"status", "submitted_at", "error"} for jobs not yet persisted (or failed)
+        self._jobs: Dict[int, Dict[str, Any]] = {}
+
+    def submit(self, application_id: int, payload: dict, top_k: Optional[int] = 20, model_version: Optional[str] = None) -> bool:
+        """Queue an explanation job. Returns False when the pool is saturated (caller should compute inline).
+
+        model_version pins the version that scored the application so the explanation matches it. A job
+        still queued for the same application is superseded: its result is dropped instead of persisted.
+        """
+        application_id = int(application_id)
+        with self._lock:
+            if self._pending >= self.max_pending:
+                # the caller explains inline; an older job for this application must not overwrite that
+                self._jobs.pop(application_id, None)
+                return False
+            self._pending += 1
+            token = object()
+            self._jobs[application_id] = {"status": PENDING, "submitted_at": datetime.utcnow(), "error": None, "token": token}
+        try:
+            future = self._executor.submit(_compute_explanation, payload, top_k, model_version)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+                self._jobs.pop(application_id, None)
+            raise
+        future.add_done_callback(lambda f: self._on_done(application_id, token, f, model_version))
+        return True
+
+    def _on_done(self, application_id: int, token: object, future: Future, model_version: Optional[str] = None) -> None:
+        from ..db.session import SessionLocal
+        from .risk_service import cache_shap_for_application
+
+        error = None
+        try:
+            expl = future.result()
+            with self._persist_lock:
+                if self._owns(application_id, token):
+                    db = SessionLocal()
+                    try:
+                        cache_shap_for_application(db, application_id, expl, model_version)
+                    finally:
+                        db.close()
+                else:
+                    logger.debug("Dropping superseded SHAP explanation for application {}", application_id)
+        except Exception as e:
+            error = str(e)
+            logger.warning("Background SHAP explanation failed for application {}: {}", application_id, e)
+
+        with self._lock:
+            self._pending -= 1
+            job = self._jobs.get(application_id)
+            # a newer job for the same application owns the entry
+            if job is not None and job["token"] is token:
+                if error is None:
+                    del self._jobs[application_id]
+                else:
+                    job.update(status=FAILED, error=error)
+
+    def _owns(self, application_id: int, token: object) -> bool:
+        with self._lock:
+            job = self._jobs.get(application_id)
+            return job is not None and job["token"] is token
+
+    def status(self, application_id: int) -> Optional[Dict[str, Any]]:
+        """In-flight or failed job info for an application, or None if nothing is tracked."""
+        with self._lock:
+            job = self._jobs.get(int(application_id))
+            return None if job is None else {k: v for k, v in job.items() if k != "token"}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "pending": self._pending,
+                "max_pending": self.max_pending,
+                "failed": sum(1 for j in self._jobs.values() if j["status"] == FAILED),
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+
+_WORKER: Optional[ExplanationWorker] = None
+_WORKER_LOCK = threading.Lock()
+
+
+def background_enabled() -> bool:
+    return os.getenv("SHAP_MODE", "sync").lower() == "background"
+
+
+def get_worker() -> Optional[ExplanationWorker]:
+    """Shared worker when SHAP_MODE=background, else None."""
+    global _WORKER
+    if not background_enabled():
+        return None
+    if _WORKER is None:
+        with _WORKER_LOCK:
+            if _WORKER is None:
+                from ..models import credit_risk_model
+
+                _WORKER = ExplanationWorker(
+                    max_workers=int(os.getenv("SHAP_WORKERS", "2")),
+                    max_pending=int(os.getenv("SHAP_MAX_PENDING", "256")),
+                    use_processes=os.getenv("SHAP_POOL", "thread").lower() == "process",
+                    artifact_dir=credit_risk_model.artifact_dir(),
+                )
+    return _WORKER
+
+
+def shutdown_worker(wait: bool = True) -> None:
+    global _WORKER
+    with _WORKER_LOCK:
+        if _WORKER is not None:
+            _WORKER.shutdown(wait=wait)
+            _WORKER = None
+
+
+def job_status(application_id: int) -> Optional[Dict[str, Any]]:
+    worker = _WORKER
+    return worker.status(application_id) if worker is not None else None
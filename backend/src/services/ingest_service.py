@@ -0,0 +1,277 @@
+"""Streaming bulk ingestion of applications from NDJSON or CSV.
+
+Input is consumed line by line and processed in chunks of `chunk_size` records: each record is validated
+against ApplicationCreate, the valid ones are inserted with one executemany INSERT and (optionally)
+scored with one batched model call, and the chunk is committed. Only the current chunk is held in
+memory, so a load of millions of rows runs in constant memory. Invalid records and failed inserts are
+reported per row (by 1-based record number) and do not abort the load.
+
+Used by POST /api/applications/ingest and the ingest_applications.py script.
+"""
+import codecs
+import csv
+import json
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from loguru import logger
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from ..db import models
+from ..models import credit_risk_model
+from ..schemas.risk_schemas import ApplicationCreate
+from . import portfolio_service
+from .risk_service import SCORING_FIELDS
+
+FORMATS = ("ndjson", "csv")
+DEFAULT_CHUNK_SIZE = 1000
+# Per-row errors kept in the report; further errors are only counted
+DEFAULT_MAX_ERRORS = 1000
+
+
+class IngestFormatError(ValueError):
+    """Input could not be read as the requested format (e.g. a CSV without a header)."""
+
+
+def detect_format(content_type: Optional[str] = None, filename: Optional[str] = None) -> str:
+    """'csv' or 'ndjson' from a Content-Type header or file name; NDJSON is the default."""
+    if content_type and "csv" in content_type.lower():
+        return "csv"
+    if filename and filename.lower().endswith(".csv"):
+        return "csv"
+    return "ndjson"
+
+
+class LineSplitter:
+    """Splits a stream of byte chunks (e.g. an HTTP request body) into decoded text lines."""
+
+    def __init__(self, encoding: str = "utf-8"):
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        self._buffer = ""
+
+    def feed(self, data: bytes) -> List[str]:
+        self._buffer += self._decoder.decode(data)
+        *lines, self._buffer = self._buffer.split("\n")
+        return [line + "\n" for line in lines]
+
+    def finish(self) -> List[str]:
+        rest = self._buffer + self._decoder.decode(b"", final=True)
+        self._buffer = ""
+        return [rest] if rest else []
+
+
+class RecordParser:
+    """Turns text lines into (record_number, dict) pairs for one NDJSON or CSV stream.
+
+    Lines are fed in order with `feed`; the parser keeps the CSV header and any record left open by a
+    quoted field spanning lines. Unparseable records yield an error string instead of a dict.
+    """
+
+    def __init__(self, fmt: str):
+        if fmt not in FORMATS:
+            raise IngestFormatError(f"Unsupported format: {fmt!r} (expected one of {', '.join(FORMATS)})")
+        self.fmt = fmt
+        self.header: Optional[List[str]] = None
+        self._pending = ""
+        self.records = 0
+
+    def feed(self, line: str) -> Iterator[Tuple[int, Any]]:
+        if self.fmt == "csv":
+            if self.header is None and not self._pending:
+                # files saved by spreadsheet tools often start with a byte-order mark
+                line = line.lstrip("\ufeff")
+            line = self._pending + line
+            # an odd number of quotes means a quoted field continues on the next line
+            if line.count('"') % 2:
+                self._pending = line
+                return
+            self._pending = ""
+        if not line.strip():
+            return
+        if self.fmt == "ndjson":
+            self.records += 1
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield self.records, f"invalid JSON: {e}"
+                return
+            yield self.records, record if isinstance(record, dict) else "expected a JSON object"
+            return
+        values = next(csv.reader([line]))
+        if self.header is None:
+            self.header = [h.strip() for h in values]
+            return
+        self.records += 1
+        if len(values) != len(self.header):
+            yield self.records, f"expected {len(self.header)} columns, got {len(values)}"
+            return
+        # empty CSV cells are missing values
+        yield self.records, {k: (v if v != "" else None) for k, v in zip(self.header, values)}
+
+    def finish(self) -> Iterator[Tuple[int, Any]]:
+        if self._pending:
+            self.records += 1
+            yield self.records, "unterminated quoted field"
+            self._pending = ""
+        if self.fmt == "csv" and self.header is None:
+            raise IngestFormatError("CSV input has no header row")
+
+
+def iter_records(lines: Iterable[str], fmt: str) -> Iterator[Tuple[int, Any]]:
+    """(record_number, dict or error string) for every record in `lines`."""
+    parser = RecordParser(fmt)
+    for line in lines:
+        yield from parser.feed(line)
+    yield from parser.finish()
+
+
+def _error_message(e: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(p) for p in err['loc']) or 'row'}: {err['msg']}" for err in e.errors())
+
+
+class Ingestor:
+    """Validates, inserts and optionally scores applications chunk by chunk, accumulating a report.
+
+    - score: also persist a risk assessment per inserted application (one batched prediction per chunk)
+    - evaluator / model_version: stored with / used for the ingest-time assessments
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        score: bool = False,
+        evaluator: str = "ingest",
+        model_version: Optional[str] = None,
+        max_errors: int = DEFAULT_MAX_ERRORS,
+    ):
+        self.db = db
+        self.score = score
+        self.evaluator = evaluator
+        self.model_version = model_version
+        self.max_errors = max_errors
+        self.received = 0
+        self.inserted = 0
+        self.failed = 0
+        self.scored = 0
+        self.chunks = 0
+        self.errors: List[Dict[str, Any]] = []
+        self._started = time.perf_counter()
+
+    def _fail(self, record: int, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": record, "error": message})
+
+    def process(self, records: List[Tuple[int, Any]]) -> None:
+        """Validate and persist one chunk of (record_number, dict or error string)."""
+        self.received += len(records)
+        self.chunks += 1
+        now = datetime.utcnow()
+        valid: List[Tuple[int, Dict[str, Any]]] = []
+        for record, data in records:
+            if isinstance(data, str):
+                self._fail(record, data)
+                continue
+            try:
+                payload = ApplicationCreate.model_validate(data)
+            except ValidationError as e:
+                self._fail(record, _error_message(e))
+                continue
+            valid.append((record, {**payload.model_dump(), "created_at": now, "status": "pending"}))
+        if not valid:
+            return
+        try:
+            self._insert([row for _, row in valid])
+        except Exception as e:
+            self.db.rollback()
+            logger.warning("Bulk insert of {} rows failed, retrying individually: {}", len(valid), e)
+            for record, row in valid:
+                try:
+                    self._insert([row])
+                except Exception as row_error:
+                    self.db.rollback()
+                    self._fail(record, f"insert failed: {row_error}")
+
+    def _insert(self, rows: List[Dict[str, Any]]) -> None:
+        """INSERT `rows` (executemany) and their assessments when scoring, then commit.
+
+        RETURNING (needed for the assessments' application ids) roughly halves insert throughput on
+        SQLite, so it is only requested when scoring.
+        """
+        scored = 0
+        if self.score:
+            stmt = insert(models.Application).returning(models.Application.id, sort_by_parameter_order=True)
+            ids = list(self.db.execute(stmt, rows).scalars())
+            scored = self._score(ids, rows)
+        else:
+            self.db.execute(insert(models.Application), rows)
+        # bulk INSERTs bypass the flush listener that normally bumps the version
+        portfolio_service.bump_data_version(self.db.connection())
+        self.db.commit()
+        self.inserted += len(rows)
+        self.scored += scored
+
+    def _score(self, ids: List[int], rows: List[Dict[str, Any]]) -> int:
+        try:
+            preds = credit_risk_model.predict_from_payloads(
+                [{k: row.get(k) for k in SCORING_FIELDS} for row in rows], model_version=self.model_version
+            )
+        except Exception as e:
+            # keep the applications; they can be scored later through /calculate-batch
+            logger.warning("Scoring {} ingested applications failed: {}", len(rows), e)
+            return 0
+        now = datetime.utcnow()
+        assessment_ids = self.db.execute(
+            insert(models.RiskAssessment).returning(models.RiskAssessment.id, sort_by_parameter_order=True),
+            [
+                {"application_id": app_id, "evaluator": self.evaluator, "notes": "", "score": pred["prob_default"], "created_at": now}
+                for app_id, pred in zip(ids, preds)
+            ],
+        ).scalars()
+        portfolio_service.record_changes(
+            self.db.connection(),
+            [(app_id, ra_id, now, pred["prob_default"]) for app_id, ra_id, pred in zip(ids, assessment_ids, preds)],
+        )
+        return len(ids)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "received": self.received,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "scored": self.scored,
+            "chunks": self.chunks,
+            "elapsed_ms": (time.perf_counter() - self._started) * 1000.0,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def chunked(records: Iterable[Tuple[int, Any]], chunk_size: int) -> Iterator[List[Tuple[int, Any]]]:
+    chunk: List[Tuple[int, Any]] = []
+    for item in records:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def ingest_lines(
+    db: Session,
+    lines: Iterable[str],
+    fmt: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    score: bool = False,
+    model_version: Optional[str] = None,
+    max_errors: int = DEFAULT_MAX_ERRORS,
+) -> Dict[str, Any]:
+    """Ingest every record in `lines` (an open text file works) and return the report."""
+    ingestor = Ingestor(db, score=score, model_version=model_version, max_errors=max_errors)
+    for chunk in chunked(iter_records(lines, fmt), chunk_size):
+        ingestor.process(chunk)
+    return ingestor.report()
@@ -0,0 +1,269 @@
+"""Portfolio risk summary kept up to date incrementally.
+
+Every application with at least one scored assessment contributes its latest PD to one bucket of
+portfolio_aggregates, keyed by (status, purpose, tier): a count, the PD sum, the requested-amount sum and
+the expected-loss sum (PD x requested_amount). A session after_flush listener moves contributions
+between buckets in the same transaction whenever a scored assessment is inserted or an application's
+status, purpose or amount changes, so reading the summary touches only the few bucket rows. Writes that
+bypass the ORM (the bulk ingest path) call record_changes themselves.
+
+PDs are taken at the persisted precision of RiskAssessment.score (2 decimals) so the incremental totals
+and rebuild() agree. Writes also bump the "applications" data version used to key derived caches.
+"""
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, delete, event, func, insert, literal, select, update
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session
+
+from ..db import models
+from ..models.credit_risk_model import LOWEST_TIER, RISK_TIERS, risk_score_from_pd, risk_tier
+
+DATA_VERSION = "applications"
+# Application attributes a bucket depends on
+_TRACKED = ("status", "purpose", "requested_amount")
+TIERS = [tier for _, tier in RISK_TIERS] + [LOWEST_TIER]
+
+PA = models.PortfolioAggregate
+RA = models.RiskAssessment
+App = models.Application
+
+
+def _pd(score) -> float:
+    return round(float(score), 2)
+
+
+def _bucket(status: str, purpose: Optional[str], pd: float) -> Tuple[str, str, str]:
+    return status, purpose or "", risk_tier(risk_score_from_pd(pd))
+
+
+def _upsert_statement(connection, values: Dict[str, Any], increments: Tuple[str, ...]):
+    """INSERT ... ON CONFLICT DO UPDATE adding `increments` columns, for SQLite and PostgreSQL; None otherwise."""
+    name = connection.dialect.name
+    if name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        return None
+    stmt = dialect_insert(PA).values(**values)
+    return stmt.on_conflict_do_update(
+        index_elements=["status", "purpose", "tier"],
+        set_={col: getattr(PA, col) + getattr(stmt.excluded, col) for col in increments},
+    )
+
+
+def _apply_deltas(connection, deltas: Dict[Tuple[str, str, str], List[float]]) -> None:
+    columns = ("applications", "pd_sum", "requested_amount_sum", "expected_loss_sum")
+    for (status, purpose, tier), delta in deltas.items():
+        if not any(delta):
+            continue
+        values = {"status": status, "purpose": purpose, "tier": tier, **dict(zip(columns, delta))}
+        stmt = _upsert_statement(connection, values, columns)
+        if stmt is not None:
+            connection.execute(stmt)
+            continue
+        key = (PA.status == status, PA.purpose == purpose, PA.tier == tier)
+        changed = connection.execute(
+            update(PA).where(*key).values({getattr(PA, c): getattr(PA, c) + d for c, d in zip(columns, delta)})
+        ).rowcount
+        if not changed:
+            connection.execute(insert(PA).values(**values))
+
+
+def bump_data_version(connection) -> None:
+    DV = models.DataVersion
+    now = datetime.utcnow()
+    if not connection.execute(update(DV).where(DV.name == DATA_VERSION).values(version=DV.version + 1, updated_at=now)).rowcount:
+        connection.execute(insert(DV).values(name=DATA_VERSION, version=1, updated_at=now))
+
+
+def get_data_version(db) -> int:
+    DV = models.DataVersion
+    return db.scalar(select(DV.version).where(DV.name == DATA_VERSION)) or 0
+
+
+def record_changes(
+    connection,
+    new_assessments: Iterable[Tuple[int, int, datetime, Any]] = (),
+    old_values: Optional[Dict[int, Dict[str, Any]]] = None,
+) -> None:
+    """Move application contributions between buckets for writes already executed on `connection`.
+
+    - new_assessments: (application_id, assessment_id, created_at, score) of inserted scored assessments
+    - old_values: application_id -> previous values of the changed tracked attributes (status, purpose,
+      requested_amount)
+    """
+    old_values = old_values or {}
+    latest_new: Dict[int, Tuple[datetime, int, Any]] = {}
+    for app_id, ra_id, created_at, score in new_assessments:
+        if score is None:
+            continue
+        if app_id not in latest_new or (created_at, ra_id) > latest_new[app_id][:2]:
+            latest_new[app_id] = (created_at, ra_id, score)
+    app_ids = set(latest_new) | set(old_values)
+    if not app_ids:
+        return
+
+    new_ids = [v[1] for v in latest_new.values()]
+    apps = {
+        row.id: row
+        for row in connection.execute(select(App.id, App.status, App.purpose, App.requested_amount).where(App.id.in_(app_ids)))
+    }
+    # latest scored assessment of each application before these inserts
+    ranked = (
+        select(
+            RA.application_id,
+            RA.id,
+            RA.created_at,
+            RA.score,
+            func.row_number().over(partition_by=RA.application_id, order_by=(RA.created_at.desc(), RA.id.desc())).label("rank"),
+        )
+        .where(RA.application_id.in_(app_ids), RA.score.is_not(None))
+    )
+    if new_ids:
+        ranked = ranked.where(RA.id.not_in(new_ids))
+    ranked = ranked.subquery()
+    previous = {
+        row.application_id: row
+        for row in connection.execute(select(ranked.c.application_id, ranked.c.id, ranked.c.created_at, ranked.c.score).where(ranked.c.rank == 1))
+    }
+
+    deltas: Dict[Tuple[str, str, str], List[float]] = defaultdict(lambda: [0, 0.0, 0.0, 0.0])
+    for app_id in app_ids:
+        app = apps.get(app_id)
+        if app is None:
+            continue
+        before = {"status": app.status, "purpose": app.purpose, "requested_amount": app.requested_amount, **old_values.get(app_id, {})}
+        prev = previous.get(app_id)
+        old_pd = _pd(prev.score) if prev is not None else None
+        new_pd = old_pd
+        if app_id in latest_new:
+            created_at, ra_id, score = latest_new[app_id]
+            if prev is None or (created_at, ra_id) > (prev.created_at, prev.id):
+                new_pd = _pd(score)
+        for pd, values, sign in ((old_pd, before, -1), (new_pd, app._mapping, 1)):
+            if pd is None:
+                continue
+            amount = float(values["requested_amount"] or 0)
+            delta = deltas[_bucket(values["status"], values["purpose"], pd)]
+            delta[0] += sign
+            delta[1] += sign * pd
+            delta[2] += sign * amount
+            delta[3] += sign * pd * amount
+    _apply_deltas(connection, deltas)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_portfolio_changes(session: Session, flush_context) -> None:
+    new_assessments = []
+    old_values: Dict[int, Dict[str, Any]] = {}
+    touched = False
+    for obj in session.new:
+        if isinstance(obj, RA):
+            touched = True
+            new_assessments.append((obj.application_id, obj.id, obj.created_at, obj.score))
+        elif isinstance(obj, App):
+            touched = True
+    for obj in session.dirty:
+        if not isinstance(obj, (App, RA)) or not session.is_modified(obj, include_collections=False):
+            continue
+        touched = True
+        if isinstance(obj, App):
+            state = sa_inspect(obj)
+            changed = {}
+            for attr in _TRACKED:
+                history = state.attrs[attr].history
+                if history.deleted:
+                    changed[attr] = history.deleted[0]
+            if changed:
+                old_values[obj.id] = changed
+    touched = touched or any(isinstance(obj, (App, RA)) for obj in session.deleted)
+    if not touched:
+        return
+    connection = session.connection()
+    record_changes(connection, new_assessments, old_values)
+    bump_data_version(connection)
+
+
+def tier_expression(pd):
+    """SQL CASE giving the risk tier of a PD column, matching credit_risk_model.risk_tier()."""
+    risk_score = func.round((1 - pd) * 1000)
+    return case(*[(risk_score >= threshold, literal(name)) for threshold, name in RISK_TIERS], else_=literal(LOWEST_TIER))
+
+
+def rebuild(db: Session) -> int:
+    """Recompute every bucket from the latest scored assessment of each application; returns the bucket count."""
+    ranked = (
+        select(
+            RA.application_id,
+            func.round(RA.score, 2).label("pd"),
+            func.row_number().over(partition_by=RA.application_id, order_by=(RA.created_at.desc(), RA.id.desc())).label("rank"),
+        )
+        .where(RA.score.is_not(None))
+        .subquery()
+    )
+    tier = tier_expression(ranked.c.pd)
+    purpose = func.coalesce(App.purpose, "")
+    amount = func.coalesce(App.requested_amount, 0)
+    grouped = (
+        select(
+            App.status,
+            purpose,
+            tier,
+            func.count(),
+            func.sum(ranked.c.pd),
+            func.sum(amount),
+            func.sum(ranked.c.pd * amount),
+        )
+        .join(ranked, (ranked.c.application_id == App.id) & (ranked.c.rank == 1))
+        .group_by(App.status, purpose, tier)
+    )
+    db.execute(delete(PA))
+    db.execute(
+        insert(PA).from_select(
+            ["status", "purpose", "tier", "applications", "pd_sum", "requested_amount_sum", "expected_loss_sum"], grouped
+        )
+    )
+    bump_data_version(db.connection())
+    db.commit()
+    return db.scalar(select(func.count()).select_from(PA))
+
+
+def _totals(rows: List[Any]) -> Dict[str, Any]:
+    count = sum(r.applications for r in rows)
+    pd_sum = sum(r.pd_sum for r in rows)
+    return {
+        "applications": count,
+        "avg_pd": pd_sum / count if count else None,
+        "requested_amount": sum(r.requested_amount_sum for r in rows),
+        "expected_loss": sum(r.expected_loss_sum for r in rows),
+    }
+
+
+def _breakdown(rows: List[Any], key: str) -> Dict[str, Any]:
+    groups: Dict[Optional[str], List[Any]] = defaultdict(list)
+    for r in rows:
+        groups[getattr(r, key) or None].append(r)
+    return {
+        name: {**_totals(group), "by_tier": {tier: sum(r.applications for r in group if r.tier == tier) for tier in TIERS}}
+        for name, group in groups.items()
+    }
+
+
+def get_summary(db: Session) -> Dict[str, Any]:
+    """Portfolio totals and breakdowns by tier, status and purpose from the aggregate buckets."""
+    rows = db.execute(
+        select(PA.status, PA.purpose, PA.tier, PA.applications, PA.pd_sum, PA.requested_amount_sum, PA.expected_loss_sum).where(
+            PA.applications > 0
+        )
+    ).all()
+    return {
+        "data_version": get_data_version(db),
+        "totals": _totals(rows),
+        "by_tier": {tier: _totals([r for r in rows if r.tier == tier]) for tier in TIERS},
+        "by_status": _breakdown(rows, "status"),
+        "by_purpose": _breakdown(rows, "purpose"),
+    }
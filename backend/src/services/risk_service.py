@@ -1,9 +1,19 @@
 from sqlalchemy.orm import Session
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+import itertools
 import json
+import os
+import threading
+
+import numpy as np
+
+from sqlalchemy import event, select
 
 from ..db import models
+from ..db.group_commit import persist
+from . import portfolio_service  # noqa: F401  (registers the aggregate-maintenance flush listener)
+from . import shap_storage
 from ..schemas.risk_schemas import RiskAssessmentCreate
 from sqlalchemy.orm import Session
 
@@ -16,14 +26,83 @@ def create_risk_assessment(db: Session, payload: RiskAssessmentCreate) -> models
         created_at=datetime.utcnow(),
     )
     # Score will be populated by ML/service later; keep None for now
-    db.add(ra)
-    db.commit()
-    db.refresh(ra)
-    return ra
+    return persist(db, ra)
+
+
+# Application fields used to build the prediction payload for scoring (/calculate, /calculate-batch, ingest)
+SCORING_FIELDS = [
+    "applicant_name",
+    "applicant_email",
+    "requested_amount",
+    "purpose",
+    "created_at",
+]
+
+
+def scoring_payload(app) -> dict:
+    return {k: getattr(app, k) for k in SCORING_FIELDS if hasattr(app, k)}
+
+
+# In-process cache of the latest SHAP explanation per application id, in front of shap_explanations
+_SHAP_CACHE = None
+_SHAP_CACHE_VERSION = None
+_SHAP_CACHE_LOCK = threading.Lock()
+
+
+def get_shap_cache():
+    """Shared SHAP explanation cache (SHAP_CACHE_SIZE > 0), cleared whenever the active model version changes.
+
+    Entries are written through when an explanation is persisted and dropped when the application row is
+    updated. Other processes' writes are not seen, so SHAP_CACHE_TTL_SECONDS bounds staleness with
+    several workers.
+    """
+    global _SHAP_CACHE, _SHAP_CACHE_VERSION
+    max_size = int(os.getenv("SHAP_CACHE_SIZE", "4096") or 0)
+    if max_size <= 0:
+        return None
+    if _SHAP_CACHE is None:
+        with _SHAP_CACHE_LOCK:
+            if _SHAP_CACHE is None:
+                from ..utils.lru_cache import LRUCache
+
+                ttl = float(os.getenv("SHAP_CACHE_TTL_SECONDS", "300") or 0)
+                _SHAP_CACHE = LRUCache(max_size=max_size, ttl_seconds=ttl)
+    from ..models.credit_risk_model import get_model_version
+
+    version = get_model_version()
+    if _SHAP_CACHE_VERSION != version:
+        _SHAP_CACHE.clear()
+        _SHAP_CACHE_VERSION = version
+    return _SHAP_CACHE
+
+
+def shap_cache_metrics() -> Dict[str, Any]:
+    cache = _SHAP_CACHE
+    return cache.stats() if cache is not None else {"enabled": int(os.getenv("SHAP_CACHE_SIZE", "4096") or 0) > 0}
+
+
+def remember_shap(application_id: int, shap_list: Optional[list], fill: bool = False) -> None:
+    """Put an application's latest explanation in the cache (no-op for None or when disabled).
+
+    Writers pass the explanation they just committed and replace the entry. Readers pass fill=True
+    so that a row read before a concurrent write-through cannot overwrite that newer entry.
+    """
+    cache = get_shap_cache()
+    if cache is not None and shap_list is not None:
+        if fill:
+            cache.set_if_absent(int(application_id), shap_list)
+        else:
+            cache.set(int(application_id), shap_list)
 
 
-# In-memory cache for SHAP explanations per application id
-_shap_cache = {}
+@event.listens_for(models.Application, "after_update")
+def _forget_shap_on_update(mapper, connection, target) -> None:
+    # Explanations describe the application as it was scored. This only drops this process's cached
+    # copy (at flush time, before the commit): the table still returns the same pre-update explanation
+    # until the application is rescored, so it is not marked stale and readers refill the cache with it.
+    cache = _SHAP_CACHE
+    if cache is not None:
+        cache.pop(target.id)
 
 
 def create_risk_assessment_with_score(db: Session, application_id: int, evaluator: str, notes: str, score: float) -> models.RiskAssessment:
@@ -38,47 +117,108 @@ def create_risk_assessment_with_score(db: Session, application_id: int, evaluato
         score=score,
         created_at=datetime.utcnow(),
     )
-    db.add(ra)
-    db.commit()
-    db.refresh(ra)
-    return ra
+    return persist(db, ra)
+
+
+def create_risk_assessments_bulk(db: Session, rows: List[dict]) -> List[models.RiskAssessment]:
+    """Persist many scored risk assessments in a single transaction.
+
+    Each row is a dict with application_id, evaluator, notes and score. All rows are inserted with one
+    flush (batched INSERT) and one commit instead of a commit/refresh per row. The returned objects are
+    detached after the flush so the commit does not expire them (no per-row refresh SELECT).
+    """
+    if not rows:
+        return []
+    now = datetime.utcnow()
+    ras = [
+        models.RiskAssessment(
+            application_id=int(row["application_id"]),
+            evaluator=row.get("evaluator"),
+            notes=row.get("notes"),
+            score=row.get("score"),
+            created_at=now,
+        )
+        for row in rows
+    ]
+    db.add_all(ras)
+    try:
+        db.flush()
+        for ra in ras:
+            db.expunge(ra)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return ras
 
 
-def cache_shap_for_application(db: Session, application_id: int, shap_list: list) -> models.ShapExplanation:
-    """Persist a SHAP explanation JSON for the given application.
+def cache_shap_for_application(
+    db: Session, application_id: int, shap_list: list, model_version: Optional[str] = None
+) -> models.ShapExplanation:
+    """Persist a SHAP explanation for the given application in the compact format.
 
+    Older explanations beyond the retention policy are deleted in the same transaction. On failure the
+    session is rolled back before the error propagates, so the caller can keep using it.
     Returns the persisted ShapExplanation object.
     """
-    # serialize the shap list to JSON
-    shap_json = json.dumps(shap_list)
-    se = models.ShapExplanation(
-        application_id=int(application_id), shap_json=shap_json, created_at=datetime.utcnow()
-    )
-    db.add(se)
-    db.commit()
-    db.refresh(se)
+    try:
+        columns = shap_storage.compact_columns(db, shap_list, model_version)
+        se = models.ShapExplanation(application_id=int(application_id), created_at=datetime.utcnow(), **columns)
+        se = persist(db, se, before_commit=shap_storage.pruner([application_id]))
+    except Exception:
+        db.rollback()
+        raise
+    remember_shap(application_id, shap_storage.decode_columns(columns))
     return se
 
 
+def cache_shap_for_applications_bulk(db: Session, items: List[tuple], model_version: Optional[str] = None) -> int:
+    """Persist many (application_id, shap_list) explanations with one flush and one commit. Returns the count."""
+    if not items:
+        return 0
+    now = datetime.utcnow()
+    try:
+        columns = [(int(app_id), shap_storage.compact_columns(db, shap_list, model_version)) for app_id, shap_list in items]
+        db.add_all([models.ShapExplanation(application_id=app_id, created_at=now, **values) for app_id, values in columns])
+        prune = shap_storage.pruner(app_id for app_id, _ in items)
+        if prune is not None:
+            db.flush()
+            prune(db)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    for app_id, values in columns:
+        remember_shap(app_id, shap_storage.decode_columns(values))
+    return len(items)
+
+
 def get_cached_shap(db: Session, application_id: int) -> Optional[list]:
-    """Return the latest persisted SHAP explanation for an application, parsed as Python list.
+    """Return the latest persisted SHAP explanation for an application, decoded as a Python list.
 
-    Returns None if no explanation exists.
+    Served from the SHAP cache when possible; a miss reads the table and fills the cache. Returns None if
+    no explanation exists.
     """
-    se = (
-        db.query(models.ShapExplanation)
-        .filter(models.ShapExplanation.application_id == int(application_id))
-        .order_by(models.ShapExplanation.created_at.desc())
-        .first()
-    )
-    if not se:
-        return None
-    try:
-        return json.loads(se.shap_json)
-    except Exception:
-        return None
+    cache = get_shap_cache()
+    if cache is not None:
+        shap_list = cache.get(int(application_id))
+        if shap_list is not None:
+            return shap_list
+    shap_list = shap_storage.explanation_from_row(db, db.execute(latest_shap_query(application_id)).first())
+    remember_shap(application_id, shap_list, fill=True)
+    return shap_list
 
 
+def latest_shap_query(application_id: int):
+    """SELECT of the SHAP_COLUMNS of an application's latest explanation; shared with the async service."""
+    SE = models.ShapExplanation
+    return (
+        select(*shap_storage.SHAP_COLUMNS)
+        .where(SE.application_id == int(application_id))
+        .order_by(SE.created_at.desc(), SE.id.desc())
+        .limit(1)
+    )
+
 
 def get_risk_assessment(db: Session, risk_id: int) -> models.RiskAssessment:
     return db.query(models.RiskAssessment).filter(models.RiskAssessment.id == risk_id).first()
@@ -93,6 +233,149 @@ def list_risks_for_application(db: Session, application_id: int) -> List[models.
     )
 
 
-def simulate_scenario(db: Session, payload) -> None:
-    # ML/simulation not implemented yet. Keep a clear contract.
-    raise NotImplementedError("Simulation and ML scoring not implemented in scaffold")
+def list_risks_with_latest_shap(
+    db: Session, application_id: int, limit: Optional[int] = None, cursor: Optional[str] = None
+) -> Tuple[List[models.RiskAssessment], Optional[list], Optional[str]]:
+    """Assessments for an application (newest first) and its latest SHAP explanation in one query.
+
+    The latest explanation is outer-joined onto every row by its id (a scalar subquery), so the whole page
+    is a single round trip and the explanation is decoded once. With `limit`, pages are keyset-paginated over
+    (created_at, id); pass the returned cursor to get the next page. Returns (risks, shap_list, next_cursor).
+    Raises InvalidCursor for a malformed cursor.
+    """
+    from ..utils.pagination import next_cursor
+
+    rows = db.execute(risks_with_latest_shap_query(application_id, limit, cursor)).all()
+    risks = [row[0] for row in rows]
+    shap_list = shap_storage.explanation_from_row(db, rows[0][1:]) if rows else None
+    remember_shap(application_id, shap_list, fill=True)
+    return risks, shap_list, next_cursor(risks, limit)
+
+
+def risks_with_latest_shap_query(application_id: int, limit: Optional[int] = None, cursor: Optional[str] = None):
+    """SELECT of (RiskAssessment, *latest SHAP_COLUMNS) rows for list_risks_with_latest_shap; shared with the async service."""
+    from ..utils.pagination import after_cursor
+
+    RA, SE = models.RiskAssessment, models.ShapExplanation
+    latest_shap_id = (
+        select(SE.id)
+        .where(SE.application_id == int(application_id))
+        .order_by(SE.created_at.desc(), SE.id.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    query = (
+        select(RA, *shap_storage.SHAP_COLUMNS)
+        .outerjoin(SE, SE.id == latest_shap_id)
+        .where(RA.application_id == int(application_id))
+    )
+    after = after_cursor(RA.created_at, RA.id, cursor)
+    if after is not None:
+        query = query.where(after)
+    query = query.order_by(RA.created_at.desc(), RA.id.desc())
+    return query.limit(limit + 1) if limit is not None else query
+
+
+def confidence_from_scores(scores: List[Optional[float]]) -> List[Optional[float]]:
+    """Vectorized 1 - 2 * |p - 0.5| clamped to [0, 1]; None scores stay None."""
+    probs = np.array([np.nan if s is None else float(s) for s in scores], dtype=np.float64)
+    conf = np.clip(1.0 - 2.0 * np.abs(probs - 0.5), 0.0, 1.0)
+    return [None if np.isnan(c) else float(c) for c in conf.tolist()]
+
+
+# Upper bound on grid points evaluated by one sweep
+MAX_SWEEP_POINTS = 10000
+
+
+def _axis_values(axis) -> list:
+    if axis.values is not None:
+        return list(axis.values)
+    return [float(v) for v in np.linspace(axis.start, axis.stop, axis.steps)]
+
+
+def sweep_scenarios(db: Session, application_id: int, scenario: Optional[dict], axes: list) -> Optional[dict]:
+    """Evaluate an application over a grid of one or two varied fields with a single vectorized model call.
+
+    Returns None if the application does not exist. Score/tier surfaces are nested lists indexed
+    [i] (one axis) or [i][j] (two axes) following the order of the axis values; with no axes they are
+    plain values for the single scenario.
+    """
+    from ..models import credit_risk_model
+    from ..utils.schema_adapter import model_to_dict
+    from .application_service import get_application
+
+    app = get_application(db, application_id)
+    if not app:
+        return None
+
+    base = model_to_dict(app)
+    base.update(scenario or {})
+    fields = [axis.field for axis in axes]
+    grids = [_axis_values(axis) for axis in axes]
+    shape = tuple(len(g) for g in grids)
+    if int(np.prod(shape)) > MAX_SWEEP_POINTS:
+        raise ValueError(f"Sweep grid has {int(np.prod(shape))} points; the limit is {MAX_SWEEP_POINTS}")
+
+    payloads = [base]
+    for combo in itertools.product(*grids):
+        point = dict(base)
+        point.update(zip(fields, combo))
+        payloads.append(point)
+
+    preds = credit_risk_model.predict_from_payloads(payloads)
+    baseline, points = preds[0], preds[1:]
+
+    def surface(key: str):
+        return np.array([p[key] for p in points], dtype=object).reshape(shape).tolist()
+
+    return {
+        "application_id": application_id,
+        "axes": [{"field": f, "values": g} for f, g in zip(fields, grids)],
+        "baseline": baseline,
+        "scores": surface("prob_default"),
+        "risk_scores": surface("risk_score"),
+        "tiers": surface("tier"),
+        "confidences": surface("confidence"),
+        "model_version": baseline["model_version"],
+    }
+
+
+def simulate_scenario(db: Session, payload) -> Optional[dict]:
+    """Evaluate a SimulationRequest without persisting anything.
+
+    Scalar scenario values override the application's fields. List values are swept: up to two list-valued
+    fields are expanded into a grid and every point is scored in one vectorized call, producing one
+    simulated score per point. Returns None if the application does not exist.
+    """
+    from ..schemas.risk_schemas import SweepAxis
+
+    scenario = dict(payload.scenario or {})
+    axes = [SweepAxis(field=k, values=v) for k, v in scenario.items() if isinstance(v, list)]
+    if len(axes) > 2:
+        raise ValueError("At most two scenario fields can be swept at once")
+    fixed = {k: v for k, v in scenario.items() if not isinstance(v, list)}
+
+    sweep = sweep_scenarios(db, payload.application_id, fixed, axes)
+    if sweep is None:
+        return None
+
+    now = datetime.utcnow()
+    fields = [a["field"] for a in sweep["axes"]]
+    scores = np.array(sweep["scores"], dtype=object).reshape(-1)
+    confidences = np.array(sweep["confidences"], dtype=object).reshape(-1)
+    simulated = []
+    for combo, score, confidence in zip(itertools.product(*(a["values"] for a in sweep["axes"])), scores, confidences):
+        overrides = dict(zip(fields, combo))
+        simulated.append(
+            {
+                "id": -1,
+                "application_id": payload.application_id,
+                "evaluator": "simulation",
+                "notes": json.dumps(overrides, default=str) if overrides else "simulated",
+                # match the persisted precision of RiskAssessment.score
+                "score": round(float(score), 2),
+                "created_at": now,
+                "confidence": float(confidence),
+            }
+        )
+    return {"status": "OK", "message": None, "simulated_scores": simulated}
@@ -0,0 +1,260 @@
+"""Compact storage and retention for persisted SHAP explanations.
+
+An explanation (a ranked list of {feature, impact}) is stored as two small blobs: uint16 indexes into a
+feature-name table and float32 impacts, in ranking order. The names live once per model version in
+shap_feature_sets, so rows no longer repeat them and reads decode with np.frombuffer instead of parsing
+JSON. Feature sets are immutable and cached in-process after the first lookup.
+
+Only the latest SHAP_RETENTION explanations per application are kept (0 keeps all); older rows are
+deleted in the transaction that inserts a new one. Rows written before the compact format keep their
+shap_json and are still readable; migrate_shap_storage.py converts and prunes them. A table created
+before the compact format is brought up to date by upgrade_schema, which the API runs at startup.
+"""
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import LargeBinary, delete, func, inspect, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..db import models
+
+FEATURE_IDX_DTYPE = np.dtype("<u2")
+IMPACT_DTYPE = np.dtype("<f4")
+
+SE = models.ShapExplanation
+# Columns needed to decode a stored explanation, in the order explanation_from_columns takes them
+SHAP_COLUMNS = (SE.shap_json, SE.feature_set_id, SE.feature_idx, SE.impacts)
+
+_LOCK = threading.Lock()
+_NAMES: Dict[int, List[str]] = {}  # feature set id -> names
+_POSITIONS: Dict[int, Dict[str, int]] = {}  # feature set id -> name -> index
+_IDS: Dict[str, int] = {}  # digest -> feature set id
+
+
+def retention() -> int:
+    """Explanations kept per application (SHAP_RETENTION, default 5; 0 keeps all)."""
+    return max(0, int(os.getenv("SHAP_RETENTION", "5")))
+
+
+def _digest(model_version: Optional[str], names: Sequence[str]) -> str:
+    return hashlib.sha256(json.dumps([model_version, list(names)], separators=(",", ":")).encode()).hexdigest()
+
+
+def remember_feature_set(feature_set_id: int, names: List[str]) -> None:
+    with _LOCK:
+        _NAMES[feature_set_id] = names
+        _POSITIONS[feature_set_id] = {name: i for i, name in enumerate(names)}
+
+
+def cached_feature_names(feature_set_id: int) -> Optional[List[str]]:
+    return _NAMES.get(feature_set_id)
+
+
+def feature_names_query(feature_set_id: int):
+    return select(models.ShapFeatureSet.feature_names).where(models.ShapFeatureSet.id == int(feature_set_id))
+
+
+def feature_set_names(db: Session, feature_set_id: int) -> List[str]:
+    names = _NAMES.get(feature_set_id)
+    if names is None:
+        names = json.loads(db.scalar(feature_names_query(feature_set_id)))
+        remember_feature_set(feature_set_id, names)
+    return names
+
+
+def _model_feature_names(model_version: Optional[str]) -> Optional[List[str]]:
+    """Feature names of a resident model version (the active one when None), without loading anything."""
+    from ..models import credit_risk_model
+    from ..models.registry import ModelVersionNotFound
+
+    try:
+        names = credit_risk_model.get_registry().get(model_version).feature_names
+    except ModelVersionNotFound:
+        return None
+    return list(names) if names is not None else None
+
+
+def get_feature_set(db: Session, model_version: Optional[str], names: Sequence[str]) -> int:
+    """Id of the feature set for (model_version, names), creating it if needed.
+
+    Creating one commits `db`, so call this before adding other rows to the session.
+    """
+    digest = _digest(model_version, names)
+    feature_set_id = _IDS.get(digest)
+    if feature_set_id is not None:
+        return feature_set_id
+    FS = models.ShapFeatureSet
+    feature_set_id = db.scalar(select(FS.id).where(FS.digest == digest))
+    if feature_set_id is None:
+        fs = FS(model_version=model_version, digest=digest, feature_names=json.dumps(list(names)), created_at=datetime.utcnow())
+        db.add(fs)
+        try:
+            db.flush()
+            feature_set_id = fs.id
+            db.commit()
+        except IntegrityError:
+            # created concurrently by another request
+            db.rollback()
+            feature_set_id = db.scalar(select(FS.id).where(FS.digest == digest))
+    remember_feature_set(feature_set_id, list(names))
+    with _LOCK:
+        _IDS[digest] = feature_set_id
+    return feature_set_id
+
+
+def compact_columns(db: Session, shap_list: List[Dict[str, Any]], model_version: Optional[str] = None) -> Dict[str, Any]:
+    """ShapExplanation column values (feature_set_id, feature_idx, impacts) for an explanation list.
+
+    Names index into the model version's full feature table; an explanation naming features outside it
+    (or made without a resident model) gets a table of its own names.
+    """
+    names = [item["feature"] for item in shap_list]
+    table = _model_feature_names(model_version)
+    feature_set_id = get_feature_set(db, model_version, table) if table is not None else None
+    positions = _POSITIONS.get(feature_set_id) if feature_set_id is not None else None
+    if positions is None or any(name not in positions for name in names):
+        feature_set_id = get_feature_set(db, model_version, list(dict.fromkeys(names)))
+        positions = _POSITIONS[feature_set_id]
+    return {
+        "feature_set_id": feature_set_id,
+        "feature_idx": np.fromiter((positions[n] for n in names), dtype=FEATURE_IDX_DTYPE, count=len(names)).tobytes(),
+        "impacts": np.fromiter((item["impact"] for item in shap_list), dtype=IMPACT_DTYPE, count=len(names)).tobytes(),
+    }
+
+
+def decode(names: List[str], feature_idx: bytes, impacts: bytes) -> List[Dict[str, Any]]:
+    idx = np.frombuffer(feature_idx, dtype=FEATURE_IDX_DTYPE).tolist()
+    values = np.frombuffer(impacts, dtype=IMPACT_DTYPE).tolist()
+    return [{"feature": names[i], "impact": v} for i, v in zip(idx, values)]
+
+
+def decode_columns(columns: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """The explanation as read back from the compact_columns() values just written."""
+    return decode(_NAMES[columns["feature_set_id"]], columns["feature_idx"], columns["impacts"])
+
+
+def parse_shap_json(shap_json: Optional[str]) -> Optional[list]:
+    if shap_json is None:
+        return None
+    try:
+        return json.loads(shap_json)
+    except Exception:
+        return None
+
+
+def explanation_from_columns(
+    names: Optional[List[str]], shap_json: Optional[str], feature_set_id: Optional[int], feature_idx: Optional[bytes], impacts: Optional[bytes]
+) -> Optional[list]:
+    """Explanation list from a row's SHAP_COLUMNS; `names` is the feature set's table (None for legacy rows)."""
+    if feature_set_id is not None and feature_idx is not None and impacts is not None and names is not None:
+        return decode(names, feature_idx, impacts)
+    return parse_shap_json(shap_json)
+
+
+def explanation_from_row(db: Session, row: Optional[Sequence[Any]]) -> Optional[list]:
+    """Decode a row of SHAP_COLUMNS (or None) with a sync session for feature-set lookups."""
+    if row is None:
+        return None
+    shap_json, feature_set_id, feature_idx, impacts = row
+    names = feature_set_names(db, feature_set_id) if feature_set_id is not None else None
+    return explanation_from_columns(names, shap_json, feature_set_id, feature_idx, impacts)
+
+
+def prune_statement(application_ids: Optional[Iterable[int]], keep: int):
+    """DELETE of all but the newest `keep` explanations for each of `application_ids` (None: every application)."""
+    ids = sorted({int(a) for a in application_ids}) if application_ids is not None else None
+    if ids is not None and len(ids) == 1:
+        newest = select(SE.id).where(SE.application_id == ids[0]).order_by(SE.created_at.desc(), SE.id.desc()).limit(keep)
+        return delete(SE).where(SE.application_id == ids[0], SE.id.not_in(newest))
+    # a per-application LIMIT over several applications needs a window function
+    ranked = select(
+        SE.id, func.row_number().over(partition_by=SE.application_id, order_by=(SE.created_at.desc(), SE.id.desc())).label("rank")
+    )
+    if ids is not None:
+        ranked = ranked.where(SE.application_id.in_(ids))
+    ranked = ranked.subquery()
+    return delete(SE).where(SE.id.in_(select(ranked.c.id).where(ranked.c.rank > keep)))
+
+
+def pruner(application_ids: Iterable[int], keep: Optional[int] = None):
+    """before_commit hook applying the retention policy to `application_ids`, or None when it keeps all."""
+    keep = retention() if keep is None else keep
+    application_ids = list(application_ids)
+    if keep <= 0 or not application_ids:
+        return None
+    statement = prune_statement(application_ids, keep)
+    return lambda db: db.execute(statement)
+
+
+COMPACT_COLUMNS = ("feature_set_id", "feature_idx", "impacts")
+LEGACY_TABLE = f"{SE.__tablename__}_legacy"
+
+
+def upgrade_schema(engine) -> bool:
+    """Add the compact columns to a shap_explanations table created before them; True if anything changed.
+
+    Also relaxes the NOT NULL on shap_json. Existing rows keep their JSON (migrate_shap_storage.py
+    converts them). SQLite cannot relax a NOT NULL in place, so there the table is rebuilt: renamed,
+    recreated and refilled with one INSERT ... SELECT, all in a single transaction. Rows left in a legacy
+    copy by an interrupted rebuild of an earlier migration script are merged back first.
+    """
+    table = SE.__tablename__
+    inspector = inspect(engine)
+    sqlite = engine.dialect.name == "sqlite"
+    leftover = [c["name"] for c in inspector.get_columns(LEGACY_TABLE)] if sqlite and inspector.has_table(LEGACY_TABLE) else None
+    if not inspector.has_table(table) and leftover is None:
+        return False
+    columns = {c["name"]: c for c in inspector.get_columns(table)} if inspector.has_table(table) else None
+    if columns is not None and leftover is None and all(name in columns for name in COMPACT_COLUMNS) and columns["shap_json"]["nullable"]:
+        return False
+    models.ShapFeatureSet.__table__.create(bind=engine, checkfirst=True)
+    if sqlite:
+        indexes = [i["name"] for i in inspector.get_indexes(table)] if columns is not None else []
+        _rebuild_sqlite(engine, indexes, columns, leftover)
+        return True
+    blob = LargeBinary().compile(dialect=engine.dialect)
+    ddl = {"feature_set_id": "INTEGER REFERENCES shap_feature_sets(id)", "feature_idx": blob, "impacts": blob}
+    with engine.begin() as conn:
+        for name in COMPACT_COLUMNS:
+            if name not in columns:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl[name]}"))
+        if not columns["shap_json"]["nullable"]:
+            conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN shap_json DROP NOT NULL"))
+    return True
+
+
+def _copy_rows(conn, source: str, columns: List[str], where: str = "") -> None:
+    names = ", ".join(f'"{c}"' for c in columns if c in SE.__table__.c)
+    conn.exec_driver_sql(f'INSERT INTO "{SE.__tablename__}" ({names}) SELECT {names} FROM "{source}" {where}')
+
+
+def _rebuild_sqlite(engine, indexes: List[str], columns: Optional[Dict[str, Any]], leftover: Optional[List[str]]) -> None:
+    table = SE.__tablename__
+    # AUTOCOMMIT plus an explicit BEGIN: pysqlite would otherwise run the DDL outside the transaction
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+        try:
+            if columns is None or any(name not in columns for name in COMPACT_COLUMNS) or not columns["shap_json"]["nullable"]:
+                old = f"{table}_old"
+                if columns is not None:
+                    for index in indexes:
+                        conn.exec_driver_sql(f'DROP INDEX IF EXISTS "{index}"')
+                    conn.exec_driver_sql(f'ALTER TABLE "{table}" RENAME TO "{old}"')
+                SE.__table__.create(conn)
+                if columns is not None:
+                    _copy_rows(conn, old, list(columns))
+                    conn.exec_driver_sql(f'DROP TABLE "{old}"')
+            if leftover is not None:
+                # the legacy rows an interrupted copy had not reached yet
+                _copy_rows(conn, LEGACY_TABLE, leftover, f'WHERE id > (SELECT COALESCE(MAX(id), 0) FROM "{table}")')
+                conn.exec_driver_sql(f'DROP TABLE "{LEGACY_TABLE}"')
+            conn.exec_driver_sql("COMMIT")
+        except Exception:
+            conn.exec_driver_sql("ROLLBACK")
+            raise
@@ -0,0 +1,56 @@
+"""Keyset (cursor) pagination helpers for listings ordered by (created_at DESC, id DESC).
+
+A cursor is the (created_at, id) of the last row of a page, encoded as an opaque URL-safe string. The
+next page is everything strictly after it in the ordering, which an index on the sort columns can seek
+to directly instead of scanning and discarding OFFSET rows.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional, Tuple
+
+from sqlalchemy import and_, or_
+
+# Response header carrying the cursor of the next page (absent on the last page)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursor(ValueError):
+    """Cursor string could not be decoded."""
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), int(row_id)], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except Exception as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}") from e
+
+
+def after_cursor(created_at_col: Any, id_col: Any, cursor: Optional[str]):
+    """WHERE clause selecting rows after `cursor` in (created_at DESC, id DESC) order, or None."""
+    if not cursor:
+        return None
+    created_at, row_id = decode_cursor(cursor)
+    # the redundant leading range term lets the planner seek the (created_at, id) index; the OR alone
+    # is not sargable on SQLite
+    return and_(created_at_col <= created_at, or_(created_at_col < created_at, id_col < row_id))
+
+
+def next_cursor(rows: list, limit: Optional[int], created_at_attr: str = "created_at", id_attr: str = "id") -> Optional[str]:
+    """Cursor for the page after `rows`, or None when it was the last page.
+
+    Callers fetch limit + 1 rows and pass them all; the extra row only signals that more exist and is
+    removed from `rows` here.
+    """
+    if limit is None or len(rows) <= limit:
+        return None
+    del rows[limit:]
+    last = rows[-1]
+    return encode_cursor(getattr(last, created_at_attr), getattr(last, id_attr))
@@ -1,8 +1,7 @@
-from typing import Any, Dict
+from typing import Any, Dict, List
 import numpy as np
-import pandas as pd
 
-from ..models.feature_engineering import derive_features
+from ..models.feature_engineering import derive_features, UnsupportedRecord, csr_from_dense
 
 
 def model_to_dict(model: Any) -> dict:
@@ -10,14 +9,14 @@ def model_to_dict(model: Any) -> dict:
     return {c.name: getattr(model, c.name) for c in model.__table__.columns}
 
 
-def build_feature_vector_from_payload(payload: Dict[str, Any], preprocessor) -> np.ndarray:
-    """Convert a frontend application payload to a preprocessed numpy vector using the provided preprocessor.
+def _plan_for(preprocessor):
+    # FeaturePreprocessor compiles its plan lazily; other preprocessors only support the pandas path
+    return getattr(preprocessor, "plan", None) if hasattr(preprocessor, "compile_plan") else None
 
-    - payload: dict of application fields coming from frontend
-    - preprocessor: an instance of FeaturePreprocessor that has been fit (loaded from joblib)
 
-    Returns: numpy array (1D) ready to pass to model.predict_proba
-    """
+def _build_feature_vector_pandas(payload: Dict[str, Any], preprocessor) -> np.ndarray:
+    import pandas as pd
+
     # Build a single-row DataFrame from payload
     df = pd.DataFrame([payload])
 
@@ -35,7 +34,61 @@ def build_feature_vector_from_payload(payload: Dict[str, Any], preprocessor) ->
         if c not in df.columns:
             df[c] = pd.NA
 
-    # Transform using preprocessor
-    X = preprocessor.transform(df)
+    # Transform using preprocessor (dense even for sparse preprocessors: this builds single vectors)
+    X = preprocessor.transform(df, sparse=False) if getattr(preprocessor, "sparse", False) else preprocessor.transform(df)
     return X.reshape(-1) if X.ndim == 2 and X.shape[0] == 1 else X
 
+
+def build_feature_vector_from_payload(payload: Dict[str, Any], preprocessor) -> np.ndarray:
+    """Convert a frontend application payload to a preprocessed numpy vector using the provided preprocessor.
+
+    - payload: dict of application fields coming from frontend
+    - preprocessor: an instance of FeaturePreprocessor that has been fit (loaded from joblib)
+
+    Uses the preprocessor's compiled feature plan when possible and falls back to the DataFrame path
+    for payloads the plan cannot reproduce exactly.
+
+    Returns: numpy array (1D) ready to pass to model.predict_proba
+    """
+    plan = _plan_for(preprocessor)
+    if plan is not None:
+        try:
+            return plan.transform_record(payload)
+        except UnsupportedRecord:
+            pass
+    return _build_feature_vector_pandas(payload, preprocessor)
+
+
+def build_feature_matrix_from_payloads(payloads: List[Dict[str, Any]], preprocessor) -> Any:
+    """Convert many frontend payloads to a single preprocessed 2D matrix (one row per payload).
+
+    Every row gets exactly the vector build_feature_vector_from_payload would produce for it.
+
+    Returns: numpy array of shape (len(payloads), n_features), or a CSR matrix of that shape for sparse
+    preprocessors
+    """
+    payloads = list(payloads)
+    sparse = getattr(preprocessor, "sparse", False)
+    plan = _plan_for(preprocessor)
+    if plan is None:
+        n_features = len(getattr(preprocessor, "feature_names", None) or [])
+        X = np.empty((len(payloads), n_features))
+        for i, payload in enumerate(payloads):
+            X[i] = _build_feature_vector_pandas(payload, preprocessor)
+        return csr_from_dense(X) if sparse else X
+
+    # rows the plan cannot reproduce exactly go through the DataFrame path one by one; the rest stay compiled
+    unsupported: List[int] = []
+    X = plan.transform_records(payloads, sparse=sparse, unsupported=unsupported)
+    if not unsupported:
+        return X
+    fallback = np.vstack([_build_feature_vector_pandas(payloads[i], preprocessor) for i in unsupported])
+    if not sparse:
+        X[unsupported] = fallback
+        return X
+    import scipy.sparse as sp
+
+    # append the replacement rows and pick them in place of the placeholders
+    order = np.arange(len(payloads))
+    order[unsupported] = len(payloads) + np.arange(len(unsupported))
+    return sp.vstack([X, csr_from_dense(fallback)], format="csr")[order]
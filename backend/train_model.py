@@ -0,0 +1,81 @@
+"""
+Train the credit risk model and write its artifacts (see train_and_save in src/models/credit_risk_model.py).
+
+Prints the CV report (per-fold metrics, boosting rounds and fit times), the test metrics and the wall
+time of every stage. Run from the backend folder:
+
+    python train_model.py [--output-dir models] [--jobs N] [--parallel-cv] [--early-stopping-rounds 50]
+    python train_model.py --tune 27 [--tune-checkpoint models/tuning.json]    # search parameters first
+    python train_model.py --data big.csv --out-of-core [--chunk-size 100000]  # stream a CSV too large for memory
+"""
+import argparse
+import json
+
+from src.models import credit_risk_model, training
+
+parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+parser.add_argument("--output-dir", default="models")
+parser.add_argument("--data", default="data/raw/german_credit.csv", help="training CSV")
+parser.add_argument("--folds", type=int, default=5)
+parser.add_argument("--jobs", type=int, default=0, help="cores to use (0: all)")
+parser.add_argument("--parallel-cv", action="store_true", help="train the folds concurrently in a process pool")
+parser.add_argument("--early-stopping-rounds", type=int, default=training.DEFAULT_EARLY_STOPPING_ROUNDS, help="0 disables early stopping")
+parser.add_argument("--max-rounds", type=int, default=training.DEFAULT_MAX_ROUNDS)
+parser.add_argument("--seed", type=int, default=42)
+parser.add_argument("--tune", type=int, default=0, metavar="TRIALS", help="successive-halving search over this many configurations")
+parser.add_argument("--tune-checkpoint", help="JSON checkpoint to resume an interrupted search from")
+parser.add_argument("--out-of-core", action="store_true", help="read --data in chunks and train from an external-memory matrix")
+parser.add_argument("--chunk-size", type=int, default=100_000, help="rows per chunk with --out-of-core")
+parser.add_argument("--holdout", type=float, default=0.1, help="share of rows held out with --out-of-core")
+parser.add_argument("--sparse", action="store_true", help="train on CSR feature matrices (high-cardinality categoricals)")
+parser.add_argument("--in-memory-matrix", action="store_true", help="with --out-of-core, keep the quantized matrix in memory")
+args = parser.parse_args()
+
+if args.out_of_core:
+    from src.models import out_of_core
+
+    result = out_of_core.train_out_of_core(
+        args.data,
+        output_dir=args.output_dir,
+        chunksize=args.chunk_size,
+        holdout_fraction=args.holdout,
+        max_rounds=args.max_rounds,
+        early_stopping_rounds=args.early_stopping_rounds or None,
+        random_state=args.seed,
+        n_jobs=args.jobs,
+        external_memory=not args.in_memory_matrix,
+        sparse=args.sparse,
+    )
+    print(f"Rows: {result['rows']} in {result['chunks']} chunks ({result['train_rows']} train, {result['holdout_rows']} holdout), {result['rounds']} rounds")
+    print("Holdout:", json.dumps(result["holdout_metrics"]))
+    print("Stages (ms):", json.dumps({k: round(v, 1) for k, v in result["timings"].items()}))
+    print(f"✓ Saved model {result['model_version']} to {result['bundle_path']}")
+else:
+    result = credit_risk_model.train_and_save(
+        output_dir=args.output_dir,
+        local_data_path=args.data,
+        n_splits=args.folds,
+        random_state=args.seed,
+        n_jobs=args.jobs,
+        cv_workers=None if args.parallel_cv else 1,
+        early_stopping_rounds=args.early_stopping_rounds or None,
+        max_rounds=args.max_rounds,
+        tune_trials=args.tune,
+        tune_checkpoint=args.tune_checkpoint,
+        sparse=args.sparse,
+    )
+
+    tuning = result.get("tuning")
+    if tuning is not None:
+        print(f"Tuning: {tuning['evaluations']} evaluations ({tuning['resumed_evaluations']} from checkpoint) in {tuning['wall_ms'] / 1000:.1f} s")
+        for rung in tuning["rungs"]:
+            print(f"  {rung['rounds']:>5} rounds: {rung['trials']:>3} trials, best ROC AUC {rung['best_roc_auc']:.4f}")
+        print("  best:", json.dumps(tuning["best_params"]))
+
+    cv = result["cv_results"]
+    print(f"CV ({cv['workers']} workers x {cv['threads_per_fold']} threads): ROC AUC {cv['roc_auc_mean']:.4f} ± {cv['roc_auc_std']:.4f}")
+    for fold in cv["folds"]:
+        print(f"  fold {fold['fold']}: ROC AUC {fold['roc_auc']:.4f}, {fold['rounds']} rounds, fit {fold['fit_ms']:.0f} ms")
+    print("Test:", json.dumps(result["test_metrics"]))
+    print("Stages (ms):", json.dumps({k: round(v, 1) for k, v in result["timings"].items()}))
+    print(f"✓ Saved model {result['model_version']} to {result['bundle_path']}")